@@ -0,0 +1,120 @@
+"""
+benchmarks/admin_login_burst.py — задержка участников во время волны входов админов
+
+Поднимает приложение (uvicorn, реальный HTTP) на временной БД. Участник последовательно
+запрашивает GET /api/hackathons, пока идут волны по --logins одновременных
+POST /api/auth/admin/login. Замеры:
+
+- без входов — базовая задержка;
+- offload — проверка pbkdf2 в пуле хеширования (utils/security.verify_and_update_password);
+- inline — проверка прямо в event loop, как было до пула (для сравнения).
+
+    python -m benchmarks.admin_login_burst [--logins 40] [--requests 100]
+
+Стоимость хеширования задаётся как в приложении: PASSWORD_HASH_ROUNDS, PASSWORD_HASH_WORKERS.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from benchmarks.common import free_port, start_server, summary_ms, use_temp_database
+
+use_temp_database(
+    RATE_LIMIT_ENABLED="false",
+    MAINTENANCE_INTERVAL_MINUTES="0",
+    ANALYTICS_SNAPSHOT_INTERVAL_SECONDS="0",
+    NOTIFICATIONS_ENABLED="false",
+)
+
+import httpx  # noqa: E402
+from database import SessionLocal, init_db  # noqa: E402
+from models import Admin, User  # noqa: E402
+from routers import auth  # noqa: E402
+from services.jwt_handler import create_access_token  # noqa: E402
+from utils.security import hash_password, pwd_context  # noqa: E402
+
+EMAIL = "bench-admin@example.com"
+PASSWORD = "bench-password"
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("routers.auth").setLevel(logging.WARNING)
+
+
+async def verify_inline(plain_password: str, hashed_password: str):
+    """Прежний вариант: pbkdf2 в event loop"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def seed() -> str:
+    """Админ с паролем и участник; вернуть токен участника"""
+    db = SessionLocal()
+    try:
+        user = User(telegram_id=1, full_name="Participant")
+        db.add_all([user, Admin(email=EMAIL, hashed_password=hash_password(PASSWORD))])
+        db.commit()
+        return create_access_token(user_id=user.id, is_admin=False)
+    finally:
+        db.close()
+
+
+async def login_bursts(client: httpx.AsyncClient, logins: int, stop: asyncio.Event, durations: list):
+    """Волны одновременных входов админа, пока не остановят"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/api/auth/admin/login", json={"email": EMAIL, "password": PASSWORD})
+            for _ in range(logins)
+        ))
+        for response in responses:
+            response.raise_for_status()
+        durations.append(time.perf_counter() - started)
+
+
+async def probe(client: httpx.AsyncClient, token: str, requests: int) -> list:
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get("/api/hackathons", headers={"Authorization": f"Bearer {token}"})
+        response.raise_for_status()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def run(base_url: str, token: str, args):
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=httpx.Limits(max_connections=None)) as client:
+        await probe(client, token, 10)  # прогрев
+        print(f"  {'no logins':9}: {summary_ms(await probe(client, token, args.requests))}")
+        for mode, verify in (("offload", auth.verify_and_update_password), ("inline", verify_inline)):
+            auth.verify_and_update_password = verify
+            stop = asyncio.Event()
+            durations = []
+            bursts = asyncio.create_task(login_bursts(client, args.logins, stop, durations))
+            await asyncio.sleep(0.05)  # первая волна успевает начаться
+            timings = await probe(client, token, args.requests)
+            stop.set()
+            await bursts
+            print(
+                f"  {mode:9}: {summary_ms(timings)}; "
+                f"{len(durations)} bursts, {sum(durations) / len(durations):.2f}s each"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40, help="одновременных входов в волне")
+    parser.add_argument("--requests", type=int, default=100, help="запросов участника в замере")
+    args = parser.parse_args()
+
+    init_db()
+    token = seed()
+    port = free_port()
+    server = start_server(port)
+    print(f"GET /api/hackathons latency during bursts of {args.logins} admin logins ({args.requests} requests):")
+    try:
+        asyncio.run(run(f"http://127.0.0.1:{port}", token, args))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
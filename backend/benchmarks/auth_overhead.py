@@ -0,0 +1,91 @@
+"""
+benchmarks/auth_overhead.py — накладные расходы аутентификации на запрос
+
+Замеряет зависимости dependencies.py так, как их вызывает FastAPI: новая сессия на
+запрос, токен из заголовка. Без кеша (кеши сбрасываются перед каждым вызовом — как
+до services/auth_cache.py: jwt.decode + SELECT users) и с тёплым кешем токенов и
+принципалов (get_current_user_for_update всегда читает строку users, кешируется только
+декодированный токен). Токены нескольких пользователей перебираются по кругу; в конце
+печатается доля попаданий кеша.
+
+    python -m benchmarks.auth_overhead [--users 5000] [--tokens 200] [--requests 20000]
+"""
+import argparse
+import time
+from benchmarks.common import seed_hackathon, summary_ms, use_temp_database
+
+use_temp_database()
+
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+from database import SessionLocal, init_db  # noqa: E402
+from dependencies import get_current_principal, get_current_user, get_current_user_for_update  # noqa: E402
+from models import UserHackathon  # noqa: E402
+from services.auth_cache import get_auth_cache_stats, principal_cache, token_cache, token_version_cache  # noqa: E402
+from services.jwt_handler import create_access_token  # noqa: E402
+
+DEPENDENCIES = {
+    "get_current_user": get_current_user,
+    "get_current_principal": get_current_principal,
+    "get_current_user_for_update": get_current_user_for_update,
+}
+
+
+def clear_caches():
+    for cache in (token_cache, principal_cache, token_version_cache):
+        cache.clear()
+
+
+def measure(dependency, credentials: list, requests: int, cached: bool) -> list:
+    """Время вызова зависимости на requests запросов (сессия на запрос, как в get_db)"""
+    clear_caches()
+    timings = []
+    for i in range(requests):
+        if not cached:
+            clear_caches()
+        db = SessionLocal()
+        started = time.perf_counter()
+        try:
+            dependency(credentials=credentials[i % len(credentials)], db=db)
+        finally:
+            db.close()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--tokens", type=int, default=200, help="сколько разных пользователей делают запросы")
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    init_db()
+    hackathon_id = seed_hackathon(args.users)
+    db = SessionLocal()
+    user_ids = [user_id for (user_id,) in db.query(UserHackathon.user_id).filter(
+        UserHackathon.hackathon_id == hackathon_id
+    ).limit(args.tokens)]
+    db.close()
+    credentials = [
+        HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token(user_id=user_id, is_admin=False))
+        for user_id in user_ids
+    ]
+
+    print(f"Auth overhead per request ({args.requests} requests, {len(credentials)} tokens, {args.users} users):")
+    for name, dependency in DEPENDENCIES.items():
+        means = {}
+        for label, cached in (("no cache", False), ("cached", True)):
+            timings = measure(dependency, credentials, args.requests, cached)
+            means[label] = sum(timings) / len(timings)
+            print(f"  {name:28} {label:9} mean {means[label] * 1000:.3f} ms, {summary_ms(timings)}")
+        print(f"  {name:28} speedup   {means['no cache'] / means['cached']:.1f}x")
+
+    # Доля попаданий: get_current_user с пустого кеша (первый запрос каждого токена — промах)
+    measure(get_current_user, credentials, args.requests, cached=True)
+    for cache, stats in get_auth_cache_stats().items():
+        if stats["hits"] or stats["misses"]:
+            print(f"  {cache}: hit ratio {stats['hit_ratio']:.2%} ({stats['hits']} hits, {stats['misses']} misses)")
+
+
+if __name__ == "__main__":
+    main()
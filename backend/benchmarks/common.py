@@ -0,0 +1,119 @@
+"""
+benchmarks/common.py — общие части бенчмарков: временная БД, сервер и статистика задержек
+
+Бенчмарки запускаются из каталога backend, например:
+    python -m benchmarks.search_participants
+use_temp_database() нужно вызвать до импорта config/database: настройки читаются при импорте.
+"""
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+def use_temp_database(**env) -> str:
+    """Направить приложение во временную SQLite БД (и задать доп. переменные окружения)"""
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.sqlite")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-" + "x" * 16)
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "")
+    for name, value in env.items():
+        os.environ[name] = str(value)
+    return path
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int):
+    """Запустить приложение (main.app) в uvicorn в фоновом потоке; вернуть uvicorn.Server"""
+    import uvicorn
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def percentile(values: list, p: float) -> float:
+    """Перцентиль p (0..100) по ближайшему рангу"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summary_ms(values: list) -> str:
+    """p50/p99/max в миллисекундах"""
+    return (
+        f"p50 {percentile(values, 50) * 1000:.2f} ms, "
+        f"p99 {percentile(values, 99) * 1000:.2f} ms, "
+        f"max {max(values) * 1000:.2f} ms"
+    )
+
+
+def seed_hackathon(participants: int, team_size: int = 5, batch: int = 10000) -> int:
+    """
+    Хакатон с participants участниками (с навыками), все в командах по team_size человек.
+    Пишет пачками через Core INSERT; возвращает id хакатона
+    """
+    from sqlalchemy import func, insert
+    from database import SessionLocal
+    from models import Hackathon, Team, TeamMember, User, UserHackathon
+
+    rng = random.Random(participants)
+    skills = ["Python", "React", "Go", "Rust", "Figma", "ML", "DevOps", "Java", "Kotlin", "Swift"]
+    levels = ["junior", "middle", "senior"]
+    batch -= batch % team_size  # команда не должна делиться между пачками
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        hackathon = Hackathon(name=f"Bench {participants} {time.time_ns()}", start_date=now, end_date=now + timedelta(days=2))
+        db.add(hackathon)
+        db.flush()
+        hackathon_id = hackathon.id
+        first_id = (db.query(func.max(User.id)).scalar() or 0) + 1
+
+        for start in range(first_id, first_id + participants, batch):
+            user_ids = range(start, min(first_id + participants, start + batch))
+            db.execute(insert(User), [
+                {
+                    "id": user_id,
+                    "telegram_id": 10_000_000 + user_id,
+                    "telegram_username": f"user{user_id}",
+                    "full_name": f"Participant {user_id}",
+                    "skills": json.dumps(rng.sample(skills, 3)),
+                    "experience_level": rng.choice(levels),
+                }
+                for user_id in user_ids
+            ])
+            # Капитан команды — первый из каждых team_size участников
+            captains = [user_id for user_id in user_ids if (user_id - first_id) % team_size == 0]
+            db.execute(insert(Team), [
+                {"hackathon_id": hackathon_id, "name": f"Team {captain}", "captain_id": captain, "status": "open"}
+                for captain in captains
+            ])
+            team_ids = dict(db.query(Team.captain_id, Team.id).filter(
+                Team.hackathon_id == hackathon_id, Team.captain_id.in_(captains)
+            ))
+            team_of = {user_id: team_ids[user_id - (user_id - first_id) % team_size] for user_id in user_ids}
+            db.execute(insert(TeamMember), [
+                {"team_id": team_of[user_id], "user_id": user_id} for user_id in user_ids
+            ])
+            db.execute(insert(UserHackathon), [
+                {"user_id": user_id, "hackathon_id": hackathon_id, "team_id": team_of[user_id]} for user_id in user_ids
+            ])
+            db.commit()
+        return hackathon_id
+    finally:
+        db.close()
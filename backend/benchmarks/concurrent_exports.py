@@ -0,0 +1,128 @@
+"""
+benchmarks/concurrent_exports.py — задержка списка команд во время выгрузок админом
+
+Поднимает приложение (uvicorn, реальный HTTP) на временной БД и замеряет p50/p99
+GET /api/teams/hackathons/{id} при 0, 2, 4, 8 одновременных выгрузках участников
+большого хакатона. Обработчики с БД выполняются в пуле потоков (DB_THREADPOOL_SIZE),
+выгрузки сверх EXPORT_MAX_CONCURRENT ждут очереди в event loop, не занимая потоков,
+а сверх EXPORT_MAX_QUEUED получают 503 — поэтому p99 не должен расти вместе с числом
+выгрузок.
+
+    python -m benchmarks.concurrent_exports [--participants 100000] [--exports 0 2 4 8] [--requests 300]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from benchmarks.common import free_port, percentile, seed_hackathon, start_server, summary_ms, use_temp_database
+
+use_temp_database(
+    RATE_LIMIT_ENABLED="false",
+    MAINTENANCE_INTERVAL_MINUTES="0",
+    ANALYTICS_SNAPSHOT_INTERVAL_SECONDS="0",
+    NOTIFICATIONS_ENABLED="false",
+)
+
+import httpx  # noqa: E402
+from database import SessionLocal, init_db  # noqa: E402
+from models import Admin, UserHackathon  # noqa: E402
+from services.jwt_handler import create_access_token  # noqa: E402
+
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def create_tokens(small_hackathon_id: int) -> tuple[str, str]:
+    """Токены участника маленького хакатона и админа"""
+    db = SessionLocal()
+    try:
+        user_id = db.query(UserHackathon.user_id).filter(UserHackathon.hackathon_id == small_hackathon_id).limit(1).scalar()
+        admin = Admin(email="bench@example.com", hashed_password="-")
+        db.add(admin)
+        db.commit()
+        return create_access_token(user_id=user_id, is_admin=False), create_access_token(user_id=admin.id, is_admin=True)
+    finally:
+        db.close()
+
+
+async def export_loop(client: httpx.AsyncClient, url: str, token: str, stop: asyncio.Event, done: list):
+    """Выгружать участников по кругу, пока не остановят"""
+    while not stop.is_set():
+        async with client.stream("GET", url, headers={"Authorization": f"Bearer {token}"}) as response:
+            if response.status_code == 503:  # очередь выгрузок заполнена
+                await asyncio.sleep(0.5)
+                continue
+            response.raise_for_status()
+            async for _ in response.aiter_bytes():
+                pass
+        done.append(1)
+
+
+async def probe(client: httpx.AsyncClient, url: str, token: str, requests: int, concurrency: int) -> list:
+    """Задержки requests запросов при concurrency одновременных клиентах"""
+    timings = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get(url, headers={"Authorization": f"Bearer {token}"})
+            response.raise_for_status()
+            timings.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return timings
+
+
+async def run(base_url: str, args, big_id: int, small_id: int, user_token: str, admin_token: str):
+    teams_url = f"/api/teams/hackathons/{small_id}"
+    export_url = f"/api/admin/{big_id}/participants/export?format=csv"
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=httpx.Limits(max_connections=None)) as client:
+        await probe(client, teams_url, user_token, 20, 1)  # прогрев
+        for exports in args.exports:
+            stop = asyncio.Event()
+            done = []
+            loops = [asyncio.create_task(export_loop(client, export_url, admin_token, stop, done)) for _ in range(exports)]
+            await asyncio.sleep(0.5 if exports else 0)  # выгрузки успевают начаться
+            timings = await probe(client, teams_url, user_token, args.requests, args.concurrency)
+            stop.set()
+            for loop in loops:
+                loop.cancel()
+            await asyncio.gather(*loops, return_exceptions=True)
+            results[exports] = timings
+            print(f"  {exports:2} exports ({len(done)} finished): {summary_ms(timings)}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--participants", type=int, default=100000, help="участников в выгружаемом хакатоне")
+    parser.add_argument("--teams", type=int, default=40, help="команд в хакатоне, список которых запрашивается")
+    parser.add_argument("--exports", type=int, nargs="+", default=[0, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    init_db()
+    started = time.perf_counter()
+    big_id = seed_hackathon(args.participants)
+    small_id = seed_hackathon(args.teams * 5)
+    print(f"Seeded {args.participants} + {args.teams * 5} participants in {time.perf_counter() - started:.1f}s")
+    user_token, admin_token = create_tokens(small_id)
+
+    port = free_port()
+    server = start_server(port)
+    print(f"GET /api/teams/hackathons/{{id}} latency ({args.requests} requests, {args.concurrency} clients):")
+    try:
+        results = asyncio.run(run(f"http://127.0.0.1:{port}", args, big_id, small_id, user_token, admin_token))
+    finally:
+        server.should_exit = True
+
+    baseline = percentile(results[args.exports[0]], 99)
+    for exports, timings in results.items():
+        print(f"  p99 with {exports} exports: {percentile(timings, 99) / baseline:.2f}x of {args.exports[0]} exports")
+
+
+if __name__ == "__main__":
+    main()
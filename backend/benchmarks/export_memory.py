@@ -0,0 +1,112 @@
+"""
+benchmarks/export_memory.py — память процесса при потоковом экспорте 500k участников
+
+Экспорт участников и команд (services/exports.py) читается так же, как его отдаёт
+StreamingResponse, и по ходу замеряется анонимная часть RSS процесса (страницы файла
+БД, отображённые через mmap, не в счёт). При потоковой выдаче RSS должен выйти на
+плато после первых пачек и не расти с числом выгруженных строк.
+Для сравнения (--buffered) тот же CSV собирается целиком в памяти, как раньше.
+
+    python -m benchmarks.export_memory [--participants 500000] [--formats csv parquet] [--buffered]
+
+Завершается с кодом 1, если RSS вырос больше чем на --max-growth-mb после первых 10% выгрузки.
+"""
+import argparse
+import gc
+import resource
+import sys
+import time
+from benchmarks.common import seed_hackathon, use_temp_database
+
+use_temp_database()
+
+from database import init_db  # noqa: E402
+from services.exports import participants_export, teams_export  # noqa: E402
+
+
+def rss_mb() -> float:
+    """
+    Память процесса в МБ: анонимная часть RSS (куча Python, буферы) на Linux — страницы
+    БД, отображённые через mmap (SQLITE_MMAP_SIZE), в неё не входят; иначе пиковый RSS
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def measure_streaming(label: str, chunks, samples: int = 10) -> float:
+    """Прочитать экспорт по кускам, печатая RSS; вернуть рост RSS после первых 10% (МБ)"""
+    gc.collect()
+    started_rss = rss_mb()
+    started = time.perf_counter()
+    readings = []
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+        readings.append((total, rss_mb()))
+    elapsed = time.perf_counter() - started
+
+    print(f"{label}: {total / 1024 / 1024:.1f} MB in {elapsed:.1f}s, RSS before {started_rss:.1f} MB")
+    step = max(1, len(readings) // samples)
+    for sent, rss in readings[step - 1::step]:
+        print(f"  {sent / total * 100:5.1f}%  sent {sent / 1024 / 1024:8.1f} MB  RSS {rss:7.1f} MB")
+
+    # Плато: рост от конца первых 10% выгрузки до пика
+    warm_rss = next(rss for sent, rss in readings if sent >= total * 0.1)
+    peak_rss = max(rss for _, rss in readings)
+    growth = peak_rss - warm_rss
+    print(f"  RSS after 10%: {warm_rss:.1f} MB, peak: {peak_rss:.1f} MB, growth: {growth:+.1f} MB")
+    return growth
+
+
+def measure_buffered(hackathon_id: int):
+    """Прежний вариант: весь CSV в памяти до отправки"""
+    gc.collect()
+    started_rss = rss_mb()
+    body = "".join(participants_export(hackathon_id, "csv"))
+    print(
+        f"participants csv, buffered: {len(body) / 1024 / 1024:.1f} MB, "
+        f"RSS {started_rss:.1f} -> {rss_mb():.1f} MB"
+    )
+    del body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--participants", type=int, default=500000)
+    parser.add_argument("--formats", nargs="+", default=["csv", "parquet"], choices=["csv", "parquet", "arrow"])
+    parser.add_argument("--buffered", action="store_true", help="также собрать CSV целиком в памяти для сравнения")
+    parser.add_argument("--max-growth-mb", type=float, default=64)
+    args = parser.parse_args()
+
+    init_db()
+    started = time.perf_counter()
+    hackathon_id = seed_hackathon(args.participants)
+    print(f"Seeded {args.participants} participants in {time.perf_counter() - started:.1f}s")
+
+    growth = {}
+    for export_format in args.formats:
+        growth[f"participants {export_format}"] = measure_streaming(
+            f"participants {export_format}", participants_export(hackathon_id, export_format)
+        )
+        growth[f"teams {export_format}"] = measure_streaming(
+            f"teams {export_format}", teams_export(hackathon_id, export_format)
+        )
+    if args.buffered:
+        measure_buffered(hackathon_id)
+
+    failed = [label for label, value in growth.items() if value > args.max_growth_mb]
+    if failed:
+        print(f"RSS grew by more than {args.max_growth_mb} MB: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"RSS flat (growth <= {args.max_growth_mb} MB) for all exports")
+
+
+if __name__ == "__main__":
+    main()
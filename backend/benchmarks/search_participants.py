@@ -0,0 +1,106 @@
+"""
+benchmarks/search_participants.py — поиск участников хакатона на 50k пользователей
+
+Сравнивает полнотекстовый поиск (services/search.py, FTS5) с прежним фильтром
+full_name ILIKE '%...%' на том же запросе, что и GET /api/users/hackathons/{id}/participants.
+Проверяет также, что ё и е ищутся одинаково.
+
+    python -m benchmarks.search_participants [--users 50000] [--repeat 50]
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+from benchmarks.common import summary_ms, use_temp_database
+
+use_temp_database()
+
+from database import SessionLocal, init_db  # noqa: E402
+from models import Hackathon, User, UserHackathon  # noqa: E402
+from services.search import apply_participant_search  # noqa: E402
+
+FIRST_NAMES = ["Пётр", "Алёна", "Иван", "Мария", "Сергей", "Ольга", "Фёдор", "Анна", "Дмитрий", "Елена"]
+LAST_NAMES = ["Иванов", "Ёжиков", "Смирнов", "Кузнецов", "Соловьёв", "Попов", "Королёв", "Орлов", "Волков", "Зайцев"]
+SKILLS = ["python", "react", "go", "rust", "figma", "ml", "devops", "java", "kotlin", "swift"]
+WORDS = ["люблю", "машинное", "обучение", "дизайн", "бэкенд", "фронтенд", "хакатоны", "стартапы", "данные", "игры"]
+
+QUERIES = ["петр", "Пётр", "ежиков", "соловьев ива", "машинное обуч", "python", "zzz_нет_такого"]
+
+
+def seed(users: int):
+    rng = random.Random(42)
+    db = SessionLocal()
+    hackathon = Hackathon(name="Bench", start_date=datetime(2026, 1, 1), end_date=datetime(2026, 1, 2), max_team_size=5)
+    db.add(hackathon)
+    db.flush()
+    for start in range(0, users, 5000):
+        batch = [
+            User(
+                telegram_id=10_000_000 + i,
+                telegram_username=f"user{i}",
+                full_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                bio=" ".join(rng.sample(WORDS, 4)),
+                skills=json.dumps(rng.sample(SKILLS, 3)),
+            )
+            for i in range(start, min(users, start + 5000))
+        ]
+        db.add_all(batch)
+        db.flush()
+        db.add_all([UserHackathon(user_id=user.id, hackathon_id=hackathon.id) for user in batch])
+        db.commit()
+    hackathon_id = hackathon.id
+    db.close()
+    return hackathon_id
+
+
+def participants_query(db, hackathon_id: int):
+    return db.query(User).join(UserHackathon, User.id == UserHackathon.user_id).filter(
+        UserHackathon.hackathon_id == hackathon_id
+    )
+
+
+def run(label: str, search_fn, hackathon_id: int, repeat: int):
+    db = SessionLocal()
+    for search in QUERIES:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = search_fn(participants_query(db, hackathon_id), db, search).limit(50).all()
+            timings.append(time.perf_counter() - started)
+        print(f"  {label:5} {search!r:18} {len(rows):3} rows  {summary_ms(timings)}")
+    db.close()
+
+
+def ilike_search(query, db, search):
+    return query.filter(User.full_name.ilike(f"%{search}%"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    init_db()
+    started = time.perf_counter()
+    hackathon_id = seed(args.users)
+    print(f"Seeded {args.users} participants in {time.perf_counter() - started:.1f}s")
+
+    # ё и е должны находить одно и то же
+    db = SessionLocal()
+    for a, b in [("петр", "пётр"), ("ежиков", "Ёжиков"), ("соловьев", "соловьёв")]:
+        found_a = {u.id for u in apply_participant_search(participants_query(db, hackathon_id), db, a)}
+        found_b = {u.id for u in apply_participant_search(participants_query(db, hackathon_id), db, b)}
+        assert found_a and found_a == found_b, (a, b, len(found_a), len(found_b))
+    db.close()
+    print("ё/е folding: OK")
+
+    print("Full-text search (FTS5):")
+    run("fts", apply_participant_search, hackathon_id, args.repeat)
+    print("Substring filter (full_name ILIKE):")
+    run("ilike", ilike_search, hackathon_id, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+benchmarks/sqlite_profiles.py — пропускная способность обновления профилей по профилям SQLite
+
+Для каждого SQLITE_PROFILE (default — только foreign_keys, production — WAL,
+synchronous=NORMAL, mmap, cache_size, temp_store, busy_timeout; см. config.py)
+в отдельном процессе на новой БД запускает смешанную нагрузку из нескольких потоков:
+обновления профиля (PUT /api/users/me: навыки, счётчики аналитики, commit) и чтения
+профилей (GET /api/users/{id}). Печатает операции в секунду, p99 и ошибки
+"database is locked".
+
+    python -m benchmarks.sqlite_profiles [--profiles default production] [--threads 8] [--seconds 10] [--writes 0.2]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from benchmarks.common import percentile, seed_hackathon, summary_ms, use_temp_database
+
+SKILLS = ["Python", "React", "Go", "Rust", "Figma", "ML", "DevOps", "Java", "Kotlin", "Swift"]
+LEVELS = ["junior", "middle", "senior"]
+
+
+def worker(user_ids: list, args, stop: threading.Event, stats: dict, seed: int):
+    """Поток нагрузки: обработчики роутера users с собственной сессией на операцию"""
+    from sqlalchemy.exc import OperationalError
+    from database import SessionLocal
+    from models import User
+    from routers.users import get_user_profile, update_my_profile
+    from schemas import UserUpdateRequest
+
+    rng = random.Random(seed)
+    while not stop.is_set():
+        write = rng.random() < args.writes
+        user_id = rng.choice(user_ids)
+        db = SessionLocal()
+        started = time.perf_counter()
+        try:
+            if write:
+                user = db.get(User, user_id)
+                update_my_profile(UserUpdateRequest(
+                    bio=f"bio {rng.random()}",
+                    skills=rng.sample(SKILLS, 3),
+                    experience_level=rng.choice(LEVELS)
+                ), user, db)
+            else:
+                get_user_profile(user_id, db, None)
+            stats["writes" if write else "reads"].append(time.perf_counter() - started)
+        except OperationalError as e:
+            db.rollback()
+            stats["errors"].append(str(e.orig))
+        finally:
+            db.close()
+
+
+def run_profile(args) -> dict:
+    """Нагрузка в текущем процессе (SQLITE_PROFILE уже задан в окружении)"""
+    use_temp_database(SQLITE_PROFILE=args.profile)
+    from database import SessionLocal, engine, init_db
+    from models import UserHackathon
+
+    init_db()
+    hackathon_id = seed_hackathon(args.users)
+    db = SessionLocal()
+    user_ids = [user_id for (user_id,) in db.query(UserHackathon.user_id).filter(UserHackathon.hackathon_id == hackathon_id)]
+    db.close()
+    with engine.connect() as conn:
+        journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+
+    stats = {"reads": [], "writes": [], "errors": []}
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=worker, args=(user_ids, args, stop, stats, i)) for i in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(f"{args.profile} (journal_mode={journal_mode}):")
+    for kind in ("writes", "reads"):
+        if stats[kind]:
+            print(f"  {kind:6} {len(stats[kind]) / args.seconds:8.1f} ops/s  {summary_ms(stats[kind])}")
+    locked = sum("locked" in error for error in stats["errors"])
+    print(f"  errors {len(stats['errors'])} (database is locked: {locked})")
+    return {
+        "profile": args.profile,
+        "writes_per_second": len(stats["writes"]) / args.seconds,
+        "reads_per_second": len(stats["reads"]) / args.seconds,
+        "write_p99_ms": percentile(stats["writes"], 99) * 1000,
+        "errors": len(stats["errors"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", nargs="+", default=["default", "production"])
+    parser.add_argument("--profile", help=argparse.SUPPRESS)  # запуск одного профиля в дочернем процессе
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--writes", type=float, default=0.2, help="доля обновлений профиля")
+    args = parser.parse_args()
+
+    if args.profile:
+        print("RESULT " + json.dumps(run_profile(args)))
+        return
+
+    # Настройки читаются при импорте, поэтому каждый профиль — в своём процессе
+    results = []
+    passthrough = [
+        "--users", str(args.users), "--threads", str(args.threads),
+        "--seconds", str(args.seconds), "--writes", str(args.writes)
+    ]
+    for profile in args.profiles:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.sqlite_profiles", "--profile", profile, *passthrough],
+            env={**os.environ, "SQLITE_PROFILE": profile},
+            capture_output=True, text=True, check=True
+        ).stdout
+        for line in output.splitlines():
+            if line.startswith("RESULT "):
+                results.append(json.loads(line[len("RESULT "):]))
+            elif not line.startswith("✅"):
+                print(line)
+
+    print("Summary:")
+    for result in results:
+        print(
+            f"  {result['profile']:12} writes {result['writes_per_second']:8.1f}/s  "
+            f"reads {result['reads_per_second']:8.1f}/s  write p99 {result['write_p99_ms']:8.1f} ms  "
+            f"errors {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+from database import SessionLocal
+from models import Hackathon
+from services.stats import check_hackathon_stats, rebuild_hackathon_stats
+import sys
+
+
+def main():
+    """
+    Сверяет инкрементальные счётчики аналитики с пересчитанными с нуля.
+    С флагом --fix пересчитывает счётчики хакатонов, где найдены расхождения.
+
+    Использование: python check_stats.py [--fix]
+    """
+    fix = "--fix" in sys.argv[1:]
+
+    db = SessionLocal()
+
+    try:
+        drifted = 0
+        for hackathon_id, name in db.query(Hackathon.id, Hackathon.name).order_by(Hackathon.id).all():
+            drift = check_hackathon_stats(db, hackathon_id)
+            if not drift:
+                continue
+
+            drifted += 1
+            print(f"⚠️ Хакатон id={hackathon_id} ({name}): счётчики расходятся")
+            for field, (stored, actual) in drift.items():
+                print(f"   {field}: сохранено={stored}, факт={actual}")
+
+            if fix:
+                rebuild_hackathon_stats(db, hackathon_id)
+                db.commit()
+                print(f"   ✅ Счётчики пересчитаны")
+
+        if drifted == 0:
+            print("✅ Счётчики всех хакатонов совпадают с данными")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Не удалось проверить счётчики: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
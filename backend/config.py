@@ -2,6 +2,7 @@
 config.py — конфигурация приложения, переменные окружения
 """
 import os
+import tempfile
 from functools import lru_cache
 from dotenv import load_dotenv
 
@@ -29,6 +30,25 @@ class Settings:
         # Database
         self.DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./database.sqlite")
         
+        # Пул соединений и таймауты (PostgreSQL)
+        self.DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+        self.DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+        self.DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+        self.DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # секунды
+        self.DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # 0 — без ограничения
+        
+        # Профиль настройки SQLite: production (WAL и т.д.) или default (только foreign_keys)
+        self.SQLITE_PROFILE: str = os.getenv("SQLITE_PROFILE", "production")
+        self.SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+        self.SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+        self.SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+        self.SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", "-64000"))  # < 0 — в KiB
+        self.SQLITE_TEMP_STORE: str = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+        self.SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        
+        # Пул потоков для синхронных (def) обработчиков, работающих с БД
+        self.DB_THREADPOOL_SIZE: int = int(os.getenv("DB_THREADPOOL_SIZE", "40"))
+        
         # API
         self.API_PREFIX: str = os.getenv("API_PREFIX", "/api")
         self.BACKEND_URL: str = os.getenv("BACKEND_URL")
@@ -36,6 +56,90 @@ class Settings:
         
         # Авторизация
         self.CODE_EXPIRY_MINUTES: int = int(os.getenv("CODE_EXPIRY_MINUTES", "10"))
+        # Хеширование паролей админов: раунды pbkdf2_sha256 (при изменении хеш пересчитывается
+        # при следующем входе) и число потоков пула хеширования
+        self.PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+        self.PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+        # Хранилище кодов авторизации: memory (один процесс) или redis (несколько воркеров)
+        self.AUTH_CODE_STORE: str = os.getenv("AUTH_CODE_STORE", "memory")
+        self.REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        
+        # Telegram бот: HTTP клиент к backend (таймаут, повторы с экспоненциальной паузой, размер пула)
+        self.BOT_HTTP_TIMEOUT_SECONDS: float = float(os.getenv("BOT_HTTP_TIMEOUT_SECONDS", "5"))
+        self.BOT_HTTP_RETRIES: int = int(os.getenv("BOT_HTTP_RETRIES", "3"))
+        self.BOT_HTTP_BACKOFF_SECONDS: float = float(os.getenv("BOT_HTTP_BACKOFF_SECONDS", "0.5"))
+        self.BOT_HTTP_MAX_CONNECTIONS: int = int(os.getenv("BOT_HTTP_MAX_CONNECTIONS", "20"))
+        
+        # Telegram бот: выдача кода при /start — http (запрос на backend) или local
+        # (services.telegram_auth в процессе бота; нужен BOT_WEBHOOK_IN_API или AUTH_CODE_STORE=redis)
+        self.BOT_AUTH_CODE_MODE: str = os.getenv("BOT_AUTH_CODE_MODE", "http")
+        
+        # Telegram бот: режим (polling или webhook — отдельный сервер на BOT_WEBHOOK_PORT),
+        # webhook в составе API (BOT_WEBHOOK_IN_API), публичный адрес и путь webhook,
+        # секрет для заголовка X-Telegram-Bot-Api-Secret-Token, число одновременно обрабатываемых обновлений
+        self.BOT_MODE: str = os.getenv("BOT_MODE", "polling")
+        self.BOT_WEBHOOK_IN_API: bool = os.getenv("BOT_WEBHOOK_IN_API", "false").lower() == "true"
+        self.BOT_WEBHOOK_PORT: int = int(os.getenv("BOT_WEBHOOK_PORT", "8081"))
+        self.TELEGRAM_WEBHOOK_URL: str = os.getenv("TELEGRAM_WEBHOOK_URL", "")
+        self.TELEGRAM_WEBHOOK_PATH: str = os.getenv("TELEGRAM_WEBHOOK_PATH", "/api/telegram/webhook")
+        self.TELEGRAM_WEBHOOK_SECRET: str = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
+        self.BOT_CONCURRENT_UPDATES: int = int(os.getenv("BOT_CONCURRENT_UPDATES", "32"))
+        
+        # Подбор участников: время жизни кеша матрицы навыков (секунды)
+        self.RECOMMENDATIONS_CACHE_SECONDS: int = int(os.getenv("RECOMMENDATIONS_CACHE_SECONDS", "30"))
+        
+        # Экспорт: строк из БД за одну выборку, минимальный размер отдаваемого куска (символы)
+        # и сколько выгрузок формируется одновременно; ещё EXPORT_MAX_QUEUED ждут своей очереди,
+        # остальные получают 503
+        self.EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+        self.EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", "65536"))
+        self.EXPORT_MAX_CONCURRENT: int = max(1, int(os.getenv("EXPORT_MAX_CONCURRENT", "2")))
+        self.EXPORT_MAX_QUEUED: int = max(0, int(os.getenv("EXPORT_MAX_QUEUED", "8")))
+        
+        # История аналитики: период снимков (0 — отключить), сколько часов хранить сырые
+        # снимки до прореживания до одного в час и сколько дней хранить историю (0 — бессрочно)
+        self.ANALYTICS_SNAPSHOT_INTERVAL_SECONDS: int = int(os.getenv("ANALYTICS_SNAPSHOT_INTERVAL_SECONDS", "300"))
+        self.ANALYTICS_HISTORY_RAW_HOURS: int = int(os.getenv("ANALYTICS_HISTORY_RAW_HOURS", "48"))
+        self.ANALYTICS_HISTORY_RETENTION_DAYS: int = int(os.getenv("ANALYTICS_HISTORY_RETENTION_DAYS", "180"))
+        
+        # Кеш аутентификации: декодированные JWT и снимки пользователей (0 — отключить)
+        self.AUTH_CACHE_SIZE: int = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+        self.AUTH_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+        
+        # Обслуживание БД: период (0 — только вручную через run_maintenance.py), размер пачки,
+        # сроки хранения и период VACUUM (0 — не выполнять)
+        self.MAINTENANCE_INTERVAL_MINUTES: int = int(os.getenv("MAINTENANCE_INTERVAL_MINUTES", "60"))
+        self.MAINTENANCE_BATCH_SIZE: int = int(os.getenv("MAINTENANCE_BATCH_SIZE", "500"))
+        self.AUTH_CODE_RETENTION_HOURS: int = int(os.getenv("AUTH_CODE_RETENTION_HOURS", "24"))
+        self.INVITATION_PENDING_DAYS: int = int(os.getenv("INVITATION_PENDING_DAYS", "30"))
+        self.INVITATION_RETENTION_DAYS: int = int(os.getenv("INVITATION_RETENTION_DAYS", "180"))
+        self.MAINTENANCE_VACUUM_HOURS: int = int(os.getenv("MAINTENANCE_VACUUM_HOURS", "24"))
+        
+        # Ограничение частоты запросов к авторизации: бюджеты "N/S" — N запросов за S секунд
+        # на клиента (для выдачи кода — на Telegram ID и общий на клиента, т.е. на бота);
+        # хранилище memory или redis (REDIS_URL)
+        self.RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+        self.RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+        self.RATE_LIMIT_TRUST_FORWARDED: bool = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+        self.RATE_LIMIT_GENERATE_CODE: str = os.getenv("RATE_LIMIT_GENERATE_CODE", "5/60")
+        self.RATE_LIMIT_GENERATE_CODE_CLIENT: str = os.getenv("RATE_LIMIT_GENERATE_CODE_CLIENT", "600/60")
+        self.RATE_LIMIT_VERIFY_CODE: str = os.getenv("RATE_LIMIT_VERIFY_CODE", "10/60")
+        self.RATE_LIMIT_ADMIN_LOGIN: str = os.getenv("RATE_LIMIT_ADMIN_LOGIN", "5/60")
+        
+        # Уведомления в Telegram (services/notifications.py): лимиты "N/S" на бота и на чат
+        # (общие в Redis при RATE_LIMIT_BACKEND=redis, иначе отправляет один воркер —
+        # владелец NOTIFY_LOCK_FILE), пачка диспетчера, пауза при пустой очереди, повторы с
+        # экспоненциальной паузой, аренда взятых записей и срок хранения обработанных
+        self.NOTIFICATIONS_ENABLED: bool = os.getenv("NOTIFICATIONS_ENABLED", "true").lower() == "true"
+        self.NOTIFY_RATE_GLOBAL: str = os.getenv("NOTIFY_RATE_GLOBAL", "25/1")
+        self.NOTIFY_RATE_PER_CHAT: str = os.getenv("NOTIFY_RATE_PER_CHAT", "1/1")
+        self.NOTIFY_BATCH_SIZE: int = int(os.getenv("NOTIFY_BATCH_SIZE", "100"))
+        self.NOTIFY_POLL_SECONDS: float = float(os.getenv("NOTIFY_POLL_SECONDS", "2"))
+        self.NOTIFY_MAX_ATTEMPTS: int = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+        self.NOTIFY_BACKOFF_SECONDS: float = float(os.getenv("NOTIFY_BACKOFF_SECONDS", "5"))
+        self.NOTIFY_LEASE_SECONDS: int = int(os.getenv("NOTIFY_LEASE_SECONDS", "120"))
+        self.NOTIFY_LOCK_FILE: str = os.getenv("NOTIFY_LOCK_FILE", os.path.join(tempfile.gettempdir(), "itam-notifications.lock"))
+        self.NOTIFICATION_RETENTION_DAYS: int = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "14"))
         
         # CORS - можно передать через переменную окружения как строку через запятую
         self.ALLOWED_ORIGINS: str = os.getenv(
@@ -49,6 +153,21 @@ class Settings:
             return self.ALLOWED_ORIGINS
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",") if origin.strip()]
 
+    
+    def get_sqlite_pragmas(self) -> list:
+        """Список PRAGMA (имя, значение), применяемых к каждому новому SQLite соединению"""
+        pragmas = [("foreign_keys", "ON")]
+        if self.SQLITE_PROFILE == "production":
+            pragmas += [
+                ("journal_mode", self.SQLITE_JOURNAL_MODE),
+                ("synchronous", self.SQLITE_SYNCHRONOUS),
+                ("mmap_size", self.SQLITE_MMAP_SIZE),
+                ("cache_size", self.SQLITE_CACHE_SIZE),
+                ("temp_store", self.SQLITE_TEMP_STORE),
+                ("busy_timeout", self.SQLITE_BUSY_TIMEOUT_MS),
+            ]
+        return pragmas
+
 
 @lru_cache()
 def get_settings() -> Settings:
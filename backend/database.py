@@ -1,34 +1,125 @@
 """
-database.py — подключение SQLAlchemy к SQLite и инициализация БД
+database.py — подключение SQLAlchemy к БД (SQLite или PostgreSQL) и инициализация БД
 """
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
 from config import get_settings
 
 settings = get_settings()
 
-# SQLite engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False},  # Нужна для SQLite
-    echo=False  # Поставьте True для отладки SQL запросов
-)
+
+def normalize_database_url(url: str) -> str:
+    """Привести postgres:// (Railway, Heroku) к postgresql://"""
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+def get_async_database_url(url: str) -> str:
+    """Преобразовать DATABASE_URL в URL асинхронного драйвера (aiosqlite / asyncpg)"""
+    url = normalize_database_url(url)
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+def is_sqlite_url(url: str) -> bool:
+    """Проверить, что URL указывает на SQLite"""
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def get_pool_options() -> dict:
+    """Параметры пула соединений для серверных БД (PostgreSQL)"""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+def create_db_engine(url: str):
+    """Создать синхронный engine с настройками под диалект"""
+    url = normalize_database_url(url)
+
+    if is_sqlite_url(url):
+        return create_engine(
+            url,
+            connect_args={"check_same_thread": False},  # Нужна для SQLite
+            echo=False  # Поставьте True для отладки SQL запросов
+        )
+
+    connect_args = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+
+    return create_engine(
+        url,
+        connect_args=connect_args,
+        echo=False,
+        **get_pool_options()
+    )
+
+
+def create_async_db_engine(url: str):
+    """Создать асинхронный engine с настройками под диалект"""
+    url = get_async_database_url(url)
+
+    if is_sqlite_url(url):
+        return create_async_engine(url, echo=False)
+
+    connect_args = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+
+    return create_async_engine(
+        url,
+        connect_args=connect_args,
+        echo=False,
+        **get_pool_options()
+    )
+
+
+engine = create_db_engine(settings.DATABASE_URL)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронный engine для эндпоинтов с высокой конкуренцией (регистрация, заявки)
+async_engine = create_async_db_engine(settings.DATABASE_URL)
+
+# Async session factory. expire_on_commit=False — чтобы после commit
+# не было ленивых запросов к БД при чтении атрибутов
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base для всех моделей
 Base = declarative_base()
 
 
-# Включить foreign keys в SQLite
-@event.listens_for(engine, "connect")
+# Включить foreign keys и профиль производительности SQLite (WAL, busy_timeout и т.д.)
 def set_sqlite_pragma(dbapi_conn, connection_record):
     cursor = dbapi_conn.cursor()
-    cursor.execute("PRAGMA foreign_keys=ON")
+    for name, value in settings.get_sqlite_pragmas():
+        cursor.execute(f"PRAGMA {name}={value}")
     cursor.close()
 
 
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", set_sqlite_pragma)
+
+if async_engine.dialect.name == "sqlite":
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
+
+
 def get_db() -> Session:
     """Зависимость для получения сессии БД в роутерах"""
     db = SessionLocal()
@@ -38,8 +129,25 @@ def get_db() -> Session:
         db.close()
 
 
+async def get_async_db() -> AsyncSession:
+    """Зависимость для получения асинхронной сессии БД в роутерах"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def dialect_insert(db: Session, model):
+    """INSERT с ON CONFLICT (upsert) для диалекта сессии: PostgreSQL или SQLite"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
 def init_db():
-    """Инициализировать все таблицы"""
-    from models import User, Hackathon, Team, TeamMember, Invitation, Admin, UserHackathon
+    """Инициализировать все таблицы и применить миграции"""
+    from models import User, Hackathon, Team, TeamMember, Invitation, Admin, UserHackathon, Skill, UserSkill, HackathonStats, HackathonStatBucket, HackathonStatsSnapshot, InvitationArchive
+    from migrations import run_migrations
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
     print("✅ Database initialized successfully!")
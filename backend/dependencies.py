@@ -1,27 +1,133 @@
 """
 dependencies.py — зависимости для FastAPI (текущий пользователь, права)
 """
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 from models import User, Admin
-from services.jwt_handler import decode_token
+from services.auth_cache import decode_token_cached, get_cached_principal, cache_principal, get_token_version
 
 
 security = HTTPBearer()
 
 
-async def get_current_user(
+@dataclass(frozen=True)
+class Principal:
+    """Участник из подписанных claims токена (без загрузки строки users)"""
+    id: int
+    is_admin: bool
+    token_version: int
+
+
+def _check_token_version(payload: dict, user: User):
+    """Отклонить токен, выданный до отзыва (токены без tv считаются версией 0)"""
+    if payload.get("tv", 0) != user.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked"
+        )
+
+
+def _user_payload(credentials) -> dict:
+    """Payload токена участника или 401"""
+    payload = decode_token_cached(credentials.credentials)
+    if not payload or payload.get("is_admin"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token or insufficient permissions"
+        )
+    return payload
+
+
+def _require_user(payload: dict, user: User | None) -> User:
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    _check_token_version(payload, user)
+    return user
+
+
+def get_current_user(
     credentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
     """
     Получить текущего пользователя из JWT токена
-    Проверяет что это участник, не админ
+    Проверяет что это участник, не админ.
+    Пользователь может быть собран из кеша (снимок до AUTH_CACHE_TTL_SECONDS давности) —
+    только для чтения; эндпоинты, которые меняют пользователя, используют get_current_user_for_update
+    """
+    payload = _user_payload(credentials)
+    user_id = payload.get("user_id")
+    user = get_cached_principal("user", User, user_id, db)
+    if user:
+        return _require_user(payload, user)
+    
+    user = _require_user(payload, db.query(User).filter(User.id == user_id).first())
+    cache_principal("user", user)
+    return user
+
+
+async def get_current_user_async(
+    credentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Получить текущего пользователя из JWT токена через AsyncSession
+    Используется в асинхронных эндпоинтах (только для чтения — см. get_current_user)
+    """
+    payload = _user_payload(credentials)
+    user_id = payload.get("user_id")
+    user = get_cached_principal("user", User, user_id, db)
+    if user:
+        return _require_user(payload, user)
+    
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = _require_user(payload, result.scalars().first())
+    cache_principal("user", user)
+    return user
+
+
+def get_current_user_for_update(
+    credentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Текущий пользователь, прочитанный из БД в обход кеша, с блокировкой строки до commit.
+    Для эндпоинтов, которые изменяют пользователя или считают дельты от его текущих значений
+    """
+    payload = _user_payload(credentials)
+    user = db.get(User, payload.get("user_id"), populate_existing=True, with_for_update=True)
+    return _require_user(payload, user)
+
+
+async def get_current_user_for_update_async(
+    credentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user_for_update через AsyncSession"""
+    payload = _user_payload(credentials)
+    user = await db.get(User, payload.get("user_id"), populate_existing=True, with_for_update=True)
+    return _require_user(payload, user)
+
+
+def get_current_principal(
+    credentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """
+    Получить текущего участника из подписанных claims JWT без загрузки User.
+    Для эндпоинтов только на чтение, которым нужен лишь current_user.id.
+    Отзыв токенов проверяется по token_version (кешируется, см. services/auth_cache.py)
     """
     token = credentials.credentials
-    payload = decode_token(token)
+    payload = decode_token_cached(token)
     
     if not payload or payload.get("is_admin"):
         raise HTTPException(
@@ -30,18 +136,24 @@ async def get_current_user(
         )
     
     user_id = payload.get("user_id")
-    user = db.query(User).filter(User.id == user_id).first()
+    token_version = payload.get("tv", 0)
+    current_version = get_token_version(db, user_id)
     
-    if not user:
+    if current_version is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
+    if token_version != current_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked"
+        )
     
-    return user
+    return Principal(id=user_id, is_admin=False, token_version=token_version)
 
 
-async def get_current_admin(
+def get_current_admin(
     credentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> Admin:
@@ -50,7 +162,7 @@ async def get_current_admin(
     Проверяет что это админ
     """
     token = credentials.credentials
-    payload = decode_token(token)
+    payload = decode_token_cached(token)
     
     if not payload or not payload.get("is_admin"):
         raise HTTPException(
@@ -59,6 +171,10 @@ async def get_current_admin(
         )
     
     admin_id = payload.get("user_id")
+    admin = get_cached_principal("admin", Admin, admin_id, db)
+    if admin:
+        return admin
+    
     admin = db.query(Admin).filter(Admin.id == admin_id).first()
     
     if not admin:
@@ -67,4 +183,5 @@ async def get_current_admin(
             detail="Admin not found"
         )
     
+    cache_principal("admin", admin)
     return admin
@@ -26,6 +26,12 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Ограничение частоты запросов к авторизации. Добавляется до CORS,
+# чтобы ответы 429 тоже проходили через CORS middleware
+if settings.RATE_LIMIT_ENABLED:
+    from services.rate_limit import RateLimitMiddleware
+    app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -39,6 +45,12 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     """Инициализировать БД при запуске приложения"""
+    # Обработчики, работающие с БД, объявлены как def и выполняются в пуле потоков,
+    # чтобы блокирующий Session не останавливал event loop
+    from anyio import to_thread
+    to_thread.current_default_thread_limiter().total_tokens = settings.DB_THREADPOOL_SIZE
+    logger.info(f"✅ Thread pool size: {settings.DB_THREADPOOL_SIZE}")
+    
     try:
         init_db()
         logger.info("✅ Database initialized")
@@ -67,6 +79,66 @@ async def startup_event():
             db.close()
     except Exception as e:
         logger.error(f"❌ Database initialization failed: {e}")
+    
+    if bot_application:
+        import telegram_bot
+        await telegram_bot.start_webhook(bot_application)
+    
+    # Фоновые снимки счётчиков для истории аналитики
+    if settings.ANALYTICS_SNAPSHOT_INTERVAL_SECONDS > 0:
+        import asyncio
+        from services.snapshots import run_snapshotter
+        app.state.snapshotter = asyncio.create_task(run_snapshotter(settings.ANALYTICS_SNAPSHOT_INTERVAL_SECONDS))
+        logger.info(f"✅ Analytics snapshots every {settings.ANALYTICS_SNAPSHOT_INTERVAL_SECONDS}s")
+    
+    # Периодическая очистка БД (см. services/maintenance.py)
+    if settings.MAINTENANCE_INTERVAL_MINUTES > 0:
+        import asyncio
+        from services.maintenance import run_maintenance_loop
+        app.state.maintenance = asyncio.create_task(
+            run_maintenance_loop(settings.MAINTENANCE_INTERVAL_MINUTES, settings.MAINTENANCE_VACUUM_HOURS)
+        )
+        logger.info(f"✅ Database maintenance every {settings.MAINTENANCE_INTERVAL_MINUTES} min")
+    
+    # Отправка уведомлений из очереди telegram_outbox (см. services/notifications.py)
+    if settings.NOTIFICATIONS_ENABLED and settings.TELEGRAM_BOT_TOKEN:
+        import asyncio
+        from telegram import Bot
+        from services.notifications import run_notification_dispatcher
+        # Бот webhook уже инициализирован; иначе — свой клиент Bot API
+        app.state.notification_bot = bot_application.bot if bot_application else Bot(settings.TELEGRAM_BOT_TOKEN)
+        app.state.notifications = asyncio.create_task(
+            run_notification_dispatcher(app.state.notification_bot, settings.NOTIFY_POLL_SECONDS)
+        )
+        logger.info("✅ Telegram notification dispatcher started")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Остановить фоновые задачи"""
+    for name in ("snapshotter", "maintenance", "notifications"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    
+    notification_bot = getattr(app.state, "notification_bot", None)
+    if notification_bot and not bot_application:
+        await notification_bot.shutdown()
+    
+    if bot_application:
+        import telegram_bot
+        await telegram_bot.stop_webhook(bot_application)
+
+# Webhook Telegram бота в составе API (вместо отдельного процесса бота)
+bot_application = None
+if settings.BOT_WEBHOOK_IN_API:
+    import telegram_bot
+    # Неверные настройки webhook останавливают запуск API сразу, до регистрации webhook в Telegram
+    webhook_errors = telegram_bot.get_webhook_config_errors()
+    if webhook_errors:
+        raise RuntimeError("BOT_WEBHOOK_IN_API: " + "; ".join(webhook_errors))
+    bot_application = telegram_bot.build_application(webhook=True)
+    app.include_router(telegram_bot.create_webhook_router(bot_application))
 
 # Включаем роутеры участника и админа
 app.include_router(auth.router)
@@ -0,0 +1,141 @@
+"""
+migrations.py — версионные миграции схемы БД
+
+create_all создаёт только отсутствующие таблицы, поэтому изменения
+существующих таблиц (индексы, новые колонки, перенос данных) оформляются
+здесь как пронумерованные миграции. Применённые версии хранятся в schema_version.
+
+Запуск вручную: python migrations.py
+"""
+import json
+from sqlalchemy import inspect, text
+from database import Base
+
+# Размер пачки при переносе данных
+BATCH_SIZE = 1000
+
+
+def _create_indexes(conn, table_name: str, index_names: list):
+    """Создать индексы таблицы (описанные в models.py), если их ещё нет"""
+    table = Base.metadata.tables[table_name]
+    indexes = {index.name: index for index in table.indexes}
+    for name in index_names:
+        indexes[name].create(bind=conn, checkfirst=True)
+
+
+def _m001_hot_filter_indexes(conn):
+    """Составные и частичные индексы для частых фильтров в роутерах"""
+    _create_indexes(conn, "user_hackathon", [
+        "ix_user_hackathon_user_hackathon",
+        "ix_user_hackathon_unassigned",
+    ])
+    _create_indexes(conn, "teams", [
+        "ix_teams_hackathon_status",
+        "ix_teams_captain_hackathon",
+    ])
+    _create_indexes(conn, "invitations", [
+        "ix_invitations_team_user_status",
+        "ix_invitations_user_status_responded",
+        "ix_invitations_team_pending",
+        "ix_invitations_sent_by_id",
+    ])
+    _create_indexes(conn, "auth_codes", [
+        "ix_auth_codes_telegram_id",
+    ])
+
+
+
+def _m002_backfill_user_skills(conn):
+    """
+    Перенести навыки из JSON колонки users.skills в таблицы skills / user_skills.
+    Написание навыка для аналитики (display_name) — самое частое среди профилей
+    """
+    from collections import Counter, defaultdict
+    from services.skills import normalize_skill
+
+    user_skills = {}
+    spellings = defaultdict(Counter)
+    for user_id, raw_skills in conn.execute(text("SELECT id, skills FROM users")).all():
+        try:
+            names = json.loads(raw_skills) if raw_skills else []
+        except ValueError:
+            names = []
+
+        user_skills[user_id] = set()
+        for name in {n.strip() for n in names if isinstance(n, str) and n.strip()}:
+            spellings[normalize_skill(name)][name] += 1
+            user_skills[user_id].add(normalize_skill(name))
+
+    skill_ids = {name: skill_id for skill_id, name in conn.execute(text("SELECT id, name FROM skills"))}
+    for name, counter in spellings.items():
+        display_name = counter.most_common(1)[0][0]
+        if name in skill_ids:
+            conn.execute(
+                text("UPDATE skills SET display_name = :display_name WHERE id = :id AND display_name IS NULL"),
+                {"id": skill_ids[name], "display_name": display_name}
+            )
+            continue
+        conn.execute(
+            text("INSERT INTO skills (name, display_name) VALUES (:name, :display_name)"),
+            {"name": name, "display_name": display_name}
+        )
+        skill_ids[name] = conn.execute(text("SELECT id FROM skills WHERE name = :name"), {"name": name}).scalar()
+
+    conn.execute(text("DELETE FROM user_skills"))
+    links = [
+        {"user_id": user_id, "skill_id": skill_ids[name]}
+        for user_id, names in user_skills.items() for name in names
+    ]
+    for start in range(0, len(links), BATCH_SIZE):
+        conn.execute(
+            text("INSERT INTO user_skills (user_id, skill_id) VALUES (:user_id, :skill_id)"),
+            links[start:start + BATCH_SIZE]
+        )
+
+
+
+def _m003_participant_search_index(conn):
+    """Полнотекстовый индекс участников (FTS5 / tsvector)"""
+    from services.search import create_search_index
+    create_search_index(conn)
+
+
+def _m004_user_token_version(conn):
+    """Версия токенов пользователя для отзыва JWT"""
+    columns = {column["name"] for column in inspect(conn).get_columns("users")}
+    if "token_version" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
+
+
+# (версия, описание, функция) — только добавлять в конец, не изменять применённые
+MIGRATIONS = [
+    (1, "composite and partial indexes for hot filters", _m001_hot_filter_indexes),
+    (2, "backfill normalized user skills", _m002_backfill_user_skills),
+    (3, "participant full-text search index", _m003_participant_search_index),
+    (4, "user token version", _m004_user_token_version),
+]
+
+
+def get_schema_version(conn) -> int:
+    """Текущая версия схемы (0 — миграции не применялись)"""
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+def run_migrations(engine):
+    """Применить все миграции новее текущей версии схемы"""
+    import models  # noqa: F401 — регистрирует таблицы в Base.metadata
+
+    with engine.begin() as conn:
+        current_version = get_schema_version(conn)
+        for version, description, upgrade in MIGRATIONS:
+            if version <= current_version:
+                continue
+            upgrade(conn)
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (:version)"), {"version": version})
+            print(f"✅ Migration {version} applied: {description}")
+
+
+if __name__ == "__main__":
+    from database import engine
+    run_migrations(engine)
@@ -1,7 +1,7 @@
 """
 models.py — SQLAlchemy ORM модели (таблицы)
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Enum, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import json
@@ -21,6 +21,7 @@ class User(Base):
     role_preference = Column(String, nullable=True)  # frontend, backend, fullstack, designer
     experience_level = Column(String, default="junior")  # junior, middle, senior
     avatar_url = Column(String, nullable=True)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)  # увеличение отзывает выданные токены
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -30,19 +31,46 @@ class User(Base):
     team_memberships = relationship("TeamMember", back_populates="user", cascade="all, delete-orphan")
     invitations_sent = relationship("Invitation", foreign_keys="Invitation.sent_by_id", back_populates="sent_by")
     invitations_received = relationship("Invitation", foreign_keys="Invitation.user_id", back_populates="user")
+    skill_links = relationship("UserSkill", back_populates="user", cascade="all, delete-orphan")
     
     def get_skills(self):
-        """Получить список навыков из JSON"""
+        """Получить список навыков из JSON (результат кешируется до изменения skills)"""
+        cached = self.__dict__.get("_skills_cache")
+        if cached is not None and cached[0] == self.skills:
+            return list(cached[1])
         try:
-            return json.loads(self.skills) if self.skills else []
+            skills = json.loads(self.skills) if self.skills else []
         except:
-            return []
+            skills = []
+        self.__dict__["_skills_cache"] = (self.skills, skills)
+        return list(skills)
     
     def set_skills(self, skills_list):
-        """Установить навыки из списка"""
+        """Установить навыки из списка (для индекса навыков см. services.skills.set_user_skills)"""
         self.skills = json.dumps(skills_list)
 
 
+class Skill(Base):
+    """Справочник навыков"""
+    __tablename__ = "skills"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False, index=True)  # нормализованное имя: "python"
+    display_name = Column(String, nullable=True)  # написание для аналитики: "Python"
+
+
+class UserSkill(Base):
+    """Навыки пользователя (many-to-many), индекс для фильтрации по навыку"""
+    __tablename__ = "user_skills"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True, index=True)
+    
+    # Relationships
+    user = relationship("User", back_populates="skill_links")
+    skill = relationship("Skill")
+
+
 class Hackathon(Base):
     """Таблица хакатонов"""
     __tablename__ = "hackathons"
@@ -82,6 +110,8 @@ class Team(Base):
     invitations = relationship("Invitation", back_populates="team", cascade="all, delete-orphan")
     
     __table_args__ = (
+        Index("ix_teams_hackathon_status", "hackathon_id", "status"),
+        Index("ix_teams_captain_hackathon", "captain_id", "hackathon_id"),
         {"sqlite_autoincrement": True},
     )
 
@@ -108,8 +138,8 @@ class Invitation(Base):
     id = Column(Integer, primary_key=True, index=True)
     team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    sent_by_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    status = Column(String, default="pending")  # pending, accepted, declined
+    sent_by_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String, default="pending")  # pending, accepted, declined, expired
     created_at = Column(DateTime, default=datetime.utcnow)
     responded_at = Column(DateTime, nullable=True)
     
@@ -117,6 +147,53 @@ class Invitation(Base):
     team = relationship("Team", back_populates="invitations")
     user = relationship("User", foreign_keys=[user_id], back_populates="invitations_received")
     sent_by = relationship("User", foreign_keys=[sent_by_id], back_populates="invitations_sent")
+    
+    __table_args__ = (
+        Index("ix_invitations_team_user_status", "team_id", "user_id", "status"),
+        Index("ix_invitations_user_status_responded", "user_id", "status", "responded_at"),
+        # Частичный индекс: ожидающие приглашения команды
+        Index(
+            "ix_invitations_team_pending", "team_id",
+            sqlite_where=text("status = 'pending'"),
+            postgresql_where=text("status = 'pending'")
+        ),
+    )
+
+
+class InvitationArchive(Base):
+    """Архив обработанных приглашений старше срока хранения (см. services/maintenance.py)"""
+    __tablename__ = "invitations_archive"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    invitation_id = Column(Integer, nullable=False)  # id из invitations (SQLite может выдать его повторно)
+    team_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False, index=True)
+    sent_by_id = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=True)
+    responded_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+class TelegramNotification(Base):
+    """Очередь уведомлений в Telegram (outbox), отправляет services/notifications.py"""
+    __tablename__ = "telegram_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    text = Column(Text, nullable=False)
+    dedup_key = Column(String, unique=True, nullable=False)  # например invitation:15:received
+    status = Column(String, default="pending")  # pending, sent, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)  # для взятой в работу записи — конец аренды
+    claimed_by = Column(String, nullable=True)  # метка пачки диспетчера
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_telegram_outbox_status_next", "status", "next_attempt_at"),
+    )
 
 
 class UserHackathon(Base):
@@ -132,6 +209,56 @@ class UserHackathon(Base):
     # Relationships
     user = relationship("User", back_populates="hackathons")
     hackathon = relationship("Hackathon", back_populates="users")
+    
+    __table_args__ = (
+        Index("ix_user_hackathon_user_hackathon", "user_id", "hackathon_id"),
+        # Частичный индекс: участники хакатона без команды
+        Index(
+            "ix_user_hackathon_unassigned", "hackathon_id",
+            sqlite_where=text("team_id IS NULL"),
+            postgresql_where=text("team_id IS NULL")
+        ),
+    )
+
+
+class HackathonStats(Base):
+    """Счётчики аналитики хакатона, обновляются в тех же транзакциях, что и данные"""
+    __tablename__ = "hackathon_stats"
+    
+    hackathon_id = Column(Integer, ForeignKey("hackathons.id", ondelete="CASCADE"), primary_key=True)
+    total_participants = Column(Integer, default=0, nullable=False)
+    participants_in_team = Column(Integer, default=0, nullable=False)
+    total_teams = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class HackathonStatBucket(Base):
+    """Распределения для аналитики хакатона: уровень опыта и частота навыков"""
+    __tablename__ = "hackathon_stat_buckets"
+    
+    hackathon_id = Column(Integer, ForeignKey("hackathons.id", ondelete="CASCADE"), primary_key=True)
+    kind = Column(String, primary_key=True)  # experience, skill
+    key = Column(String, primary_key=True)  # "" — значение не указано
+    count = Column(Integer, default=0, nullable=False)
+
+
+class HackathonStatsSnapshot(Base):
+    """История счётчиков аналитики хакатона (снимки для графиков регистраций и заполнения команд)"""
+    __tablename__ = "hackathon_stats_history"
+    __table_args__ = (
+        # Выборка диапазона по хакатону
+        Index("ix_stats_history_hackathon_taken", "hackathon_id", "taken_at"),
+        # Поиск сырых снимков для прореживания
+        Index("ix_stats_history_resolution_taken", "resolution", "taken_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    hackathon_id = Column(Integer, ForeignKey("hackathons.id", ondelete="CASCADE"), nullable=False)
+    taken_at = Column(DateTime, nullable=False)
+    resolution = Column(Integer, default=0, nullable=False)  # 0 — сырой снимок, иначе шаг в секундах после прореживания
+    total_participants = Column(Integer, nullable=False)
+    participants_in_team = Column(Integer, nullable=False)
+    total_teams = Column(Integer, nullable=False)
 
 
 class Admin(Base):
@@ -145,11 +272,12 @@ class Admin(Base):
 
 
 class AuthCode(Base):
+    """Устаревшая таблица кодов авторизации: коды теперь в services/auth_codes.py"""
     __tablename__ = "auth_codes"
     
     id = Column(Integer, primary_key=True)
     code = Column(String, unique=True, nullable=False)  # 123456
-    telegram_id = Column(String, nullable=False)  # ID юзера в ТГ
+    telegram_id = Column(String, nullable=False, index=True)  # ID юзера в ТГ
     telegram_username = Column(String)  # @username
     is_used = Column(Boolean, default=False)  # Использован ли код
     expires_at = Column(DateTime, nullable=False)  # Когда истекает
@@ -1,23 +1,29 @@
 """
 routers/admin.py — админ-панель: управление хакатонами и аналитика
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
+from datetime import datetime, timedelta
+from typing import Optional
 from sqlalchemy.orm import Session
 from database import get_db
 from models import Hackathon, User, Team, UserHackathon, TeamMember
-from schemas import HackathonResponse, HackathonAnalytics, ParticipantExportRow, TeamExportRow, AdminAssignUserRequest
+from schemas import HackathonResponse, HackathonAnalytics, HackathonAnalyticsHistory, HackathonAnalyticsPoint, ParticipantExportRow, TeamExportRow, AdminAssignUserRequest, AutoAssignResult, AutoAssignTeamPlan
 from dependencies import get_current_admin
-import csv
-import io
-from collections import Counter
-import json
+from services.team_formation import plan_team_formation, apply_team_formation
+from services.exports import EXPORT_FORMATS, export_slots, participants_export, teams_export
+from services.skills import get_display_names
+from services.stats import apply_stats_delta, get_hackathon_stats, on_participant_registered
+from services.snapshots import get_stats_history
+from services.auth_cache import get_auth_cache_stats
+from services.rate_limit import get_rate_limit_stats
+from services.notifications import get_notification_stats
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
 
 @router.get("/hackathons", response_model=list[HackathonResponse])
-async def list_all_hackathons(
+def list_all_hackathons(
     db: Session = Depends(get_db),
     current_admin = Depends(get_current_admin)
 ):
@@ -26,8 +32,26 @@ async def list_all_hackathons(
     return [HackathonResponse.model_validate(h) for h in hackathons]
 
 
+@router.get("/metrics/auth-cache")
+def get_auth_cache_metrics(current_admin = Depends(get_current_admin)):
+    """Метрики кеша аутентификации: размер и доля попаданий (по текущему процессу)"""
+    return get_auth_cache_stats()
+
+
+@router.get("/metrics/rate-limit")
+def get_rate_limit_metrics(current_admin = Depends(get_current_admin)):
+    """Метрики ограничения частоты: отклонённые запросы по маршрутам (по текущему процессу)"""
+    return get_rate_limit_stats()
+
+
+@router.get("/metrics/notifications")
+def get_notification_metrics(db: Session = Depends(get_db), current_admin = Depends(get_current_admin)):
+    """Очередь уведомлений в Telegram: количество по статусам"""
+    return get_notification_stats(db)
+
+
 @router.get("/{hackathon_id}/analytics", response_model=HackathonAnalytics)
-async def get_hackathon_analytics(
+def get_hackathon_analytics(
     hackathon_id: int,
     db: Session = Depends(get_db),
     current_admin = Depends(get_current_admin)
@@ -42,35 +66,19 @@ async def get_hackathon_analytics(
             detail="Hackathon not found"
         )
     
-    # Получаем всех участников хакатона
-    registrations = db.query(UserHackathon).filter(
-        UserHackathon.hackathon_id == hackathon_id
-    ).all()
-    
-    total_participants = len(registrations)
-    participants_in_team = len([r for r in registrations if r.team_id])
+    # Счётчики поддерживаются инкрементально (services/stats.py) — чтение без сканирования таблиц
+    stats = get_hackathon_stats(db, hackathon_id)
+    total_participants = stats["total_participants"]
+    participants_in_team = stats["participants_in_team"]
     participants_without_team = total_participants - participants_in_team
-    
-    # Получаем команды
-    teams = db.query(Team).filter(Team.hackathon_id == hackathon_id).all()
-    total_teams = len(teams)
+    total_teams = stats["total_teams"]
     average_team_size = total_participants / total_teams if total_teams > 0 else 0
-    
-    # Собираем навыки и опыт
-    all_users = db.query(User).join(
-        UserHackathon,
-        User.id == UserHackathon.user_id
-    ).filter(UserHackathon.hackathon_id == hackathon_id).all()
-    
-    all_skills = []
-    experience_levels = []
-    
-    for user in all_users:
-        all_skills.extend(user.get_skills())
-        experience_levels.append(user.experience_level)
-    
-    skills_frequency = dict(Counter(all_skills))
-    experience_distribution = dict(Counter(experience_levels))
+    # Счётчики ведутся по нормализованным именам ("python"), наружу — написание из справочника ("Python")
+    display_names = get_display_names(db, stats["skills_frequency"].keys())
+    skills_frequency = {
+        display_names.get(name, name): count for name, count in stats["skills_frequency"].items()
+    }
+    experience_distribution = stats["experience_distribution"]
     
     return HackathonAnalytics(
         total_participants=total_participants,
@@ -83,85 +91,103 @@ async def get_hackathon_analytics(
     )
 
 
-@router.get("/{hackathon_id}/participants/export")
-async def export_participants(
+@router.get("/{hackathon_id}/analytics/history", response_model=HackathonAnalyticsHistory)
+def get_hackathon_analytics_history(
     hackathon_id: int,
+    since: Optional[datetime] = Query(None, description="Начало периода (UTC), по умолчанию — неделя до until"),
+    until: Optional[datetime] = Query(None, description="Конец периода (UTC), по умолчанию — сейчас"),
     db: Session = Depends(get_db),
     current_admin = Depends(get_current_admin)
 ):
-    """Экспортировать участников в CSV"""
-    
+    """Получить историю аналитики хакатона (регистрации и заполнение команд во времени)"""
+
     hackathon = db.query(Hackathon).filter(Hackathon.id == hackathon_id).first()
     if not hackathon:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Hackathon not found"
         )
+
+    until = until or datetime.utcnow()
+    since = since or until - timedelta(days=7)
+    if since > until:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="since must be before until"
+        )
+
+    # Читается только таблица истории (индекс hackathon_id, taken_at)
+    snapshots = get_stats_history(db, hackathon_id, since, until)
+
+    return HackathonAnalyticsHistory(
+        hackathon_id=hackathon_id,
+        since=since,
+        until=until,
+        points=[
+            HackathonAnalyticsPoint(
+                taken_at=snapshot.taken_at,
+                total_participants=snapshot.total_participants,
+                participants_in_team=snapshot.participants_in_team,
+                participants_without_team=snapshot.total_participants - snapshot.participants_in_team,
+                total_teams=snapshot.total_teams
+            )
+            for snapshot in snapshots
+        ]
+    )
+
+
+@router.get("/{hackathon_id}/participants/export")
+def export_participants(
+    hackathon_id: int,
+    export_format: str = Query("csv", alias="format"),
+    db: Session = Depends(get_db),
+    current_admin = Depends(get_current_admin)
+):
+    """Экспортировать участников в CSV, Parquet или Arrow IPC (?format=csv|parquet|arrow)"""
     
-    # Получаем всех участников
-    users = db.query(User).join(
-        UserHackathon,
-        User.id == UserHackathon.user_id
-    ).filter(UserHackathon.hackathon_id == hackathon_id).all()
-    
-    # Создаем CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format. Use one of: {', '.join(EXPORT_FORMATS)}"
+        )
     
-    writer.writerow([
-        "ID",
-        "Full Name",
-        "Telegram Username",
-        "Skills",
-        "Role Preference",
-        "Experience Level",
-        "Team Name",
-        "Team Status"
-    ])
+    hackathon = db.query(Hackathon).filter(Hackathon.id == hackathon_id).first()
+    if not hackathon:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Hackathon not found"
+        )
     
-    for user in users:
-        # Получаем команду пользователя если она есть
-        registration = db.query(UserHackathon).filter(
-            UserHackathon.user_id == user.id,
-            UserHackathon.hackathon_id == hackathon_id
-        ).first()
-        
-        team_name = ""
-        team_status = ""
-        
-        if registration and registration.team_id:
-            team = db.query(Team).filter(Team.id == registration.team_id).first()
-            if team:
-                team_name = team.name
-                team_status = team.status
-        
-        writer.writerow([
-            user.id,
-            user.full_name,
-            user.telegram_username or "",
-            ", ".join(user.get_skills()),
-            user.role_preference or "",
-            user.experience_level,
-            team_name,
-            team_status
-        ])
+    if export_slots.is_full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many exports in progress, please retry later",
+            headers={"Retry-After": "10"}
+        )
     
-    # Возвращаем CSV файл
-    output.seek(0)
+    # Отдаём файл потоком по мере чтения строк из БД (после того как освободится слот выгрузки)
+    media_type, extension = EXPORT_FORMATS[export_format]
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=participants_{hackathon_id}.csv"}
+        export_slots.stream(participants_export(hackathon_id, export_format)),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=participants_{hackathon_id}.{extension}"}
     )
 
 
 @router.get("/{hackathon_id}/teams/export")
-async def export_teams(
+def export_teams(
     hackathon_id: int,
+    export_format: str = Query("csv", alias="format"),
     db: Session = Depends(get_db),
     current_admin = Depends(get_current_admin)
 ):
-    """Экспортировать команды в CSV"""
+    """Экспортировать команды в CSV, Parquet или Arrow IPC (?format=csv|parquet|arrow)"""
+    
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format. Use one of: {', '.join(EXPORT_FORMATS)}"
+        )
     
     hackathon = db.query(Hackathon).filter(Hackathon.id == hackathon_id).first()
     if not hackathon:
@@ -170,50 +196,24 @@ async def export_teams(
             detail="Hackathon not found"
         )
     
-    # Получаем все команды
-    teams = db.query(Team).filter(Team.hackathon_id == hackathon_id).all()
-    
-    # Создаем CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    writer.writerow([
-        "Team ID",
-        "Team Name",
-        "Team Status",
-        "Captain Name",
-        "Member Count",
-        "Members"
-    ])
-    
-    for team in teams:
-        captain = db.query(User).filter(User.id == team.captain_id).first()
-        members = db.query(User).join(
-            TeamMember,
-            User.id == TeamMember.user_id
-        ).filter(TeamMember.team_id == team.id).all()
-        
-        member_names = ", ".join([m.full_name for m in members])
-        
-        writer.writerow([
-            team.id,
-            team.name,
-            team.status,
-            captain.full_name if captain else "",
-            len(members),
-            member_names
-        ])
+    if export_slots.is_full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many exports in progress, please retry later",
+            headers={"Retry-After": "10"}
+        )
     
-    output.seek(0)
+    # Отдаём файл потоком по мере чтения строк из БД (после того как освободится слот выгрузки)
+    media_type, extension = EXPORT_FORMATS[export_format]
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=teams_{hackathon_id}.csv"}
+        export_slots.stream(teams_export(hackathon_id, export_format)),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=teams_{hackathon_id}.{extension}"}
     )
 
 
 @router.post("/hackathons/{hackathon_id}/assign-user")
-async def admin_assign_user_to_team(
+def admin_assign_user_to_team(
     hackathon_id: int,
     request: AdminAssignUserRequest,
     db: Session = Depends(get_db),
@@ -257,13 +257,16 @@ async def admin_assign_user_to_team(
             )
 
         # Удаляем членство в команде, если есть
-        if registration.team_id:
+        was_in_team = registration.team_id is not None
+        if was_in_team:
             db.query(TeamMember).filter(
                 TeamMember.team_id == registration.team_id,
                 TeamMember.user_id == request.user_id
             ).delete()
 
         registration.team_id = None
+        if was_in_team:
+            apply_stats_delta(db, hackathon_id, in_team=-1)
         db.commit()
         return {"message": "User unassigned from any team in this hackathon"}
 
@@ -288,7 +291,8 @@ async def admin_assign_user_to_team(
         )
 
     # Если регистрации не было, создаём её
-    if not registration:
+    is_new_registration = registration is None
+    if is_new_registration:
         registration = UserHackathon(
             user_id=request.user_id,
             hackathon_id=hackathon_id,
@@ -308,6 +312,63 @@ async def admin_assign_user_to_team(
         member = TeamMember(team_id=request.team_id, user_id=request.user_id)
         db.add(member)
 
+    if is_new_registration:
+        on_participant_registered(db, hackathon_id, user, in_team=True)
+    else:
+        apply_stats_delta(db, hackathon_id, in_team=1)
+
     db.commit()
 
     return {"message": "User assigned to team", "team_id": request.team_id, "user_id": request.user_id}
+
+
+@router.post("/hackathons/{hackathon_id}/auto-assign", response_model=AutoAssignResult)
+def admin_auto_assign_teams(
+    hackathon_id: int,
+    dry_run: bool = True,
+    min_team_size: int = 2,
+    db: Session = Depends(get_db),
+    current_admin = Depends(get_current_admin)
+):
+    """
+    Автоматически распределить участников без команды.
+
+    - Открытые команды добираются до max_team_size с учётом недостающих ролей
+    - Из оставшихся формируются новые команды (не меньше min_team_size человек)
+    - dry_run=true (по умолчанию) — только показать план, без изменений в БД
+    """
+
+    hackathon = db.query(Hackathon).filter(Hackathon.id == hackathon_id).first()
+    if not hackathon:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Hackathon not found"
+        )
+
+    plans, unassigned = plan_team_formation(db, hackathon, min_team_size=max(min_team_size, 1))
+
+    if not dry_run:
+        try:
+            apply_team_formation(db, hackathon, plans)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=str(e)
+            )
+
+    return AutoAssignResult(
+        dry_run=dry_run,
+        assigned_count=sum(len(plan.member_ids) for plan in plans),
+        new_teams_count=sum(1 for plan in plans if plan.is_new),
+        unassigned_user_ids=unassigned,
+        teams=[
+            AutoAssignTeamPlan(
+                team_id=plan.team_id,
+                name=plan.name,
+                is_new=plan.is_new,
+                captain_id=plan.captain_id,
+                member_ids=plan.member_ids
+            )
+            for plan in plans
+        ]
+    )
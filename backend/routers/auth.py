@@ -2,14 +2,18 @@
 routers/auth.py — аутентификация (Telegram + Admin)
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Body
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import timedelta
-from database import get_db
+from database import get_db, get_async_db
 from models import User, Admin
 from schemas import TelegramAuthRequest, AdminLoginRequest, TokenResponse
 from services.jwt_handler import create_access_token, create_token
 from services.telegram_auth import create_auth_code, verify_auth_code
-from utils.security import verify_password
+from services.auth_cache import invalidate_user, invalidate_admin, revoke_user_tokens
+from dependencies import get_current_principal, Principal
+from utils.security import verify_and_update_password
 from config import get_settings
 
 settings = get_settings()
@@ -35,8 +39,9 @@ async def telegram_auth(request: TelegramAuthRequest, db: Session = Depends(get_
         existing_user.telegram_username = request.telegram_username
         existing_user.avatar_url = request.avatar_url
         db.commit()
+        invalidate_user(existing_user.id)
         
-        token = create_access_token(user_id=existing_user.id, is_admin=False)
+        token = create_access_token(user_id=existing_user.id, is_admin=False, token_version=existing_user.token_version)
         return TokenResponse(
             access_token=token,
             user_id=existing_user.id
@@ -55,7 +60,7 @@ async def telegram_auth(request: TelegramAuthRequest, db: Session = Depends(get_
     db.commit()
     db.refresh(new_user)
     
-    token = create_access_token(user_id=new_user.id, is_admin=False)
+    token = create_access_token(user_id=new_user.id, is_admin=False, token_version=new_user.token_version)
     return TokenResponse(
         access_token=token,
         user_id=new_user.id
@@ -99,7 +104,7 @@ async def debug_admin_info(db: Session = Depends(get_db)):
 
 
 @router.post("/admin/login", response_model=TokenResponse)
-async def admin_login(request: AdminLoginRequest, db: Session = Depends(get_db)):
+async def admin_login(request: AdminLoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Вход админа через email и пароль
     """
@@ -108,29 +113,17 @@ async def admin_login(request: AdminLoginRequest, db: Session = Depends(get_db))
     
     logger.info(f"Admin login attempt for email: {request.email}")
     
-    # Проверяем все админов в БД для отладки
-    all_admins = db.query(Admin).all()
-    logger.info(f"Total admins in DB: {len(all_admins)}")
-    for a in all_admins:
-        logger.info(f"  - Admin: id={a.id}, email={a.email}")
-    
-    admin = db.query(Admin).filter(Admin.email == request.email).first()
+    result = await db.execute(select(Admin).where(Admin.email == request.email))
+    admin = result.scalars().first()
     
     if not admin:
         logger.warning(f"Admin not found for email: {request.email}")
-        # Показываем, какие админы есть в БД
-        if all_admins:
-            logger.warning(f"Available admin emails: {[a.email for a in all_admins]}")
-        else:
-            logger.error("No admins found in database! Database may not be initialized.")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
     logger.info(f"Admin found: id={admin.id}, email={admin.email}")
-    logger.info(f"Verifying password for admin: {admin.id}")
-    logger.info(f"Password hash length: {len(admin.hashed_password) if admin.hashed_password else 0}")
     
     if not admin.hashed_password:
         logger.error(f"Admin {admin.id} has no password hash!")
@@ -139,22 +132,24 @@ async def admin_login(request: AdminLoginRequest, db: Session = Depends(get_db))
             detail="Invalid email or password"
         )
     
-    password_valid = verify_password(request.password, admin.hashed_password)
+    # Хеширование — в отдельном пуле потоков, event loop не блокируется
+    password_valid, new_hash = await verify_and_update_password(request.password, admin.hashed_password)
     logger.info(f"Password verification result: {password_valid}")
     
     if not password_valid:
         logger.warning(f"Invalid password for admin: {admin.id}")
-        # Показываем, какой пароль ожидается из настроек
-        from config import get_settings
-        settings = get_settings()
-        if admin.email == settings.ADMIN_EMAIL:
-            logger.warning(f"Expected password from config: {settings.ADMIN_PASSWORD}")
-            logger.warning(f"Received password length: {len(request.password)}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
+    # Число раундов изменилось — сохраняем хеш с новыми параметрами
+    if new_hash:
+        admin.hashed_password = new_hash
+        await db.commit()
+        invalidate_admin(admin.id)
+        logger.info(f"Password hash updated for admin: {admin.id}")
+    
     logger.info(f"Admin login successful for: {admin.id}")
     
     token = create_access_token(user_id=admin.id, is_admin=True)
@@ -164,6 +159,21 @@ async def admin_login(request: AdminLoginRequest, db: Session = Depends(get_db))
     )
 
 
+@router.post("/logout-all")
+def logout_all_sessions(
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Отозвать все выданные токены текущего пользователя (выход на всех устройствах)
+    """
+    revoke_user_tokens(db, current_user.id)
+    db.commit()
+    invalidate_user(current_user.id)
+    
+    return {"message": "All sessions revoked"}
+
+
 # ════════════════════════════════════════════
 # АВТОРИЗАЦИЯ ЧЕРЕЗ ТГ БОТА С КОДОМ
 # ════════════════════════════════════════════
@@ -183,8 +193,7 @@ def get_telegram_bot_link():
 @router.post("/telegram/generate-code")
 def generate_telegram_code(
     telegram_id: str,
-    telegram_username: str | None = None,
-    db: Session = Depends(get_db)
+    telegram_username: str | None = None
 ):
     """
     Генерирует код авторизации для пользователя ТГ
@@ -196,8 +205,7 @@ def generate_telegram_code(
     
     code = create_auth_code(
         telegram_id=telegram_id,
-        telegram_username=telegram_username or f"user_{telegram_id}",
-        db=db
+        telegram_username=telegram_username or f"user_{telegram_id}"
     )
     
     logger.info(f"Code generated successfully: {code} for telegram_id: {telegram_id}")
@@ -235,7 +243,8 @@ def verify_telegram_code(
         access_token = create_token(
             data={
                 "user_id": user_data["user_id"],
-                "is_admin": False
+                "is_admin": False,
+                "tv": user_data.pop("token_version", 0)
             },
             expires_delta=timedelta(hours=24)
         )
@@ -2,19 +2,22 @@
 routers/hackathons.py — управление хакатонами
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 from models import Hackathon, UserHackathon, User
 from schemas import HackathonResponse, HackathonCreate, HackathonUpdate
-from dependencies import get_current_user, get_current_admin
+from dependencies import get_current_user_for_update_async, get_current_admin, get_current_principal, Principal
+from services.stats import on_participant_registered
 
 router = APIRouter(prefix="/api/hackathons", tags=["hackathons"])
 
 
 @router.get("", response_model=list[HackathonResponse])
-async def list_hackathons(
+def list_hackathons(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     skip: int = 0,
     limit: int = 50
 ):
@@ -24,10 +27,10 @@ async def list_hackathons(
 
 
 @router.get("/{hackathon_id}")
-async def get_hackathon(
+def get_hackathon(
     hackathon_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Получить информацию о хакатоне с информацией о регистрации"""
     hackathon = db.query(Hackathon).filter(Hackathon.id == hackathon_id).first()
@@ -54,12 +57,13 @@ async def get_hackathon(
 @router.post("/{hackathon_id}/register")
 async def register_for_hackathon(
     hackathon_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_for_update_async)
 ):
     """Зарегистрироваться на хакатон"""
     
-    hackathon = db.query(Hackathon).filter(Hackathon.id == hackathon_id).first()
+    result = await db.execute(select(Hackathon).where(Hackathon.id == hackathon_id))
+    hackathon = result.scalars().first()
     if not hackathon:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -67,10 +71,11 @@ async def register_for_hackathon(
         )
     
     # Проверяем что пользователь еще не зарегистрирован
-    existing = db.query(UserHackathon).filter(
+    result = await db.execute(select(UserHackathon).where(
         UserHackathon.user_id == current_user.id,
         UserHackathon.hackathon_id == hackathon_id
-    ).first()
+    ))
+    existing = result.scalars().first()
     
     if existing:
         raise HTTPException(
@@ -85,7 +90,8 @@ async def register_for_hackathon(
     )
     
     db.add(user_hackathon)
-    db.commit()
+    await db.run_sync(on_participant_registered, hackathon_id, current_user)
+    await db.commit()
     
     return {"message": "Registered successfully", "hackathon_id": hackathon_id}
 
@@ -93,7 +99,7 @@ async def register_for_hackathon(
 # ADMIN ENDPOINTS
 
 @router.post("", response_model=HackathonResponse)
-async def create_hackathon(
+def create_hackathon(
     request: HackathonCreate,
     db: Session = Depends(get_db),
     current_admin = Depends(get_current_admin)
@@ -124,7 +130,7 @@ async def create_hackathon(
 
 
 @router.put("/{hackathon_id}", response_model=HackathonResponse)
-async def update_hackathon(
+def update_hackathon(
     hackathon_id: int,
     request: HackathonUpdate,
     db: Session = Depends(get_db),
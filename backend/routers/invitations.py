@@ -7,15 +7,17 @@ from sqlalchemy import and_, or_, not_
 from database import get_db
 from models import Invitation, User, Team, UserHackathon, TeamMember, Hackathon
 from schemas import InvitationResponse, InvitationAcceptRequest
-from dependencies import get_current_user
+from dependencies import get_current_user, get_current_principal, Principal
+from services.stats import apply_stats_delta
+from services.notifications import notify_application_result
 from datetime import datetime
 
 router = APIRouter(prefix="/api/invitations", tags=["invitations"])
 
 
 @router.get("", response_model=list[InvitationResponse])
-async def get_my_invitations(
-    current_user: User = Depends(get_current_user),
+def get_my_invitations(
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
     status_filter: str = "pending"
 ):
@@ -134,7 +136,7 @@ async def get_my_invitations(
 
 
 @router.post("/{invitation_id}/accept")
-async def accept_invitation(
+def accept_invitation(
     invitation_id: int,
     request: InvitationAcceptRequest = Body(...),
     current_user: User = Depends(get_current_user),
@@ -229,8 +231,11 @@ async def accept_invitation(
                 )
                 db.add(team_member)
                 
-                # Обновляем регистрацию пользователя на хакатон
+                # Обновляем регистрацию пользователя на хакатон (счётчик — после изменения данных)
+                was_unassigned = user_hackathon.team_id is None
                 user_hackathon.team_id = team.id
+                if was_unassigned:
+                    apply_stats_delta(db, team.hackathon_id, in_team=1)
                 
                 # Обновляем приглашение
                 invitation.status = "accepted"
@@ -259,9 +264,9 @@ async def accept_invitation(
 
 
 @router.get("/team/{team_id}/pending", response_model=list[InvitationResponse])
-async def get_team_pending_invitations(
+def get_team_pending_invitations(
     team_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Получить список отправленных приглашений команды (для капитана)"""
@@ -317,8 +322,8 @@ async def get_team_pending_invitations(
 
 
 @router.get("/applications", response_model=list[InvitationResponse])
-async def get_my_team_applications(
-    current_user: User = Depends(get_current_user),
+def get_my_team_applications(
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Получить заявки на вступление в мои команды (для капитана)"""
@@ -441,7 +446,7 @@ async def get_my_team_applications(
 
 
 @router.post("/{invitation_id}/approve")
-async def approve_application(
+def approve_application(
     invitation_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -530,13 +535,17 @@ async def approve_application(
             )
             db.add(team_member)
             
-            # Обновляем регистрацию пользователя на хакатон
+            # Обновляем регистрацию пользователя на хакатон (счётчик — после изменения данных)
+            was_unassigned = user_hackathon.team_id is None
             user_hackathon.team_id = team.id
+            if was_unassigned:
+                apply_stats_delta(db, team.hackathon_id, in_team=1)
             
             # Обновляем приглашение
             invitation.status = "accepted"
             invitation.responded_at = datetime.utcnow()
         
+        notify_application_result(db, invitation.id, invitation.user_id, team.name, approved=True)
         db.commit()
         
         return {"message": "Application approved", "invitation_id": invitation_id}
@@ -555,7 +564,7 @@ async def approve_application(
 
 
 @router.post("/{invitation_id}/reject")
-async def reject_application(
+def reject_application(
     invitation_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -594,6 +603,7 @@ async def reject_application(
     invitation.status = "declined"
     invitation.responded_at = datetime.utcnow()
     
+    notify_application_result(db, invitation.id, invitation.user_id, team.name, approved=False)
     db.commit()
     
     return {"message": "Application rejected", "invitation_id": invitation_id}
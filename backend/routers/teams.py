@@ -2,11 +2,15 @@
 routers/teams.py — управление командами
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from database import get_db, get_async_db
 from models import Team, TeamMember, User, Invitation, UserHackathon, Hackathon
 from schemas import TeamCreate, TeamResponse, TeamDetailResponse, MyTeamItem, TeamMemberResponse, UserProfile
-from dependencies import get_current_user
+from dependencies import get_current_user, get_current_user_async, get_current_principal, Principal
+from services.stats import apply_stats_delta
+from services.notifications import notify_application_received, notify_invitation_received
 
 router = APIRouter(prefix="/api/teams", tags=["teams"])
 
@@ -36,7 +40,7 @@ def team_to_response(team: Team) -> TeamResponse:
 
 
 @router.post("", response_model=TeamResponse)
-async def create_team(
+def create_team(
     request: TeamCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -109,6 +113,7 @@ async def create_team(
     
     # Обновляем регистрацию пользователя
     registration.team_id = team.id
+    apply_stats_delta(db, request.hackathon_id, in_team=1, teams=1)
     
     db.commit()
     
@@ -121,10 +126,10 @@ async def create_team(
 
 
 @router.get("/can-create/{hackathon_id}")
-async def can_create_team(
+def can_create_team(
     hackathon_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Проверить, может ли пользователь создать команду для данного хакатона.
@@ -176,9 +181,9 @@ async def can_create_team(
 
 
 @router.get("/my", response_model=list[MyTeamItem])
-async def get_my_teams(
+def get_my_teams(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Получить список команд, в которых состоит текущий пользователь,
@@ -221,15 +226,16 @@ async def get_my_teams(
 @router.post("/{team_id}/apply")
 async def apply_to_team(
     team_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """Подать заявку на вступление в команду (создает приглашение от пользователя к капитану)"""
     
-    team = db.query(Team).options(
-        joinedload(Team.members),
+    result = await db.execute(select(Team).options(
+        selectinload(Team.members),
         joinedload(Team.hackathon)
-    ).filter(Team.id == team_id).first()
+    ).where(Team.id == team_id))
+    team = result.scalars().first()
     
     if not team:
         raise HTTPException(
@@ -267,10 +273,11 @@ async def apply_to_team(
         )
     
     # Проверяем что пользователь зарегистрирован на хакатон
-    user_hackathon = db.query(UserHackathon).filter(
+    result = await db.execute(select(UserHackathon).where(
         UserHackathon.user_id == current_user.id,
         UserHackathon.hackathon_id == team.hackathon_id
-    ).first()
+    ))
+    user_hackathon = result.scalars().first()
     
     if not user_hackathon:
         raise HTTPException(
@@ -286,10 +293,11 @@ async def apply_to_team(
         )
     
     # Проверяем что пользователь не в этой команде
-    existing_member = db.query(TeamMember).filter(
+    result = await db.execute(select(TeamMember).where(
         TeamMember.team_id == team_id,
         TeamMember.user_id == current_user.id
-    ).first()
+    ))
+    existing_member = result.scalars().first()
     
     if existing_member:
         raise HTTPException(
@@ -298,11 +306,12 @@ async def apply_to_team(
         )
     
     # Проверяем что нет активного приглашения
-    existing_invitation = db.query(Invitation).filter(
+    result = await db.execute(select(Invitation).where(
         Invitation.team_id == team_id,
         Invitation.user_id == current_user.id,
         Invitation.status == "pending"
-    ).first()
+    ))
+    existing_invitation = result.scalars().first()
     
     if existing_invitation:
         raise HTTPException(
@@ -320,7 +329,12 @@ async def apply_to_team(
     )
     
     db.add(invitation)
-    db.commit()
+    await db.flush()
+    await db.run_sync(
+        notify_application_received, invitation.id, team.captain_id,
+        current_user.full_name or current_user.telegram_username, team.name
+    )
+    await db.commit()
     
     return {
         "message": "Application sent. The team captain will review your request.",
@@ -329,10 +343,10 @@ async def apply_to_team(
 
 
 @router.get("/{team_id}", response_model=TeamDetailResponse)
-async def get_team(
+def get_team(
     team_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Получить информацию о команде"""
     team = db.query(Team).options(
@@ -378,10 +392,10 @@ async def get_team(
 
 
 @router.get("/hackathons/{hackathon_id}", response_model=list[TeamResponse])
-async def list_teams_by_hackathon(
+def list_teams_by_hackathon(
     hackathon_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     status_filter: str = "open"
 ):
     """Получить список команд в хакатоне"""
@@ -408,7 +422,7 @@ async def list_teams_by_hackathon(
 
 
 @router.post("/{team_id}/invite")
-async def invite_to_team(
+def invite_to_team(
     team_id: int,
     user_id: int,
     db: Session = Depends(get_db),
@@ -485,6 +499,8 @@ async def invite_to_team(
     )
     
     db.add(invitation)
+    db.flush()
+    notify_invitation_received(db, invitation.id, user_id, team.name)
     db.commit()
     
     return {
@@ -494,7 +510,7 @@ async def invite_to_team(
 
 
 @router.delete("/{team_id}/members/{user_id}")
-async def remove_member(
+def remove_member(
     team_id: int,
     user_id: int,
     db: Session = Depends(get_db),
@@ -538,6 +554,7 @@ async def remove_member(
     
     if registration:
         registration.team_id = None
+        apply_stats_delta(db, team.hackathon_id, in_team=-1)
     
     db.commit()
     
@@ -545,7 +562,7 @@ async def remove_member(
 
 
 @router.post("/{team_id}/leave")
-async def leave_team(
+def leave_team(
     team_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -588,6 +605,7 @@ async def leave_team(
     
     if registration:
         registration.team_id = None
+        apply_stats_delta(db, team.hackathon_id, in_team=-1)
     
     db.commit()
     
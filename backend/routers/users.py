@@ -5,32 +5,40 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from database import get_db
 from models import User
-from schemas import UserProfile, UserUpdateRequest, UserListItem
-from dependencies import get_current_user
+from schemas import UserProfile, UserUpdateRequest, UserListItem, RecommendationItem
+from dependencies import get_current_user, get_current_user_for_update, get_current_principal, Principal
+from services.skills import normalize_skill, set_user_skills
+from services.search import apply_participant_search
+from services.recommendations import recommend_for_team
+from services.stats import on_profile_changed
+from services.auth_cache import invalidate_user
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
 
 @router.get("/me", response_model=UserProfile)
-async def get_my_profile(current_user: User = Depends(get_current_user)):
+def get_my_profile(current_user: User = Depends(get_current_user)):
     """Получить свой профиль"""
     return UserProfile.model_validate(current_user)
 
 
 @router.put("/me", response_model=UserProfile)
-async def update_my_profile(
+def update_my_profile(
     request: UserUpdateRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_for_update),
     db: Session = Depends(get_db)
 ):
     """Обновить свой профиль"""
     
+    old_experience = current_user.experience_level
+    old_skills = current_user.get_skills()
+    
     if request.full_name:
         current_user.full_name = request.full_name
     if request.bio is not None:
         current_user.bio = request.bio
     if request.skills is not None:
-        current_user.set_skills(request.skills)
+        set_user_skills(db, current_user, request.skills)
     if request.role_preference:
         current_user.role_preference = request.role_preference
     if request.experience_level:
@@ -38,17 +46,21 @@ async def update_my_profile(
     if request.avatar_url:
         current_user.avatar_url = request.avatar_url
     
+    # Распределения опыта и навыков в аналитике хакатонов пользователя
+    on_profile_changed(db, current_user, old_experience, old_skills)
+    
     db.commit()
+    invalidate_user(current_user.id)
     db.refresh(current_user)
     
     return UserProfile.model_validate(current_user)
 
 
 @router.get("/{user_id}", response_model=UserProfile)
-async def get_user_profile(
+def get_user_profile(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Получить профиль другого пользователя"""
     user = db.query(User).filter(User.id == user_id).first()
@@ -63,10 +75,10 @@ async def get_user_profile(
 
 
 @router.get("/hackathons/{hackathon_id}/participants", response_model=list[UserListItem])
-async def get_hackathon_participants(
+def get_hackathon_participants(
     hackathon_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     skip: int = 0,
     limit: int = 50,
     role_preference: str = None,
@@ -76,8 +88,7 @@ async def get_hackathon_participants(
 ):
     """Получить список участников хакатона (для поиска команды) с фильтрами"""
     
-    from models import UserHackathon
-    import json
+    from models import UserHackathon, UserSkill, Skill
     
     # Базовый запрос
     query = db.query(User).join(
@@ -96,14 +107,67 @@ async def get_hackathon_participants(
     if experience_level:
         query = query.filter(User.experience_level == experience_level)
     
-    # Фильтр по навыку
+    # Фильтр по навыку (индексированный join через user_skills)
     if skill:
-        query = query.filter(User.skills.contains(f'"{skill}"'))
+        query = query.join(UserSkill, UserSkill.user_id == User.id).join(
+            Skill, Skill.id == UserSkill.skill_id
+        ).filter(Skill.name == normalize_skill(skill))
     
-    # Поиск по имени
+    # Полнотекстовый поиск по имени, username, bio и навыкам (с ранжированием)
     if search:
-        query = query.filter(User.full_name.ilike(f"%{search}%"))
+        query = apply_participant_search(query, db, search)
     
     participants = query.offset(skip).limit(limit).all()
     
     return [UserListItem.model_validate(p) for p in participants]
+
+
+@router.get("/hackathons/{hackathon_id}/recommendations", response_model=list[RecommendationItem])
+def get_team_recommendations(
+    hackathon_id: int,
+    team_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    limit: int = 20
+):
+    """Рекомендованные участники без команды для команды (может только капитан)"""
+    
+    from models import Team, UserHackathon
+    
+    team = db.query(Team).filter(Team.id == team_id).first()
+    if not team or team.hackathon_id != hackathon_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team not found in this hackathon"
+        )
+    
+    if team.captain_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only team captain can view recommendations"
+        )
+    
+    # Берём с запасом: матрица кешируется, часть участников могла уже попасть в команды
+    ranked = recommend_for_team(db, hackathon_id, team_id, limit * 2)
+    scores = dict(ranked)
+    
+    users = db.query(User).join(
+        UserHackathon,
+        User.id == UserHackathon.user_id
+    ).filter(
+        UserHackathon.hackathon_id == hackathon_id,
+        UserHackathon.team_id == None,
+        User.id.in_(scores.keys())
+    ).all() if scores else []
+    users_by_id = {user.id: user for user in users}
+    
+    result = []
+    for user_id, score in ranked:
+        user = users_by_id.get(user_id)
+        if user:
+            item = UserListItem.model_validate(user).model_dump()
+            result.append(RecommendationItem(**item, score=round(score, 4)))
+        if len(result) >= limit:
+            break
+    
+    return result
@@ -0,0 +1,28 @@
+from services.maintenance import run_maintenance
+import sys
+
+
+def main():
+    """
+    Обслуживание БД: удаление просроченных кодов, закрытие устаревших приглашений,
+    архивация старых приглашений, удаление старых уведомлений и ANALYZE.
+    С флагом --vacuum дополнительно VACUUM.
+
+    Использование: python run_maintenance.py [--vacuum]
+    """
+    vacuum = "--vacuum" in sys.argv[1:]
+
+    try:
+        result = run_maintenance(vacuum=vacuum)
+        print(f"✅ Удалено кодов авторизации: {result['auth_codes_deleted']}")
+        print(f"✅ Устаревших приглашений закрыто: {result['invitations_expired']}")
+        print(f"✅ Приглашений перенесено в архив: {result['invitations_archived']}")
+        print(f"✅ Удалено обработанных уведомлений: {result['notifications_deleted']}")
+        print(f"✅ ANALYZE{' и VACUUM' if vacuum else ''} выполнен")
+    except Exception as e:
+        print(f"❌ Не удалось выполнить обслуживание БД: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
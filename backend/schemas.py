@@ -94,6 +94,11 @@ class UserListItem(BaseModel):
         from_attributes = True
 
 
+class RecommendationItem(UserListItem):
+    """Рекомендованный участник для команды"""
+    score: float
+
+
 # ==================== HACKATHONS ====================
 
 class HackathonCreate(BaseModel):
@@ -225,6 +230,23 @@ class HackathonAnalytics(BaseModel):
     experience_distribution: dict  # {"junior": 20, "middle": 15, "senior": 5}
 
 
+class HackathonAnalyticsPoint(BaseModel):
+    """Снимок счётчиков хакатона в момент времени"""
+    taken_at: datetime
+    total_participants: int
+    participants_in_team: int
+    participants_without_team: int
+    total_teams: int
+
+
+class HackathonAnalyticsHistory(BaseModel):
+    """История аналитики хакатона за период"""
+    hackathon_id: int
+    since: datetime
+    until: datetime
+    points: List[HackathonAnalyticsPoint]
+
+
 class ParticipantExportRow(BaseModel):
     """Строка для экспорта участников"""
     id: int
@@ -253,6 +275,24 @@ class AdminAssignUserRequest(BaseModel):
     team_id: Optional[int] = None  # если None — убрать пользователя из команды
 
 
+class AutoAssignTeamPlan(BaseModel):
+    """Команда в плане автоматического распределения"""
+    team_id: Optional[int]  # None — новая команда (в режиме dry_run)
+    name: str
+    is_new: bool
+    captain_id: Optional[int] = None
+    member_ids: List[int]  # добавляемые участники
+
+
+class AutoAssignResult(BaseModel):
+    """Результат автоматического распределения участников"""
+    dry_run: bool
+    assigned_count: int
+    new_teams_count: int
+    unassigned_user_ids: List[int]
+    teams: List[AutoAssignTeamPlan]
+
+
 # ==================== ERROR RESPONSES ====================
 
 class ErrorResponse(BaseModel):
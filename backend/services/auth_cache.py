@@ -0,0 +1,177 @@
+"""
+services/auth_cache.py — кеш аутентификации: декодированные JWT и снимки пользователей
+
+Фронтенд делает много запросов на страницу, и каждый из них декодировал JWT и читал
+строку users. Кеш токенов хранит payload (не дольше exp токена), кеш принципалов —
+значения колонок пользователя/админа. Из снимка собирается ORM-объект, привязанный
+к сессии запроса без SELECT; ленивые связи подгружаются как обычно.
+
+Снимок может отставать от БД на AUTH_CACHE_TTL_SECONDS (другой воркер уже изменил
+пользователя), поэтому он только для чтения: эндпоинты, которые меняют пользователя
+или считают дельты от его значений, берут свежую строку (get_current_user_for_update).
+
+Кеш версий токенов (token_version) позволяет get_current_principal проверять отзыв
+токенов без запроса к БД на каждый вызов.
+
+Кеш локален для процесса: после изменения пользователя вызывайте invalidate_user
+(в других воркерах запись устареет не позже AUTH_CACHE_TTL_SECONDS).
+"""
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import inspect, update
+from sqlalchemy.orm import make_transient_to_detached
+from config import get_settings
+from models import User
+from services.jwt_handler import decode_token
+
+settings = get_settings()
+
+
+class TTLCache:
+    """Ограниченный по размеру LRU-кеш с временем жизни записей и счётчиками попаданий"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()  # обработчики выполняются в пуле потоков
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Значение по ключу или None (просроченные записи удаляются)"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                if item[0] > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return item[1]
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl: float = None):
+        """Сохранить значение (ttl — не дольше времени жизни кеша)"""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+# Токен -> payload
+token_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+# ("user" | "admin", id) -> значения колонок
+principal_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+# id пользователя -> token_version (проверка отзыва для get_current_principal)
+token_version_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def decode_token_cached(token: str) -> dict | None:
+    """decode_token с кешем; запись живёт не дольше срока действия токена"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+
+    payload = decode_token(token)
+    if payload:
+        token_cache.set(token, payload, ttl=payload.get("exp", 0) - time.time())
+    return payload
+
+
+def snapshot(obj) -> dict:
+    """Значения колонок ORM-объекта"""
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+
+def restore(model, values: dict, db):
+    """Собрать ORM-объект из снимка и привязать к сессии без запроса к БД"""
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    db.add(obj)
+    return obj
+
+
+def get_cached_principal(kind: str, model, principal_id: int, db):
+    """Принципал из кеша, привязанный к сессии db, или None"""
+    values = principal_cache.get((kind, principal_id))
+    if values is None:
+        return None
+    return restore(model, values, db)
+
+
+def cache_principal(kind: str, obj):
+    principal_cache.set((kind, obj.id), snapshot(obj))
+
+
+def get_token_version(db, user_id: int) -> int | None:
+    """Текущая версия токенов пользователя (None — пользователя нет), с кешем"""
+    version = token_version_cache.get(user_id)
+    if version is not None:
+        return version
+
+    version = db.query(User.token_version).filter(User.id == user_id).scalar()
+    if version is not None:
+        token_version_cache.set(user_id, version)
+    return version
+
+
+def revoke_user_tokens(db, user_id: int):
+    """
+    Отозвать все выданные пользователю токены (без commit; после commit — invalidate_user).
+    Версия увеличивается в SQL, а не по снимку из кеша: иначе при отзыве из двух воркеров
+    оба записали бы одно и то же значение и второй отзыв ничего бы не отозвал
+    """
+    db.execute(
+        update(User).where(User.id == user_id).values(token_version=User.token_version + 1),
+        execution_options={"synchronize_session": False}
+    )
+
+
+def invalidate_user(user_id: int):
+    """Сбросить снимок и версию токенов пользователя после его изменения"""
+    principal_cache.pop(("user", user_id))
+    token_version_cache.pop(user_id)
+
+
+def invalidate_admin(admin_id: int):
+    principal_cache.pop(("admin", admin_id))
+
+
+def get_auth_cache_stats() -> dict:
+    return {
+        "tokens": token_cache.stats(),
+        "principals": principal_cache.stats(),
+        "token_versions": token_version_cache.stats(),
+    }
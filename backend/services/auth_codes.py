@@ -0,0 +1,130 @@
+"""
+services/auth_codes.py — хранилище одноразовых кодов авторизации через Telegram бота
+
+Коды живут CODE_EXPIRY_MINUTES и используются один раз, поэтому хранить их в SQL
+не нужно: таблица auth_codes росла бесконечно, а каждая выдача кода занимала
+блокировку записи SQLite. Реализации (AUTH_CODE_STORE):
+
+- memory — в памяти процесса. TTL у всех кодов одинаковый, поэтому порядок выдачи
+  совпадает с порядком истечения: просроченные коды снимаются с начала очереди
+  за амортизированное O(1). Подходит для одного процесса uvicorn.
+- redis — любой сервер с протоколом Redis (REDIS_URL): SET NX EX гарантирует
+  уникальность кода, истечение выполняет сервер. Нужен при нескольких воркерах.
+"""
+import json
+import secrets
+import string
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from config import get_settings
+
+settings = get_settings()
+
+# Сколько раз пытаться выдать неиспользуемый код
+MAX_ATTEMPTS = 20
+
+
+def generate_code() -> str:
+    """Генерирует 6-значный код"""
+    return ''.join(secrets.choice(string.digits) for _ in range(6))
+
+
+class AuthCodeStore(ABC):
+    """Интерфейс хранилища кодов"""
+
+    @abstractmethod
+    def issue(self, data: dict, ttl_seconds: int) -> str:
+        """Выдать уникальный код, привязанный к data"""
+
+    @abstractmethod
+    def consume(self, code: str) -> dict | None:
+        """Вернуть data и удалить код (None — кода нет или он истёк)"""
+
+
+class MemoryAuthCodeStore(AuthCodeStore):
+    """Коды в памяти процесса с истечением по очереди выдачи"""
+
+    def __init__(self):
+        self._codes = {}  # code -> (expires_at, data)
+        self._expiry = deque()  # (expires_at, code) в порядке выдачи
+        self._lock = threading.Lock()
+
+    def _purge(self, now: float):
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, code = self._expiry.popleft()
+            item = self._codes.get(code)
+            # Код мог быть использован и выдан заново — удаляем только свою запись
+            if item is not None and item[0] == expires_at:
+                del self._codes[code]
+
+    def issue(self, data: dict, ttl_seconds: int) -> str:
+        with self._lock:
+            now = time.monotonic()
+            self._purge(now)
+            for _ in range(MAX_ATTEMPTS):
+                code = generate_code()
+                if code not in self._codes:
+                    expires_at = now + ttl_seconds
+                    self._codes[code] = (expires_at, data)
+                    self._expiry.append((expires_at, code))
+                    return code
+        raise RuntimeError("Could not generate a unique auth code")
+
+    def consume(self, code: str) -> dict | None:
+        with self._lock:
+            self._purge(time.monotonic())
+            item = self._codes.pop(code, None)
+            return item[1] if item else None
+
+    def __len__(self):
+        with self._lock:
+            self._purge(time.monotonic())
+            return len(self._codes)
+
+
+class RedisAuthCodeStore(AuthCodeStore):
+    """Коды в Redis (или совместимом сервере): ключ с TTL, атомарное чтение и удаление"""
+
+    def __init__(self, url: str = None, client=None, prefix: str = "auth_code:"):
+        if client is None:
+            import redis  # опциональная зависимость, нужна только для AUTH_CODE_STORE=redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def issue(self, data: dict, ttl_seconds: int) -> str:
+        payload = json.dumps(data)
+        for _ in range(MAX_ATTEMPTS):
+            code = generate_code()
+            if self.client.set(self.prefix + code, payload, nx=True, ex=ttl_seconds):
+                return code
+        raise RuntimeError("Could not generate a unique auth code")
+
+    def consume(self, code: str) -> dict | None:
+        # GET и DEL в одной транзакции: код нельзя использовать дважды
+        pipe = self.client.pipeline(transaction=True)
+        pipe.get(self.prefix + code)
+        pipe.delete(self.prefix + code)
+        payload, _ = pipe.execute()
+        return json.loads(payload) if payload else None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_auth_code_store() -> AuthCodeStore:
+    """Хранилище кодов, выбранное в настройках (создаётся один раз на процесс)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.AUTH_CODE_STORE == "redis":
+                    _store = RedisAuthCodeStore(settings.REDIS_URL)
+                elif settings.AUTH_CODE_STORE == "memory":
+                    _store = MemoryAuthCodeStore()
+                else:
+                    raise ValueError(f"Unknown AUTH_CODE_STORE: {settings.AUTH_CODE_STORE}")
+    return _store
@@ -0,0 +1,277 @@
+"""
+services/exports.py — потоковый экспорт участников и команд хакатона (CSV, Parquet, Arrow IPC)
+
+Строки читаются из БД пачками (yield_per, серверный курсор на PostgreSQL)
+и сразу отдаются клиенту, поэтому память не растёт с размером хакатона.
+Генераторы открывают собственную сессию: они выполняются уже после выхода
+из обработчика, во время отправки StreamingResponse.
+
+Формирование файла занимает CPU (и GIL), поэтому одновременно выгрузок идёт не больше
+EXPORT_MAX_CONCURRENT. Слот ждут в event loop (export_slots.stream), а не в потоке пула:
+ожидающие выгрузки не занимают потоки, нужные обычным обработчикам с БД. Если в очереди
+уже EXPORT_MAX_QUEUED выгрузок, обработчик отвечает 503.
+"""
+import csv
+import io
+from itertools import groupby, islice
+from typing import AsyncIterator, Iterator
+import anyio
+from starlette.concurrency import iterate_in_threadpool
+from sqlalchemy.orm import Session, aliased
+from config import get_settings
+from database import SessionLocal
+from models import Team, TeamMember, User, UserHackathon
+
+settings = get_settings()
+
+# Поддерживаемые форматы: формат -> (media type, расширение файла)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+}
+
+# Колонки CSV: (заголовок, поле строки)
+PARTICIPANT_CSV_COLUMNS = [
+    ("ID", "id"),
+    ("Full Name", "full_name"),
+    ("Telegram Username", "telegram_username"),
+    ("Skills", "skills"),
+    ("Role Preference", "role_preference"),
+    ("Experience Level", "experience_level"),
+    ("Team Name", "team_name"),
+    ("Team Status", "team_status"),
+]
+
+TEAM_CSV_COLUMNS = [
+    ("Team ID", "team_id"),
+    ("Team Name", "team_name"),
+    ("Team Status", "team_status"),
+    ("Captain Name", "captain_name"),
+    ("Member Count", "member_count"),
+    ("Members", "members"),
+]
+
+
+def participants_query(db: Session, hackathon_id: int):
+    """Участники хакатона вместе с их командами одним запросом"""
+    return db.query(User, UserHackathon.registration_date, Team.name, Team.status).join(
+        UserHackathon,
+        User.id == UserHackathon.user_id
+    ).outerjoin(
+        Team,
+        Team.id == UserHackathon.team_id
+    ).filter(UserHackathon.hackathon_id == hackathon_id).order_by(User.id)
+
+
+def teams_query(db: Session, hackathon_id: int):
+    """Команды с капитанами и участниками одним запросом (строка на участника)"""
+    captain = aliased(User)
+    member = aliased(User)
+    return db.query(
+        Team.id, Team.name, Team.status, Team.created_at, captain.full_name, member.full_name
+    ).outerjoin(
+        captain, captain.id == Team.captain_id
+    ).outerjoin(
+        TeamMember, TeamMember.team_id == Team.id
+    ).outerjoin(
+        member, member.id == TeamMember.user_id
+    ).filter(Team.hackathon_id == hackathon_id).order_by(Team.id, TeamMember.id)
+
+
+def iter_participant_rows(hackathon_id: int) -> Iterator[dict]:
+    """Строки участников (skills — список, пустые значения — None)"""
+    db = SessionLocal()
+    try:
+        rows = participants_query(db, hackathon_id).yield_per(settings.EXPORT_BATCH_SIZE)
+        for user, registration_date, team_name, team_status in rows:
+            yield {
+                "id": user.id,
+                "full_name": user.full_name,
+                "telegram_username": user.telegram_username,
+                "skills": user.get_skills(),
+                "role_preference": user.role_preference,
+                "experience_level": user.experience_level,
+                "team_name": team_name,
+                "team_status": team_status,
+                "registration_date": registration_date,
+            }
+    finally:
+        db.close()
+
+
+def iter_team_rows(hackathon_id: int) -> Iterator[dict]:
+    """Строки команд (members — список имён участников)"""
+    db = SessionLocal()
+    try:
+        rows = teams_query(db, hackathon_id).yield_per(settings.EXPORT_BATCH_SIZE)
+        # Строки отсортированы по команде — группируем участников каждой команды
+        for key, team_rows in groupby(rows, key=lambda r: tuple(r[:5])):
+            team_id, team_name, team_status, created_at, captain_name = key
+            member_names = [r[5] for r in team_rows if r[5] is not None]
+            yield {
+                "team_id": team_id,
+                "team_name": team_name,
+                "team_status": team_status,
+                "captain_name": captain_name,
+                "member_count": len(member_names),
+                "members": member_names,
+                "created_at": created_at,
+            }
+    finally:
+        db.close()
+
+
+# ==================== CSV ====================
+
+def _csv_value(value):
+    """Значение ячейки CSV: списки через запятую, None — пустая строка"""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ", ".join(value)
+    return value
+
+
+def csv_chunks(columns: list, rows: Iterator[dict]) -> Iterator[str]:
+    """Сформировать CSV и отдавать его кусками не меньше EXPORT_CHUNK_SIZE символов"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, _ in columns])
+    
+    for row in rows:
+        writer.writerow([_csv_value(row[field]) for _, field in columns])
+        if buffer.tell() >= settings.EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    
+    yield buffer.getvalue()
+
+
+# ==================== PARQUET / ARROW ====================
+
+def participant_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.int64()),
+        ("full_name", pa.string()),
+        ("telegram_username", pa.string()),
+        ("skills", pa.list_(pa.string())),
+        ("role_preference", pa.string()),
+        ("experience_level", pa.string()),
+        ("team_name", pa.string()),
+        ("team_status", pa.string()),
+        ("registration_date", pa.timestamp("us")),
+    ])
+
+
+def team_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("team_id", pa.int64()),
+        ("team_name", pa.string()),
+        ("team_status", pa.string()),
+        ("captain_name", pa.string()),
+        ("member_count", pa.int32()),
+        ("members", pa.list_(pa.string())),
+        ("created_at", pa.timestamp("us")),
+    ])
+
+
+class _ChunkSink(io.RawIOBase):
+    """Файл только для записи: копит байты до выдачи, tell() — общее число записанных байт"""
+    
+    def __init__(self):
+        self._chunks = []
+        self._pending = 0
+        self._position = 0
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._pending += len(data)
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self._position
+    
+    @property
+    def pending(self) -> int:
+        return self._pending
+    
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self._pending = 0
+        return data
+
+
+def columnar_chunks(export_format: str, schema, rows: Iterator[dict]) -> Iterator[bytes]:
+    """Записывать строки пачками по EXPORT_BATCH_SIZE в Parquet или Arrow IPC и отдавать байты по мере записи"""
+    import pyarrow as pa
+    
+    sink = _ChunkSink()
+    output = pa.PythonFile(sink, mode="w")
+    if export_format == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(output, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(output, schema)
+    
+    with writer:
+        while True:
+            batch = list(islice(rows, settings.EXPORT_BATCH_SIZE))
+            if not batch:
+                break
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            if sink.pending >= settings.EXPORT_CHUNK_SIZE:
+                yield sink.take()
+    
+    yield sink.take()
+
+
+class ExportSlots:
+    """Слоты одновременных выгрузок процесса с ограниченной очередью"""
+    
+    def __init__(self, limit: int, max_queued: int):
+        self.limit = limit
+        self.max_queued = max_queued
+        self._semaphore = anyio.Semaphore(limit)
+        self._pending = 0  # выгрузки в работе и в очереди (меняется только в event loop)
+    
+    def is_full(self) -> bool:
+        """Очередь заполнена — новую выгрузку лучше отклонить"""
+        return self._pending >= self.limit + self.max_queued
+    
+    async def stream(self, chunks: Iterator) -> AsyncIterator:
+        """Дождаться слота в event loop и отдавать куски; каждый кусок формируется в пуле потоков"""
+        self._pending += 1
+        try:
+            async with self._semaphore:
+                async for chunk in iterate_in_threadpool(chunks):
+                    yield chunk
+        finally:
+            self._pending -= 1
+
+
+export_slots = ExportSlots(settings.EXPORT_MAX_CONCURRENT, settings.EXPORT_MAX_QUEUED)
+
+
+def participants_export(hackathon_id: int, export_format: str) -> Iterator:
+    """Экспорт участников хакатона в выбранном формате"""
+    rows = iter_participant_rows(hackathon_id)
+    if export_format == "csv":
+        return csv_chunks(PARTICIPANT_CSV_COLUMNS, rows)
+    return columnar_chunks(export_format, participant_schema(), rows)
+
+
+def teams_export(hackathon_id: int, export_format: str) -> Iterator:
+    """Экспорт команд хакатона в выбранном формате"""
+    rows = iter_team_rows(hackathon_id)
+    if export_format == "csv":
+        return csv_chunks(TEAM_CSV_COLUMNS, rows)
+    return columnar_chunks(export_format, team_schema(), rows)
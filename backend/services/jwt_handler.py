@@ -10,16 +10,23 @@ from config import get_settings
 settings = get_settings()
 
 
-def create_access_token(user_id: int, is_admin: bool, expires_delta: Optional[timedelta] = None) -> str:
+def create_access_token(
+    user_id: int,
+    is_admin: bool,
+    expires_delta: Optional[timedelta] = None,
+    token_version: int = 0
+) -> str:
     """
     Создаёт JWT токен для пользователя
     
     СТАРОЕ имя функции (для совместимости)
+    tv — версия токенов пользователя: токены со старой версией отклоняются
     """
     return create_token(
         data={
             "user_id": user_id,
-            "is_admin": is_admin
+            "is_admin": is_admin,
+            "tv": token_version
         },
         expires_delta=expires_delta
     )
@@ -0,0 +1,179 @@
+"""
+services/maintenance.py — обслуживание БД: очистка, архивация, ANALYZE/VACUUM
+
+- auth_codes: удаляются использованные и просроченные коды старше AUTH_CODE_RETENTION_HOURS
+  (оставшиеся строки со времён хранения кодов в SQL)
+- invitations: ожидающие приглашения закрытых команд, завершённых хакатонов и старше
+  INVITATION_PENDING_DAYS получают статус expired; обработанные приглашения старше
+  INVITATION_RETENTION_DAYS переносятся в invitations_archive
+- telegram_outbox: отправленные и неотправленные уведомления старше
+  NOTIFICATION_RETENTION_DAYS удаляются
+- ANALYZE таблиц с частыми выборками и VACUUM раз в MAINTENANCE_VACUUM_HOURS
+
+Удаление и архивация идут пачками по MAINTENANCE_BATCH_SIZE с commit после каждой,
+чтобы не держать долгую блокировку записи. Запуск вручную: python run_maintenance.py
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session
+from config import get_settings
+from database import SessionLocal, engine
+from models import AuthCode, Hackathon, Invitation, InvitationArchive, Team, TelegramNotification
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Таблицы, по которым часто ищут роутеры, — для ANALYZE / VACUUM
+MAINTAINED_TABLES = ["invitations", "auth_codes", "teams", "team_members", "user_hackathon", "users", "telegram_outbox"]
+
+
+def purge_auth_codes(db: Session, now: datetime, retention_hours: int, batch_size: int) -> int:
+    """Удалить использованные и просроченные коды авторизации старше срока хранения"""
+    cutoff = now - timedelta(hours=retention_hours)
+    deleted = 0
+    while True:
+        ids = [row.id for row in db.query(AuthCode.id).filter(
+            or_(AuthCode.expires_at < cutoff, AuthCode.is_used.is_(True) & (AuthCode.updated_at < cutoff))
+        ).limit(batch_size)]
+        if not ids:
+            return deleted
+        db.query(AuthCode).filter(AuthCode.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(ids)
+
+
+def expire_stale_invitations(db: Session, now: datetime, pending_days: int, batch_size: int) -> int:
+    """Пометить expired ожидающие приглашения закрытых команд, завершённых хакатонов и слишком старые"""
+    conditions = [Team.status != "open", Hackathon.status == "finished"]
+    if pending_days > 0:
+        conditions.append(Invitation.created_at < now - timedelta(days=pending_days))
+
+    expired = 0
+    while True:
+        ids = [row.id for row in db.query(Invitation.id).join(
+            Team, Invitation.team_id == Team.id
+        ).join(
+            Hackathon, Team.hackathon_id == Hackathon.id
+        ).filter(
+            Invitation.status == "pending",
+            or_(*conditions)
+        ).limit(batch_size)]
+        if not ids:
+            return expired
+        db.query(Invitation).filter(Invitation.id.in_(ids)).update(
+            {Invitation.status: "expired", Invitation.responded_at: now},
+            synchronize_session=False
+        )
+        db.commit()
+        expired += len(ids)
+
+
+def archive_invitations(db: Session, now: datetime, retention_days: int, batch_size: int) -> int:
+    """Перенести обработанные приглашения старше срока хранения в invitations_archive"""
+    if retention_days <= 0:
+        return 0
+
+    cutoff = now - timedelta(days=retention_days)
+    archived = 0
+    while True:
+        invitations = db.query(Invitation).filter(
+            Invitation.status != "pending",
+            Invitation.responded_at < cutoff
+        ).order_by(Invitation.id).limit(batch_size).all()
+        if not invitations:
+            return archived
+
+        db.add_all([
+            InvitationArchive(
+                invitation_id=inv.id,
+                team_id=inv.team_id,
+                user_id=inv.user_id,
+                sent_by_id=inv.sent_by_id,
+                status=inv.status,
+                created_at=inv.created_at,
+                responded_at=inv.responded_at,
+                archived_at=now
+            )
+            for inv in invitations
+        ])
+        db.query(Invitation).filter(
+            Invitation.id.in_([inv.id for inv in invitations])
+        ).delete(synchronize_session=False)
+        db.commit()
+        db.expunge_all()
+        archived += len(invitations)
+
+
+def purge_notifications(db: Session, now: datetime, retention_days: int, batch_size: int) -> int:
+    """Удалить обработанные уведомления (sent, failed) старше срока хранения"""
+    if retention_days <= 0:
+        return 0
+
+    cutoff = now - timedelta(days=retention_days)
+    deleted = 0
+    while True:
+        ids = [row.id for row in db.query(TelegramNotification.id).filter(
+            TelegramNotification.status != "pending",
+            TelegramNotification.created_at < cutoff
+        ).limit(batch_size)]
+        if not ids:
+            return deleted
+        db.query(TelegramNotification).filter(TelegramNotification.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(ids)
+
+
+def analyze_tables(vacuum: bool = False):
+    """Обновить статистику планировщика (ANALYZE) и при vacuum=True освободить место (VACUUM)"""
+    # VACUUM нельзя выполнять внутри транзакции
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if engine.dialect.name == "sqlite":
+            for table in MAINTAINED_TABLES:
+                conn.execute(text(f"ANALYZE {table}"))
+            if vacuum:
+                conn.execute(text("VACUUM"))
+        else:
+            tables = ", ".join(MAINTAINED_TABLES)
+            conn.execute(text(f"VACUUM (ANALYZE) {tables}" if vacuum else f"ANALYZE {tables}"))
+
+
+def run_maintenance(vacuum: bool = False) -> dict:
+    """Один проход обслуживания со сроками хранения из настроек"""
+    now = datetime.utcnow()
+    batch_size = settings.MAINTENANCE_BATCH_SIZE
+    db = SessionLocal()
+    try:
+        result = {
+            "auth_codes_deleted": purge_auth_codes(db, now, settings.AUTH_CODE_RETENTION_HOURS, batch_size),
+            "invitations_expired": expire_stale_invitations(db, now, settings.INVITATION_PENDING_DAYS, batch_size),
+            "invitations_archived": archive_invitations(db, now, settings.INVITATION_RETENTION_DAYS, batch_size),
+            "notifications_deleted": purge_notifications(db, now, settings.NOTIFICATION_RETENTION_DAYS, batch_size),
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    analyze_tables(vacuum=vacuum)
+    result["vacuum"] = vacuum
+    return result
+
+
+async def run_maintenance_loop(interval_minutes: int, vacuum_hours: int):
+    """Фоновая задача: обслуживание раз в interval_minutes, VACUUM не чаще раза в vacuum_hours"""
+    from anyio import to_thread
+
+    last_vacuum = datetime.utcnow()  # первый проход при старте — без VACUUM
+    while True:
+        vacuum = vacuum_hours > 0 and datetime.utcnow() - last_vacuum >= timedelta(hours=vacuum_hours)
+        try:
+            result = await to_thread.run_sync(run_maintenance, vacuum)
+            if vacuum:
+                last_vacuum = datetime.utcnow()
+            logger.info(f"🧹 Maintenance: {result}")
+        except Exception as e:
+            logger.error(f"❌ Maintenance failed: {e}")
+        await asyncio.sleep(interval_minutes * 60)
@@ -0,0 +1,320 @@
+"""
+services/notifications.py — уведомления в Telegram через очередь telegram_outbox
+
+Обработчики запросов только добавляют запись в очередь (enqueue_notification) в своей
+транзакции: уведомление появляется, только если изменение сохранено, и не задерживает
+ответ. Повторная постановка с тем же dedup_key игнорируется. Фоновый диспетчер
+(run_notification_dispatcher):
+
+- берёт пачку готовых записей, помечая её меткой и арендой (next_attempt_at = конец
+  аренды): несколько воркеров не возьмут одну запись, а записи упавшего воркера
+  вернутся в очередь через NOTIFY_LEASE_SECONDS
+- соблюдает лимит бота (NOTIFY_RATE_GLOBAL) и лимит на чат (NOTIFY_RATE_PER_CHAT):
+  сообщение в "перегретый" чат откладывается, не задерживая остальные. При
+  RATE_LIMIT_BACKEND=redis лимиты общие для всех воркеров; в памяти они считаются в
+  процессе, поэтому отправляет только воркер, взявший блокировку NOTIFY_LOCK_FILE,
+  остальные ждут её (и подхватят, если он завершится)
+- повторяет при сетевых ошибках с экспоненциальной паузой до NOTIFY_MAX_ATTEMPTS,
+  при RetryAfter ждёт указанное Telegram время; если бот заблокирован или чата нет —
+  запись сразу получает статус failed
+"""
+import asyncio
+import logging
+import os
+import random
+import secrets
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from config import get_settings
+from database import SessionLocal, dialect_insert
+from models import TelegramNotification, User
+from services.rate_limit import MemoryRateLimitBackend, RedisRateLimitBackend, parse_budget
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def enqueue_notification(db: Session, user_id: int, text: str, dedup_key: str):
+    """Добавить уведомление в очередь в текущей транзакции (без commit)"""
+    if not settings.NOTIFICATIONS_ENABLED:
+        return
+    now = datetime.utcnow()
+    db.execute(dialect_insert(db, TelegramNotification).values(
+        user_id=user_id,
+        text=text,
+        dedup_key=dedup_key,
+        status="pending",
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now
+    ).on_conflict_do_nothing(index_elements=["dedup_key"]))
+
+
+# ════════════════════════════════════════════
+# События приглашений
+# ════════════════════════════════════════════
+
+def _with_link(text: str, label: str) -> str:
+    """Добавить ссылку на фронтенд, если FRONTEND_URL задан"""
+    if not settings.FRONTEND_URL:
+        return text
+    return f"{text}\n\n{label}: {settings.FRONTEND_URL}"
+
+
+def notify_invitation_received(db: Session, invitation_id: int, user_id: int, team_name: str):
+    """Пользователя пригласили в команду"""
+    enqueue_notification(
+        db, user_id,
+        _with_link(f"📨 Вас пригласили в команду «{team_name}».", "Ответить"),
+        f"invitation:{invitation_id}:received"
+    )
+
+
+def notify_application_received(db: Session, invitation_id: int, captain_id: int, applicant_name: str, team_name: str):
+    """Капитану пришла заявка в команду"""
+    enqueue_notification(
+        db, captain_id,
+        _with_link(f"📨 {applicant_name} подал(а) заявку в команду «{team_name}».", "Рассмотреть"),
+        f"invitation:{invitation_id}:received"
+    )
+
+
+def notify_application_result(db: Session, invitation_id: int, user_id: int, team_name: str, approved: bool):
+    """Капитан принял или отклонил заявку пользователя"""
+    if approved:
+        text = f"✅ Ваша заявка в команду «{team_name}» принята!"
+    else:
+        text = f"❌ Ваша заявка в команду «{team_name}» отклонена."
+    enqueue_notification(
+        db, user_id, text,
+        f"invitation:{invitation_id}:{'approved' if approved else 'rejected'}"
+    )
+
+
+# ════════════════════════════════════════════
+# Диспетчер
+# ════════════════════════════════════════════
+
+def claim_batch(now: datetime, batch_size: int, lease_seconds: int) -> list:
+    """Взять в работу пачку готовых уведомлений: [(id, chat_id, text, attempts)]"""
+    claim = secrets.token_hex(8)
+    db = SessionLocal()
+    try:
+        due = select(TelegramNotification.id).where(
+            TelegramNotification.status == "pending",
+            TelegramNotification.next_attempt_at <= now
+        ).order_by(TelegramNotification.next_attempt_at).limit(batch_size)
+        # Условия повторяются во внешнем UPDATE: запись, уже взятую другим воркером, не перехватить
+        db.execute(update(TelegramNotification).where(
+            TelegramNotification.id.in_(due.scalar_subquery()),
+            TelegramNotification.status == "pending",
+            TelegramNotification.next_attempt_at <= now
+        ).values(
+            claimed_by=claim,
+            next_attempt_at=now + timedelta(seconds=lease_seconds)
+        ).execution_options(synchronize_session=False))
+        db.commit()
+
+        rows = db.query(
+            TelegramNotification.id, User.telegram_id, TelegramNotification.text, TelegramNotification.attempts
+        ).join(
+            User, User.id == TelegramNotification.user_id
+        ).filter(
+            TelegramNotification.claimed_by == claim
+        ).order_by(TelegramNotification.id).all()
+        return [tuple(row) for row in rows]
+    finally:
+        db.close()
+
+
+def finish_batch(results: list):
+    """Сохранить результаты отправки: [{id, status, attempts, next_attempt_at, ...}]"""
+    if not results:
+        return
+    db = SessionLocal()
+    try:
+        db.execute(update(TelegramNotification), results)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _seconds(value) -> float:
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+def _retry(notification_id: int, attempts: int, delay: float, error: str) -> dict:
+    """Результат для повтора через delay секунд (или failed, если попытки исчерпаны)"""
+    if attempts >= settings.NOTIFY_MAX_ATTEMPTS:
+        return _failed(notification_id, attempts, error)
+    return {
+        "id": notification_id,
+        "status": "pending",
+        "attempts": attempts,
+        "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay),
+        "claimed_by": None,
+        "last_error": error
+    }
+
+
+def _failed(notification_id: int, attempts: int, error: str) -> dict:
+    return {
+        "id": notification_id,
+        "status": "failed",
+        "attempts": attempts,
+        "claimed_by": None,
+        "last_error": error
+    }
+
+
+async def send_notification(bot, notification_id: int, chat_id: int, text: str, attempts: int) -> dict:
+    """Отправить одно уведомление и вернуть результат для finish_batch"""
+    from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+
+    attempts += 1
+    try:
+        await bot.send_message(chat_id=chat_id, text=text, disable_web_page_preview=True)
+    except RetryAfter as e:
+        # Ограничение Telegram — не ошибка сообщения, попытку не считаем
+        return _retry(notification_id, attempts - 1, _seconds(e.retry_after), str(e))
+    except (Forbidden, BadRequest) as e:
+        # Бот заблокирован или чата нет — повтор не поможет
+        return _failed(notification_id, attempts, str(e))
+    except TelegramError as e:
+        delay = settings.NOTIFY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+        return _retry(notification_id, attempts, random.uniform(delay / 2, delay), str(e))
+
+    return {
+        "id": notification_id,
+        "status": "sent",
+        "attempts": attempts,
+        "sent_at": datetime.utcnow(),
+        "claimed_by": None,
+        "last_error": None
+    }
+
+
+class NotificationLimits:
+    """
+    Token bucket на бота (с ожиданием, равномерно) и на чат (без ожидания).
+    buckets — MemoryRateLimitBackend (по умолчанию) или общий RedisRateLimitBackend
+    """
+
+    def __init__(self, global_budget: str, chat_budget: str, buckets=None):
+        self.buckets = buckets or MemoryRateLimitBackend()
+        # Без всплеска: Telegram считает сообщения по секундам, равномерный темп не превышает лимит
+        self.global_limit = (1.0, parse_budget(global_budget)[1])
+        self.chat_limit = parse_budget(chat_budget)
+
+    async def wait_global(self):
+        while (wait := await self.buckets.acquire("global", *self.global_limit)) > 0:
+            await asyncio.sleep(wait)
+
+    async def acquire_chat(self, chat_id) -> float:
+        """0 — можно отправлять в чат, иначе через сколько секунд"""
+        return await self.buckets.acquire(f"chat:{chat_id}", *self.chat_limit)
+
+
+async def dispatch_batch(bot, batch: list, limits: NotificationLimits) -> list:
+    """Отправить пачку параллельно в пределах лимитов; вернуть результаты для finish_batch"""
+    results = []
+    tasks = []
+    deferred = defaultdict(int)  # chat_id -> сколько сообщений этой пачки уже отложено
+    for notification_id, chat_id, text, attempts in batch:
+        wait = await limits.acquire_chat(chat_id)
+        if wait > 0:
+            # Чат "перегрет": откладываем сообщение (следующие в тот же чат — ещё дальше), остальные идут
+            delay = wait + deferred[chat_id] / limits.chat_limit[1]
+            deferred[chat_id] += 1
+            results.append(_retry(notification_id, attempts, delay, None))
+            continue
+        await limits.wait_global()
+        tasks.append(asyncio.create_task(send_notification(bot, notification_id, chat_id, text, attempts)))
+    results.extend(await asyncio.gather(*tasks))
+    return results
+
+
+def try_dispatcher_lock(path: str):
+    """
+    Взять блокировку единственного диспетчера на хосте; вернуть открытый файл
+    (держать до завершения процесса) или None, если её держит другой процесс
+    """
+    import fcntl
+
+    lock_file = open(path, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+async def wait_dispatcher_lock(path: str, poll_seconds: float):
+    """Ждать блокировку диспетчера (ОС снимает её, когда процесс-владелец завершается)"""
+    lock_file = try_dispatcher_lock(path)
+    if lock_file is None:
+        logger.info(f"📨 Notification dispatcher is running in another worker ({path}), standing by")
+    while lock_file is None:
+        await asyncio.sleep(poll_seconds)
+        lock_file = try_dispatcher_lock(path)
+    lock_file.truncate(0)
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    return lock_file
+
+
+def create_notification_limits() -> NotificationLimits:
+    """Лимиты из настроек: в Redis, если он хранилище лимитов, иначе в памяти процесса"""
+    buckets = None
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        buckets = RedisRateLimitBackend(settings.REDIS_URL, prefix="notify_limit:")
+    return NotificationLimits(settings.NOTIFY_RATE_GLOBAL, settings.NOTIFY_RATE_PER_CHAT, buckets)
+
+
+async def _dispatch_loop(bot, limits: NotificationLimits, poll_seconds: float):
+    from anyio import to_thread
+
+    batch_size = settings.NOTIFY_BATCH_SIZE
+    while True:
+        batch = []
+        try:
+            await bot.initialize()  # повторный вызов ничего не делает
+            batch = await to_thread.run_sync(claim_batch, datetime.utcnow(), batch_size, settings.NOTIFY_LEASE_SECONDS)
+            if batch:
+                results = await dispatch_batch(bot, batch, limits)
+                await to_thread.run_sync(finish_batch, results)
+                sent = sum(result["status"] == "sent" for result in results)
+                logger.info(f"📨 Notifications: {sent}/{len(batch)} sent")
+        except Exception as e:
+            logger.error(f"❌ Notification dispatcher failed: {e}")
+        # Полная пачка — очередь, скорее всего, не пуста: берём следующую сразу
+        if len(batch) < batch_size:
+            await asyncio.sleep(poll_seconds)
+
+
+async def run_notification_dispatcher(bot, poll_seconds: float):
+    """Фоновая задача: отправка уведомлений из очереди (bot — telegram.Bot)"""
+    limits = create_notification_limits()
+    if not isinstance(limits.buckets, MemoryRateLimitBackend):
+        await _dispatch_loop(bot, limits, poll_seconds)
+        return
+
+    # Лимиты в памяти не видны другим воркерам: отправляет только один из них
+    lock_file = await wait_dispatcher_lock(settings.NOTIFY_LOCK_FILE, poll_seconds)
+    try:
+        await _dispatch_loop(bot, limits, poll_seconds)
+    finally:
+        lock_file.close()
+
+
+def get_notification_stats(db: Session) -> dict:
+    """Размер очереди по статусам"""
+    counts = dict(db.query(TelegramNotification.status, func.count()).group_by(TelegramNotification.status).all())
+    return {
+        "pending": counts.get("pending", 0),
+        "sent": counts.get("sent", 0),
+        "failed": counts.get("failed", 0),
+    }
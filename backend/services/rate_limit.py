@@ -0,0 +1,239 @@
+"""
+services/rate_limit.py — ограничение частоты запросов к эндпоинтам авторизации (token bucket)
+
+Бюджеты задаются в config.Settings строкой "N/S": до N запросов подряд, затем
+по N запросов за S секунд. Бюджет считается отдельно для каждого клиента (IP), а для
+выдачи кода — для каждого Telegram ID (её вызывает бот с одного адреса, поэтому
+бюджет на клиента у неё общий на всех пользователей и намного больше).
+При превышении возвращается 429 с заголовком Retry-After. Хранилище корзин (RATE_LIMIT_BACKEND):
+
+- memory — в памяти процесса (ограниченный LRU), для одного процесса uvicorn
+- redis — общий для всех воркеров сервер с протоколом Redis (REDIS_URL), корзина
+  обновляется атомарно Lua-скриптом
+"""
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from urllib.parse import parse_qs
+from config import get_settings
+
+settings = get_settings()
+
+# Сколько корзин держать в памяти (самые давние вытесняются)
+MEMORY_MAX_BUCKETS = 100000
+
+
+def parse_budget(budget: str) -> tuple[float, float]:
+    """'5/60' -> (ёмкость 5, пополнение 5/60 токена в секунду)"""
+    count, seconds = budget.split("/")
+    capacity = float(count)
+    return capacity, capacity / float(seconds)
+
+
+class MemoryRateLimitBackend:
+    """Корзины в памяти процесса"""
+
+    def __init__(self, max_buckets: int = MEMORY_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    async def acquire(self, key: str, capacity: float, rate: float) -> float:
+        """Взять токен; вернуть 0, если разрешено, иначе через сколько секунд повторить"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+# KEYS[1] — корзина; ARGV: ёмкость, пополнение в секунду, текущее время (секунды)
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+    """Корзины в Redis (или совместимом сервере), общие для всех воркеров"""
+
+    def __init__(self, url: str = None, client=None, prefix: str = "rate_limit:"):
+        if client is None:
+            import redis.asyncio  # опциональная зависимость, нужна только для RATE_LIMIT_BACKEND=redis
+            client = redis.asyncio.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, key: str, capacity: float, rate: float) -> float:
+        return float(await self._script(keys=[self.prefix + key], args=[capacity, rate, time.time()]))
+
+
+def _client_ip(scope) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _telegram_id(scope) -> str | None:
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("telegram_id")
+    return values[0] if values else None
+
+
+class RateLimitRule:
+    """Бюджеты маршрута: (метод, путь) и {вид ключа: (scope -> значение, бюджет "N/S")}"""
+
+    def __init__(self, method: str, path: str, limits: dict):
+        self.method = method
+        self.path = path
+        self.limits = {
+            kind: (key_func, *parse_budget(budget))
+            for kind, (key_func, budget) in limits.items()
+        }
+
+
+def get_rate_limit_rules() -> list:
+    """Ограничиваемые маршруты и их бюджеты из настроек"""
+    return [
+        RateLimitRule("POST", "/api/auth/telegram/generate-code", {
+            "telegram_id": (_telegram_id, settings.RATE_LIMIT_GENERATE_CODE),
+            "ip": (_client_ip, settings.RATE_LIMIT_GENERATE_CODE_CLIENT),
+        }),
+        RateLimitRule("POST", "/api/auth/telegram/verify-code", {
+            "ip": (_client_ip, settings.RATE_LIMIT_VERIFY_CODE),
+        }),
+        RateLimitRule("POST", "/api/auth/admin/login", {
+            "ip": (_client_ip, settings.RATE_LIMIT_ADMIN_LOGIN),
+        }),
+    ]
+
+
+def create_rate_limit_backend():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(settings.REDIS_URL)
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return MemoryRateLimitBackend()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND}")
+
+
+_backend = None
+
+
+def get_rate_limit_backend():
+    """Хранилище корзин процесса: общее для middleware и check_rate_limit"""
+    global _backend
+    if _backend is None:
+        _backend = create_rate_limit_backend()
+    return _backend
+
+
+# Отклонённые запросы: (путь, вид ключа) -> количество
+rejected_counts = defaultdict(int)
+
+
+async def acquire_limits(backend, rule: RateLimitRule, values: dict) -> float:
+    """
+    Взять токены правила для ключей values ({вид ключа: значение}; виды без значения
+    пропускаются). 0 — разрешено, иначе через сколько секунд повторить
+    """
+    retry_after = 0.0
+    for kind, (_, capacity, rate) in rule.limits.items():
+        value = values.get(kind)
+        if value is None:
+            continue
+        wait = await backend.acquire(f"{rule.path}:{kind}:{value}", capacity, rate)
+        if wait > 0:
+            rejected_counts[(rule.path, kind)] += 1
+            retry_after = max(retry_after, wait)
+    return retry_after
+
+
+_rules = None
+
+
+async def check_rate_limit(method: str, path: str, **values) -> float:
+    """
+    Проверка бюджета маршрута без HTTP запроса (для вызовов сервисов в обход API,
+    например выдачи кода ботом в одном процессе с backend). Результат как у acquire_limits
+    """
+    global _rules
+    if not settings.RATE_LIMIT_ENABLED:
+        return 0.0
+    if _rules is None:
+        _rules = {(rule.method, rule.path): rule for rule in get_rate_limit_rules()}
+    rule = _rules.get((method, path))
+    if rule is None:
+        return 0.0
+    return await acquire_limits(get_rate_limit_backend(), rule, values)
+
+
+def get_rate_limit_stats() -> dict:
+    return {
+        "backend": settings.RATE_LIMIT_BACKEND,
+        "rejected": {f"{path} [{kind}]": count for (path, kind), count in sorted(rejected_counts.items())},
+        "rejected_total": sum(rejected_counts.values()),
+    }
+
+
+class RateLimitMiddleware:
+    """ASGI middleware: token bucket для маршрутов из get_rate_limit_rules()"""
+
+    def __init__(self, app, backend=None, rules: list = None):
+        self.app = app
+        self.backend = backend or get_rate_limit_backend()
+        self.rules = {(rule.method, rule.path): rule for rule in (rules or get_rate_limit_rules())}
+
+    async def __call__(self, scope, receive, send):
+        rule = self.rules.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        values = {kind: key_func(scope) for kind, (key_func, _, _) in rule.limits.items()}
+        retry_after = await acquire_limits(self.backend, rule, values)
+        if retry_after > 0:
+            await self._reject(send, retry_after)
+            return
+
+        await self.app(scope, receive, send)
+
+    async def _reject(self, send, retry_after: float):
+        body = json.dumps({"detail": "Too many requests"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
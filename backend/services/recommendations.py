@@ -0,0 +1,148 @@
+"""
+services/recommendations.py — подбор участников в команду
+
+Для хакатона строится битовая матрица «участник без команды × навык» (8 навыков
+в байте, как np.packbits) и массивы ролей/уровней опыта: память — n_users × n_skills / 8
+байт, без плотной матрицы bool. Матрица кешируется на RECOMMENDATIONS_CACHE_SECONDS,
+а оценка для команды считается векторно через NumPy (AND с маской недостающих навыков
+и popcount по таблице) без циклов по пользователям.
+"""
+import threading
+import time
+import numpy as np
+from sqlalchemy.orm import Session
+from config import get_settings
+from models import User, UserHackathon, UserSkill, TeamMember
+
+settings = get_settings()
+
+EXPERIENCE_LEVELS = ["junior", "middle", "senior"]
+
+# Веса компонент итоговой оценки
+SKILL_WEIGHT = 0.6
+ROLE_WEIGHT = 0.25
+EXPERIENCE_WEIGHT = 0.15
+
+# Число единичных битов в каждом значении байта
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+
+class ParticipantMatrix:
+    """Матрица навыков участников хакатона без команды"""
+    
+    def __init__(self, user_ids, skill_ids, skills, roles, experience, built_at):
+        self.user_ids = user_ids          # np.ndarray[int64], (n_users,)
+        self.skill_index = {skill_id: i for i, skill_id in enumerate(skill_ids)}
+        self.skills = skills              # np.ndarray[uint8], (n_users, ceil(n_skills / 8)), биты как np.packbits
+        self.roles = roles                # np.ndarray[object], (n_users,)
+        self.experience = experience      # np.ndarray[int8], (n_users,), -1 — не указан
+        self.built_at = built_at
+
+
+_cache: dict = {}
+_cache_lock = threading.Lock()
+
+
+def _experience_code(level: str | None) -> int:
+    return EXPERIENCE_LEVELS.index(level) if level in EXPERIENCE_LEVELS else -1
+
+
+def _set_bits(packed: np.ndarray, rows, columns):
+    """Установить биты столбцов columns (номера навыков) в строках rows упакованной матрицы"""
+    np.bitwise_or.at(packed, (rows, columns >> 3), (0x80 >> (columns & 7)).astype(np.uint8))
+
+
+def build_participant_matrix(db: Session, hackathon_id: int) -> ParticipantMatrix:
+    """Построить матрицу по участникам хакатона без команды (два запроса к БД)"""
+    participants = db.query(User.id, User.role_preference, User.experience_level).join(
+        UserHackathon, UserHackathon.user_id == User.id
+    ).filter(
+        UserHackathon.hackathon_id == hackathon_id,
+        UserHackathon.team_id == None
+    ).order_by(User.id).all()
+    
+    user_ids = np.array([p.id for p in participants], dtype=np.int64)
+    roles = np.array([p.role_preference for p in participants], dtype=object)
+    experience = np.array([_experience_code(p.experience_level) for p in participants], dtype=np.int8)
+    
+    links = db.query(UserSkill.user_id, UserSkill.skill_id).join(
+        UserHackathon, UserHackathon.user_id == UserSkill.user_id
+    ).filter(
+        UserHackathon.hackathon_id == hackathon_id,
+        UserHackathon.team_id == None
+    ).all()
+    
+    link_users = np.array([link.user_id for link in links], dtype=np.int64)
+    link_skills = np.array([link.skill_id for link in links], dtype=np.int64)
+    skill_ids, skill_columns = np.unique(link_skills, return_inverse=True)
+    
+    skills = np.zeros((len(user_ids), (len(skill_ids) + 7) // 8), dtype=np.uint8)
+    if len(links):
+        _set_bits(skills, np.searchsorted(user_ids, link_users), skill_columns)
+    
+    return ParticipantMatrix(user_ids, skill_ids.tolist(), skills, roles, experience, time.monotonic())
+
+
+def get_participant_matrix(db: Session, hackathon_id: int) -> ParticipantMatrix:
+    """Матрица из кеша или построенная заново, если кеш устарел"""
+    with _cache_lock:
+        matrix = _cache.get(hackathon_id)
+    
+    if matrix is None or time.monotonic() - matrix.built_at > settings.RECOMMENDATIONS_CACHE_SECONDS:
+        matrix = build_participant_matrix(db, hackathon_id)
+        with _cache_lock:
+            _cache[hackathon_id] = matrix
+    
+    return matrix
+
+
+def score_candidates(matrix: ParticipantMatrix, team_skill_ids, team_roles, team_experience) -> np.ndarray:
+    """
+    Оценка каждого участника для команды (0..1):
+    - навыки: сколько новых для команды навыков он добавляет (нормировано на максимум)
+    - роль: его роль ещё не занята в команде
+    - опыт: его уровень реже встречается в команде
+    """
+    team_columns = np.array([matrix.skill_index[s] for s in team_skill_ids if s in matrix.skill_index], dtype=np.int64)
+    team_bits = np.zeros((1, matrix.skills.shape[1]), dtype=np.uint8)
+    _set_bits(team_bits, np.zeros_like(team_columns), team_columns)
+    
+    # Хвостовые биты последнего байта в матрице нулевые, поэтому ~team_bits их не добавит
+    new_skills = POPCOUNT[matrix.skills & ~team_bits].sum(axis=1, dtype=np.int64).astype(np.float64)
+    skill_score = new_skills / new_skills.max() if len(new_skills) and new_skills.max() > 0 else new_skills
+    
+    role_score = (~np.isin(matrix.roles, list(team_roles)) & (matrix.roles != None)).astype(np.float64)
+    
+    team_levels = np.array([_experience_code(level) for level in team_experience], dtype=np.int8)
+    level_counts = np.array([(team_levels == code).sum() for code in range(len(EXPERIENCE_LEVELS))])
+    level_share = level_counts / max(len(team_levels), 1)
+    experience_score = np.where(matrix.experience >= 0, 1.0 - level_share[np.maximum(matrix.experience, 0)], 0.0)
+    
+    return SKILL_WEIGHT * skill_score + ROLE_WEIGHT * role_score + EXPERIENCE_WEIGHT * experience_score
+
+
+def recommend_for_team(db: Session, hackathon_id: int, team_id: int, limit: int) -> list:
+    """Топ-k участников без команды для команды: список (user_id, score)"""
+    matrix = get_participant_matrix(db, hackathon_id)
+    if not len(matrix.user_ids) or limit <= 0:
+        return []
+    
+    members = db.query(User.id, User.role_preference, User.experience_level).join(
+        TeamMember, TeamMember.user_id == User.id
+    ).filter(TeamMember.team_id == team_id).all()
+    member_ids = [m.id for m in members]
+    team_skill_ids = [
+        row.skill_id for row in db.query(UserSkill.skill_id).filter(UserSkill.user_id.in_(member_ids)).distinct()
+    ] if member_ids else []
+    
+    scores = score_candidates(
+        matrix,
+        team_skill_ids,
+        {m.role_preference for m in members if m.role_preference},
+        [m.experience_level for m in members]
+    )
+    
+    k = min(limit, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [(int(matrix.user_ids[i]), float(scores[i])) for i in top]
@@ -0,0 +1,118 @@
+"""
+services/search.py — полнотекстовый поиск участников (SQLite FTS5 / PostgreSQL tsvector)
+
+Индекс строится по имени, username, bio и навыкам и поддерживается самой БД:
+в SQLite — триггерами на таблице users, в PostgreSQL — генерируемой колонкой.
+Поэтому он синхронизирован при любом изменении профиля (update_my_profile, авторизация).
+
+Токенизаторы не считают ё и е одной буквой, поэтому ё заменяется на е и в индексе
+(replace() в триггерах SQLite, translate() в генерируемой колонке PostgreSQL), и в
+поисковой строке (fold).
+Индекс FTS5 нельзя перестраивать командой 'rebuild': она читает users без замены.
+"""
+import re
+from sqlalchemy import Float, Integer, text
+from sqlalchemy.orm import Query, Session
+from models import User
+
+# Индексируемые колонки таблицы users
+SEARCH_COLUMNS = ["full_name", "telegram_username", "bio", "skills"]
+
+
+def _fold_sql(expr: str) -> str:
+    """SQL-выражение: ё -> е (SQLite)"""
+    return f"replace(replace({expr}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _values_sql(prefix: str) -> str:
+    """Значения индексируемых колонок строки users (new. / old. / пусто) с заменой ё"""
+    return ", ".join(_fold_sql(prefix + c) for c in SEARCH_COLUMNS)
+
+
+_SQLITE_FTS_DDL = [
+    # unicode61 приводит к нижнему регистру в т.ч. кириллицу
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        {", ".join(SEARCH_COLUMNS)},
+        content='users', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES (new.id, {_values_sql("new.")});
+    END""",
+    # 'delete' должен получить те же значения, что были проиндексированы
+    f"""CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {_values_sql("old.")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF {", ".join(SEARCH_COLUMNS)} ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {_values_sql("old.")});
+        INSERT INTO users_fts(rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES (new.id, {_values_sql("new.")});
+    END""",
+    f"""INSERT INTO users_fts(rowid, {", ".join(SEARCH_COLUMNS)})
+        SELECT id, {_values_sql("")} FROM users""",
+]
+
+_POSTGRES_DDL = [
+    # Конфигурация 'simple' не зависит от языка и подходит для кириллицы
+    f"""ALTER TABLE users ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', translate(
+            {" || ' ' || ".join(f"coalesce({c}, '')" for c in SEARCH_COLUMNS)},
+            'ёЁ', 'еЕ'
+        ))) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_users_search_vector ON users USING gin (search_vector)",
+]
+
+def create_search_index(conn):
+    """Создать поисковый индекс для текущего диалекта и заполнить его"""
+    if conn.dialect.name == "sqlite":
+        statements = _SQLITE_FTS_DDL
+    elif conn.dialect.name == "postgresql":
+        statements = _POSTGRES_DDL
+    else:
+        return
+
+    for statement in statements:
+        conn.execute(text(statement))
+
+
+def fold(value: str) -> str:
+    """Нижний регистр и ё -> е, как в индексе"""
+    return value.lower().replace("ё", "е")
+
+
+def tokenize(search: str) -> list:
+    """Разбить поисковую строку на слова (буквы любого алфавита и цифры)"""
+    return [fold(token) for token in re.findall(r"\w+", search)]
+
+
+def apply_participant_search(query: Query, db: Session, search: str) -> Query:
+    """
+    Отфильтровать запрос по поисковой строке и отсортировать по релевантности.
+    Каждое слово ищется по префиксу, все слова должны совпасть.
+    """
+    tokens = tokenize(search)
+    dialect = db.get_bind().dialect.name
+
+    if not tokens:
+        # В строке нет слов (только знаки) — обычный поиск по подстроке
+        return query.filter(User.full_name.ilike(f"%{search}%"))
+
+    if dialect == "sqlite":
+        match = " ".join(f'"{token}"*' for token in tokens)
+        ranked = text(
+            "SELECT rowid AS user_id, bm25(users_fts) AS rank FROM users_fts WHERE users_fts MATCH :match"
+        ).bindparams(match=match)
+    elif dialect == "postgresql":
+        match = " & ".join(f"{token}:*" for token in tokens)
+        ranked = text(
+            "SELECT id AS user_id, -ts_rank(search_vector, to_tsquery('simple', :match)) AS rank "
+            "FROM users WHERE search_vector @@ to_tsquery('simple', :match)"
+        ).bindparams(match=match)
+    else:
+        return query.filter(User.full_name.ilike(f"%{search}%"))
+
+    ranked = ranked.columns(user_id=Integer, rank=Float).subquery("ranked")
+    return query.join(ranked, ranked.c.user_id == User.id).order_by(ranked.c.rank, User.id)
@@ -0,0 +1,67 @@
+"""
+services/skills.py — нормализованные навыки пользователей (таблицы skills / user_skills)
+"""
+from sqlalchemy.orm import Session
+from database import dialect_insert
+from models import Skill, User, UserSkill
+
+
+def normalize_skill(name: str) -> str:
+    """Нормализовать название навыка для поиска: '  Python ' -> 'python'"""
+    return name.strip().lower()
+
+
+def normalize_skills(names: list) -> set:
+    """Множество нормализованных названий навыков (пустые пропускаются)"""
+    return {normalize_skill(name) for name in names if name and name.strip()}
+
+
+def skill_display_names(names: list) -> dict:
+    """Нормализованное имя -> написание (первое встреченное, без пробелов по краям)"""
+    display_names = {}
+    for name in names:
+        if name and name.strip():
+            display_names.setdefault(normalize_skill(name), name.strip())
+    return display_names
+
+
+def get_display_names(db: Session, normalized_names) -> dict:
+    """Написания навыков из справочника: {нормализованное имя: display_name}"""
+    if not normalized_names:
+        return {}
+    rows = db.query(Skill.name, Skill.display_name).filter(Skill.name.in_(list(normalized_names))).all()
+    return {name: display_name or name for name, display_name in rows}
+
+
+def get_or_create_skills(db: Session, names: list) -> list:
+    """Найти навыки в справочнике, недостающие — создать"""
+    display_names = skill_display_names(names)
+    normalized = set(display_names)
+    if not normalized:
+        return []
+    
+    skills = db.query(Skill).filter(Skill.name.in_(normalized)).all()
+    missing = normalized - {skill.name for skill in skills}
+    
+    if missing:
+        # Тот же навык может одновременно создавать другой запрос: конфликт по skills.name
+        # пропускаем и перечитываем строки (в порядке имён, чтобы транзакции не ждали друг друга по кругу)
+        db.execute(dialect_insert(db, Skill).values(
+            [{"name": name, "display_name": display_names[name]} for name in sorted(missing)]
+        ).on_conflict_do_nothing(index_elements=["name"]))
+        skills += db.query(Skill).filter(Skill.name.in_(missing)).all()
+    
+    return skills
+
+
+def set_user_skills(db: Session, user: User, skills_list: list):
+    """Установить навыки пользователя: JSON для API и связи user_skills для фильтров"""
+    user.set_skills(skills_list)
+    
+    skill_ids = {skill.id for skill in get_or_create_skills(db, skills_list)}
+    current_ids = {link.skill_id for link in user.skill_links}
+    
+    # Удаляем лишние связи и добавляем новые, не трогая совпадающие
+    user.skill_links = [link for link in user.skill_links if link.skill_id in skill_ids] + [
+        UserSkill(skill_id=skill_id) for skill_id in skill_ids - current_ids
+    ]
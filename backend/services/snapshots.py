@@ -0,0 +1,152 @@
+"""
+services/snapshots.py — история аналитики хакатонов (снимки счётчиков во времени)
+
+Фоновая задача периодически копирует счётчики из hackathon_stats в hackathon_stats_history —
+только для хакатонов, у которых счётчики изменились с последнего снимка, поэтому живые
+таблицы участников и команд не сканируются. Сырые снимки старше ANALYTICS_HISTORY_RAW_HOURS
+прореживаются до одного в час (остаётся последний снимок часа), история старше
+ANALYTICS_HISTORY_RETENTION_DAYS удаляется.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from config import get_settings
+from database import SessionLocal
+from models import HackathonStats, HackathonStatsSnapshot
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Шаг прореженной истории (секунды)
+DOWNSAMPLE_STEP = 3600
+
+# Сколько id удалять за один запрос (лимит параметров SQLite)
+DELETE_BATCH_SIZE = 500
+
+
+def take_snapshots(db: Session, now: datetime) -> int:
+    """Записать снимки хакатонов, чьи счётчики изменились с последнего снимка (без commit)"""
+    last = db.query(
+        HackathonStatsSnapshot.hackathon_id,
+        func.max(HackathonStatsSnapshot.taken_at).label("taken_at")
+    ).group_by(HackathonStatsSnapshot.hackathon_id).subquery()
+
+    changed = db.query(HackathonStats).outerjoin(
+        last,
+        last.c.hackathon_id == HackathonStats.hackathon_id
+    ).filter(or_(last.c.taken_at.is_(None), HackathonStats.updated_at > last.c.taken_at)).all()
+
+    db.add_all([
+        HackathonStatsSnapshot(
+            hackathon_id=stats.hackathon_id,
+            taken_at=now,
+            resolution=0,
+            total_participants=stats.total_participants,
+            participants_in_team=stats.participants_in_team,
+            total_teams=stats.total_teams
+        )
+        for stats in changed
+    ])
+    return len(changed)
+
+
+def _delete_snapshots(db: Session, ids: list):
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        db.query(HackathonStatsSnapshot).filter(
+            HackathonStatsSnapshot.id.in_(ids[start:start + DELETE_BATCH_SIZE])
+        ).delete(synchronize_session=False)
+
+
+def downsample_history(db: Session, now: datetime, raw_hours: int) -> int:
+    """
+    Проредить сырые снимки старше raw_hours до одного на час (без commit).
+    Граница выравнивается по часу, чтобы прореживать только завершённые часы.
+    """
+    cutoff = (now - timedelta(hours=raw_hours)).replace(minute=0, second=0, microsecond=0)
+
+    rows = db.query(
+        HackathonStatsSnapshot.id,
+        HackathonStatsSnapshot.hackathon_id,
+        HackathonStatsSnapshot.taken_at
+    ).filter(
+        HackathonStatsSnapshot.resolution == 0,
+        HackathonStatsSnapshot.taken_at < cutoff
+    ).order_by(HackathonStatsSnapshot.hackathon_id, HackathonStatsSnapshot.taken_at).all()
+
+    # Последний снимок каждого часа остаётся, остальные удаляются
+    keep = {}
+    for row in rows:
+        bucket = (row.hackathon_id, row.taken_at.replace(minute=0, second=0, microsecond=0))
+        keep[bucket] = row.id
+    keep_ids = set(keep.values())
+    drop_ids = [row.id for row in rows if row.id not in keep_ids]
+
+    if keep_ids:
+        db.query(HackathonStatsSnapshot).filter(
+            HackathonStatsSnapshot.id.in_(list(keep_ids))
+        ).update({HackathonStatsSnapshot.resolution: DOWNSAMPLE_STEP}, synchronize_session=False)
+    _delete_snapshots(db, drop_ids)
+    return len(drop_ids)
+
+
+def apply_retention(db: Session, now: datetime, retention_days: int) -> int:
+    """Удалить историю старше retention_days (0 — хранить бессрочно, без commit)"""
+    if retention_days <= 0:
+        return 0
+    return db.query(HackathonStatsSnapshot).filter(
+        HackathonStatsSnapshot.taken_at < now - timedelta(days=retention_days)
+    ).delete(synchronize_session=False)
+
+
+def run_snapshot_cycle() -> dict:
+    """Один цикл: снимки, прореживание и очистка старой истории"""
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        result = {
+            "snapshots": take_snapshots(db, now),
+            "downsampled": downsample_history(db, now, settings.ANALYTICS_HISTORY_RAW_HOURS),
+            "expired": apply_retention(db, now, settings.ANALYTICS_HISTORY_RETENTION_DAYS),
+        }
+        db.commit()
+        return result
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def run_snapshotter(interval: int):
+    """Фоновая задача: цикл снимков раз в interval секунд (работа с БД — в пуле потоков)"""
+    from anyio import to_thread
+
+    while True:
+        try:
+            result = await to_thread.run_sync(run_snapshot_cycle)
+            if any(result.values()):
+                logger.info(f"📈 Analytics history: {result}")
+        except Exception as e:
+            logger.error(f"❌ Analytics snapshot failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def get_stats_history(db: Session, hackathon_id: int, since: datetime, until: datetime) -> list:
+    """
+    Снимки хакатона за период по возрастанию времени. Снимки пишутся только при
+    изменениях, поэтому первым идёт последний снимок до начала периода — значение на его начало.
+    """
+    previous = db.query(HackathonStatsSnapshot).filter(
+        HackathonStatsSnapshot.hackathon_id == hackathon_id,
+        HackathonStatsSnapshot.taken_at < since
+    ).order_by(HackathonStatsSnapshot.taken_at.desc()).first()
+
+    points = db.query(HackathonStatsSnapshot).filter(
+        HackathonStatsSnapshot.hackathon_id == hackathon_id,
+        HackathonStatsSnapshot.taken_at >= since,
+        HackathonStatsSnapshot.taken_at <= until
+    ).order_by(HackathonStatsSnapshot.taken_at).all()
+
+    return ([previous] if previous else []) + points
@@ -0,0 +1,230 @@
+"""
+services/stats.py — инкрементальные счётчики аналитики хакатонов
+
+Счётчики (hackathon_stats, hackathon_stat_buckets) обновляются дельтами в тех же
+транзакциях, что и регистрация, создание команд, вступление/выход и правка профиля,
+поэтому чтение аналитики — O(1). Если строки счётчиков ещё нет, она пересчитывается
+с нуля по текущим данным. Строки создаются upsert'ом (INSERT ... ON CONFLICT), чтобы
+параллельные запросы не падали на первичном ключе. Проверка расхождений: python check_stats.py
+"""
+from datetime import datetime
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from database import dialect_insert
+from models import HackathonStats, HackathonStatBucket, Skill, Team, User, UserHackathon, UserSkill
+from services.skills import normalize_skills
+
+EXPERIENCE = "experience"
+SKILL = "skill"
+
+
+def _bucket_key(value) -> str:
+    return value if value is not None else ""
+
+
+def compute_hackathon_stats(db: Session, hackathon_id: int) -> dict:
+    """Посчитать аналитику хакатона с нуля агрегатными запросами"""
+
+    # Участники: всего и в командах (COUNT(team_id) не учитывает NULL)
+    total_participants, participants_in_team = db.query(
+        func.count(UserHackathon.id),
+        func.count(UserHackathon.team_id)
+    ).filter(UserHackathon.hackathon_id == hackathon_id).one()
+
+    # Команды
+    total_teams = db.query(func.count(Team.id)).filter(Team.hackathon_id == hackathon_id).scalar()
+
+    # Распределение по уровню опыта
+    experience_distribution = dict(db.query(
+        User.experience_level, func.count(User.id)
+    ).join(
+        UserHackathon,
+        User.id == UserHackathon.user_id
+    ).filter(UserHackathon.hackathon_id == hackathon_id).group_by(User.experience_level).all())
+
+    # Частота навыков по нормализованной таблице user_skills
+    skills_frequency = dict(db.query(
+        Skill.name, func.count(UserSkill.user_id)
+    ).join(
+        UserSkill,
+        UserSkill.skill_id == Skill.id
+    ).join(
+        UserHackathon,
+        UserHackathon.user_id == UserSkill.user_id
+    ).filter(UserHackathon.hackathon_id == hackathon_id).group_by(Skill.name).all())
+
+    return {
+        "total_participants": total_participants,
+        "participants_in_team": participants_in_team,
+        "total_teams": total_teams,
+        "experience_distribution": experience_distribution,
+        "skills_frequency": skills_frequency,
+    }
+
+
+def rebuild_hackathon_stats(db: Session, hackathon_id: int) -> dict:
+    """Пересчитать и сохранить счётчики хакатона (без commit)"""
+    db.flush()
+    computed = compute_hackathon_stats(db, hackathon_id)
+
+    values = {
+        "total_participants": computed["total_participants"],
+        "participants_in_team": computed["participants_in_team"],
+        "total_teams": computed["total_teams"],
+        "updated_at": datetime.utcnow(),
+    }
+    db.execute(
+        dialect_insert(db, HackathonStats).values(hackathon_id=hackathon_id, **values)
+        .on_conflict_do_update(index_elements=["hackathon_id"], set_=values)
+    )
+
+    db.query(HackathonStatBucket).filter(HackathonStatBucket.hackathon_id == hackathon_id).delete()
+    rows = [
+        {"hackathon_id": hackathon_id, "kind": EXPERIENCE, "key": _bucket_key(level), "count": count}
+        for level, count in computed["experience_distribution"].items()
+    ] + [
+        {"hackathon_id": hackathon_id, "kind": SKILL, "key": name, "count": count}
+        for name, count in computed["skills_frequency"].items()
+    ]
+    if rows:
+        insert = dialect_insert(db, HackathonStatBucket)
+        db.execute(insert.on_conflict_do_update(
+            index_elements=["hackathon_id", "kind", "key"],
+            set_={"count": insert.excluded.count}
+        ), rows)
+    # Загруженные ранее объекты счётчиков устарели после upsert
+    for obj in list(db.identity_map.values()):
+        if isinstance(obj, (HackathonStats, HackathonStatBucket)):
+            db.expire(obj)
+    return computed
+
+
+def _ensure_stats(db: Session, hackathon_id: int) -> bool:
+    """
+    Проверить, что счётчики хакатона есть. Если нет — пересчитать их по текущим
+    (уже сброшенным в БД) данным и вернуть False: дельту применять не нужно.
+
+    Строка создаётся через INSERT ... ON CONFLICT DO NOTHING: из параллельных запросов
+    пересчёт выполняет тот, чья вставка прошла, а остальные дожидаются его commit
+    и применяют свою дельту поверх.
+    """
+    db.flush()
+    if db.query(HackathonStats.hackathon_id).filter(HackathonStats.hackathon_id == hackathon_id).first():
+        return True
+    inserted = db.execute(
+        dialect_insert(db, HackathonStats).values(
+            hackathon_id=hackathon_id, total_participants=0, participants_in_team=0, total_teams=0,
+            updated_at=datetime.utcnow()
+        ).on_conflict_do_nothing(index_elements=["hackathon_id"])
+    ).rowcount
+    if not inserted:
+        return True
+    rebuild_hackathon_stats(db, hackathon_id)
+    return False
+
+
+def _apply_bucket_deltas(db: Session, hackathon_id: int, deltas: list):
+    """Применить изменения распределений: [(kind, key, delta), ...]"""
+    for kind, key, delta in deltas:
+        if not delta:
+            continue
+        db.execute(
+            dialect_insert(db, HackathonStatBucket).values(
+                hackathon_id=hackathon_id, kind=kind, key=_bucket_key(key), count=delta
+            ).on_conflict_do_update(
+                index_elements=["hackathon_id", "kind", "key"],
+                set_={"count": HackathonStatBucket.count + delta}
+            )
+        )
+
+
+def apply_stats_delta(
+    db: Session,
+    hackathon_id: int,
+    participants: int = 0,
+    in_team: int = 0,
+    teams: int = 0,
+    buckets: list = ()
+):
+    """Применить изменения счётчиков хакатона в текущей транзакции (вызывать после изменения данных)"""
+    if not _ensure_stats(db, hackathon_id):
+        return
+
+    if participants or in_team or teams:
+        db.execute(
+            update(HackathonStats).where(HackathonStats.hackathon_id == hackathon_id).values(
+                total_participants=HackathonStats.total_participants + participants,
+                participants_in_team=HackathonStats.participants_in_team + in_team,
+                total_teams=HackathonStats.total_teams + teams,
+                updated_at=datetime.utcnow()
+            )
+        )
+    _apply_bucket_deltas(db, hackathon_id, list(buckets))
+
+
+def _user_buckets(user: User, delta: int) -> list:
+    return [(EXPERIENCE, user.experience_level, delta)] + [
+        (SKILL, name, delta) for name in normalize_skills(user.get_skills())
+    ]
+
+
+def on_participant_registered(db: Session, hackathon_id: int, user: User, in_team: bool = False):
+    """Пользователь зарегистрировался на хакатон (in_team — сразу в команде)"""
+    apply_stats_delta(
+        db, hackathon_id,
+        participants=1,
+        in_team=1 if in_team else 0,
+        buckets=_user_buckets(user, 1)
+    )
+
+
+def on_profile_changed(db: Session, user: User, old_experience: str, old_skills: list):
+    """Пользователь изменил уровень опыта или навыки — обновить распределения его хакатонов"""
+    old_names = normalize_skills(old_skills)
+    new_names = normalize_skills(user.get_skills())
+
+    deltas = [(SKILL, name, 1) for name in new_names - old_names] + \
+             [(SKILL, name, -1) for name in old_names - new_names]
+    if old_experience != user.experience_level:
+        deltas += [(EXPERIENCE, old_experience, -1), (EXPERIENCE, user.experience_level, 1)]
+    if not deltas:
+        return
+
+    hackathon_ids = [row.hackathon_id for row in db.query(UserHackathon.hackathon_id).filter(UserHackathon.user_id == user.id)]
+    for hackathon_id in hackathon_ids:
+        apply_stats_delta(db, hackathon_id, buckets=deltas)
+
+
+def get_hackathon_stats(db: Session, hackathon_id: int) -> dict:
+    """Прочитать счётчики хакатона (если их нет — пересчитать и сохранить)"""
+    stats = db.query(HackathonStats).filter(HackathonStats.hackathon_id == hackathon_id).first()
+    if not stats:
+        computed = rebuild_hackathon_stats(db, hackathon_id)
+        db.commit()
+        return computed
+
+    buckets = db.query(HackathonStatBucket).filter(
+        HackathonStatBucket.hackathon_id == hackathon_id,
+        HackathonStatBucket.count != 0
+    ).all()
+
+    return {
+        "total_participants": stats.total_participants,
+        "participants_in_team": stats.participants_in_team,
+        "total_teams": stats.total_teams,
+        "experience_distribution": {
+            (b.key or None): b.count for b in buckets if b.kind == EXPERIENCE
+        },
+        "skills_frequency": {b.key: b.count for b in buckets if b.kind == SKILL},
+    }
+
+
+def check_hackathon_stats(db: Session, hackathon_id: int) -> dict:
+    """Сравнить сохранённые счётчики с пересчитанными с нуля: {поле: (сохранено, факт)}"""
+    stored = get_hackathon_stats(db, hackathon_id)
+    actual = compute_hackathon_stats(db, hackathon_id)
+    return {
+        field: (stored[field], actual[field])
+        for field in actual
+        if stored[field] != actual[field]
+    }
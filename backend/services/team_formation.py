@@ -0,0 +1,196 @@
+"""
+services/team_formation.py — автоматическое распределение участников без команды
+
+Жадный алгоритм за O(n log n):
+1. Участники без команды раскладываются по корзинам ролей (role_preference),
+   внутри корзины сортируются по набору навыков — похожие профили оказываются рядом.
+2. Открытые команды (с наименьшим числом участников — первыми) добираются до
+   max_team_size: сначала недостающими ролями, затем из самой большой корзины.
+3. Оставшиеся участники раздаются в новые команды «змейкой» по корзинам ролей
+   (0, 1, …, k-1, k-1, …, 0, …): каждая роль делится между командами поровну,
+   размеры команд отличаются не больше чем на одного человека.
+"""
+import math
+from collections import defaultdict, deque
+from sqlalchemy.orm import Session
+from models import Hackathon, Team, TeamMember, User, UserHackathon, UserSkill
+from services.stats import apply_stats_delta
+
+EXPERIENCE_ORDER = {"senior": 0, "middle": 1, "junior": 2}
+
+
+class TeamPlan:
+    """План для одной команды: существующей (team_id задан) или новой"""
+    
+    def __init__(self, team_id, name, member_ids, captain_id=None):
+        self.team_id = team_id
+        self.name = name
+        self.member_ids = member_ids  # только добавляемые участники
+        self.captain_id = captain_id  # для новых команд
+        self.is_new = team_id is None
+
+
+def _load_participants(db: Session, hackathon_id: int) -> dict:
+    """Участники хакатона без команды: {user_id: (role, experience, skills)}"""
+    rows = db.query(User.id, User.role_preference, User.experience_level).join(
+        UserHackathon, UserHackathon.user_id == User.id
+    ).filter(
+        UserHackathon.hackathon_id == hackathon_id,
+        UserHackathon.team_id == None
+    ).all()
+    
+    skills = defaultdict(list)
+    links = db.query(UserSkill.user_id, UserSkill.skill_id).join(
+        UserHackathon, UserHackathon.user_id == UserSkill.user_id
+    ).filter(
+        UserHackathon.hackathon_id == hackathon_id,
+        UserHackathon.team_id == None
+    ).all()
+    for user_id, skill_id in links:
+        skills[user_id].append(skill_id)
+    
+    return {
+        row.id: (row.role_preference, row.experience_level, tuple(sorted(skills[row.id])))
+        for row in rows
+    }
+
+
+def _make_buckets(participants: dict) -> dict:
+    """Корзины по ролям; внутри — по навыкам и id (детерминированно)"""
+    buckets = defaultdict(list)
+    for user_id, (role, _, skills) in participants.items():
+        buckets[role].append(user_id)
+    return {
+        role: deque(sorted(user_ids, key=lambda uid: (participants[uid][2], uid)))
+        for role, user_ids in buckets.items()
+    }
+
+
+def _snake_draft(buckets: dict, team_count: int) -> list:
+    """
+    Раздать участников в team_count групп змейкой: корзины ролей подряд (самые большие —
+    первыми), порядок групп 0..k-1, затем k-1..0. Каждая группа получает долю каждой роли.
+    """
+    groups = [[] for _ in range(team_count)]
+    queues = sorted(buckets.items(), key=lambda item: (-len(item[1]), str(item[0])))
+    position = 0
+    for _, queue in queues:
+        for user_id in queue:
+            lap, offset = divmod(position, team_count)
+            groups[offset if lap % 2 == 0 else team_count - 1 - offset].append(user_id)
+            position += 1
+    return groups
+
+
+def _free_team_names(db: Session, hackathon_id: int):
+    """Имена «Команда N», ещё не занятые в хакатоне, по возрастанию N"""
+    taken = {name for (name,) in db.query(Team.name).filter(Team.hackathon_id == hackathon_id)}
+    number = 1
+    while True:
+        name = f"Команда {number}"
+        if name not in taken:
+            yield name
+        number += 1
+
+
+def plan_team_formation(db: Session, hackathon: Hackathon, min_team_size: int = 2) -> tuple:
+    """
+    Построить план распределения без изменений в БД.
+    Возвращает (список TeamPlan, список id участников, оставшихся без команды).
+    """
+    participants = _load_participants(db, hackathon.id)
+    buckets = _make_buckets(participants)
+    max_size = hackathon.max_team_size
+    plans = []
+    
+    # 1. Добираем открытые команды
+    teams = db.query(Team).filter(Team.hackathon_id == hackathon.id, Team.status == "open").all()
+    member_rows = db.query(TeamMember.team_id, User.role_preference).join(
+        User, User.id == TeamMember.user_id
+    ).join(Team, Team.id == TeamMember.team_id).filter(
+        Team.hackathon_id == hackathon.id, Team.status == "open"
+    ).all()
+    team_roles = defaultdict(list)
+    for team_id, role in member_rows:
+        team_roles[team_id].append(role)
+    
+    for team in sorted(teams, key=lambda t: (len(team_roles[t.id]), t.id)):
+        free = max_size - len(team_roles[team.id])
+        added = []
+        present = set(team_roles[team.id])
+        
+        # Сначала роли, которых в команде ещё нет
+        for role in sorted((r for r in buckets if r not in present and r is not None and buckets[r])):
+            if len(added) >= free:
+                break
+            added.append(buckets[role].popleft())
+        
+        # Затем — из самых больших корзин
+        while len(added) < free:
+            role = max(buckets, key=lambda r: len(buckets[r]), default=None)
+            if role is None or not buckets[role]:
+                break
+            added.append(buckets[role].popleft())
+        
+        if added:
+            plans.append(TeamPlan(team.id, team.name, added))
+    
+    # 2. Формируем новые команды из оставшихся
+    remaining_count = sum(len(queue) for queue in buckets.values())
+    unassigned = []
+    if remaining_count >= min_team_size:
+        groups = _snake_draft(buckets, math.ceil(remaining_count / max_size))
+        
+        # Капитан — не капитан другой команды этого хакатона, с наибольшим опытом
+        captains = {row.captain_id for row in db.query(Team.captain_id).filter(Team.hackathon_id == hackathon.id)}
+        names = _free_team_names(db, hackathon.id)
+        for group in groups:
+            if len(group) < min_team_size:
+                unassigned.extend(group)
+                continue
+            candidates = [uid for uid in group if uid not in captains] or group
+            captain_id = min(candidates, key=lambda uid: (EXPERIENCE_ORDER.get(participants[uid][1], 3), uid))
+            plans.append(TeamPlan(None, next(names), group, captain_id))
+    else:
+        unassigned = [uid for queue in buckets.values() for uid in queue]
+    
+    return plans, unassigned
+
+
+def apply_team_formation(db: Session, hackathon: Hackathon, plans: list):
+    """Применить план одной транзакцией"""
+    user_ids = [uid for plan in plans for uid in plan.member_ids]
+    registrations = {
+        r.user_id: r for r in db.query(UserHackathon).filter(
+            UserHackathon.hackathon_id == hackathon.id,
+            UserHackathon.user_id.in_(user_ids),
+            UserHackathon.team_id == None
+        ).with_for_update().all()
+    } if user_ids else {}
+    
+    if len(registrations) != len(user_ids):
+        # Кто-то из участников уже попал в команду между планированием и применением
+        db.rollback()
+        raise ValueError("Participants changed during team formation, please retry")
+    
+    try:
+        # Создаём все новые команды одним flush, чтобы получить их ID
+        new_teams = [
+            (plan, Team(hackathon_id=hackathon.id, name=plan.name, captain_id=plan.captain_id))
+            for plan in plans if plan.is_new
+        ]
+        db.add_all([team for _, team in new_teams])
+        db.flush()
+        for plan, team in new_teams:
+            plan.team_id = team.id
+        
+        for plan in plans:
+            db.add_all([TeamMember(team_id=plan.team_id, user_id=uid) for uid in plan.member_ids])
+            for uid in plan.member_ids:
+                registrations[uid].team_id = plan.team_id
+        
+        apply_stats_delta(db, hackathon.id, in_team=len(user_ids), teams=len(new_teams))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
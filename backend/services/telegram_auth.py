@@ -1,46 +1,29 @@
-import secrets
-import string
-from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from models import AuthCode, User
+from models import User
+from services.auth_codes import get_auth_code_store
 from config import get_settings
 
 settings = get_settings()
 
 
-def generate_code() -> str:
-    """Генерирует 6-значный код"""
-    return ''.join(secrets.choice(string.digits) for _ in range(6))
-
-
 def create_auth_code(
     telegram_id: str,
-    telegram_username: str | None,
-    db: Session
+    telegram_username: str | None
 ) -> str:
-    """Создаёт код авторизации"""
+    """Создаёт код авторизации (в хранилище кодов, без записи в БД)"""
     import logging
     logger = logging.getLogger(__name__)
     
-    # Генерируем код
-    code = generate_code()
-    
-    # Вычисляем время истечения
-    expires_at = datetime.utcnow() + timedelta(minutes=settings.CODE_EXPIRY_MINUTES)
-    
-    # Создаём запись в БД
-    auth_code = AuthCode(
-        code=code,
-        telegram_id=telegram_id,
-        telegram_username=telegram_username or f"user_{telegram_id}",
-        expires_at=expires_at
+    ttl_seconds = settings.CODE_EXPIRY_MINUTES * 60
+    code = get_auth_code_store().issue(
+        {
+            "telegram_id": telegram_id,
+            "telegram_username": telegram_username or f"user_{telegram_id}"
+        },
+        ttl_seconds
     )
     
-    db.add(auth_code)
-    db.commit()
-    db.refresh(auth_code)
-    
-    logger.info(f"Auth code created: code={code}, telegram_id={telegram_id}, expires_at={expires_at}")
+    logger.info(f"Auth code created: code={code}, telegram_id={telegram_id}, ttl={ttl_seconds}s")
     
     return code
 
@@ -50,29 +33,22 @@ def verify_auth_code(code: str, db: Session) -> dict | None:
     import logging
     logger = logging.getLogger(__name__)
     
-    # Ищем код в БД
-    auth_code = db.query(AuthCode).filter(AuthCode.code == code).first()
+    # Код одноразовый: хранилище удаляет его при чтении
+    auth_code = get_auth_code_store().consume(code)
     
     if not auth_code:
-        logger.warning(f"Auth code not found: {code}")
-        return None  # Код не найден
-    
-    if not auth_code.is_valid():
-        logger.warning(f"Auth code invalid - is_used: {auth_code.is_used}, is_expired: {auth_code.is_expired()}, expires_at: {auth_code.expires_at}")
-        return None  # Код истек или уже использован
-    
-    # Помечаем код как использованный
-    auth_code.is_used = True
+        logger.warning(f"Auth code not found, expired or already used: {code}")
+        return None
     
     # Ищем или создаём пользователя
-    user = db.query(User).filter(User.telegram_id == auth_code.telegram_id).first()
+    user = db.query(User).filter(User.telegram_id == auth_code["telegram_id"]).first()
     
     if not user:
         # Создаём нового пользователя
         user = User(
-            telegram_id=auth_code.telegram_id,
-            telegram_username=auth_code.telegram_username,
-            full_name=auth_code.telegram_username or f"User_{auth_code.telegram_id}"
+            telegram_id=auth_code["telegram_id"],
+            telegram_username=auth_code["telegram_username"],
+            full_name=auth_code["telegram_username"] or f"User_{auth_code['telegram_id']}"
         )
         db.add(user)
     
@@ -82,5 +58,6 @@ def verify_auth_code(code: str, db: Session) -> dict | None:
         "user_id": user.id,
         "telegram_id": user.telegram_id,
         "telegram_username": user.telegram_username,
-        "full_name": user.full_name
+        "full_name": user.full_name,
+        "token_version": user.token_version
     }
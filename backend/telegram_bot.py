@@ -1,7 +1,13 @@
+import asyncio
+import math
 import os
-import requests
+import random
+import re
+import secrets
+import httpx
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, ContextTypes
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response
 from dotenv import load_dotenv
 from config import get_settings
 
@@ -12,20 +18,141 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN") or settings.TELEGRAM_BOT_TO
 BACKEND_URL = os.getenv("BACKEND_URL") or settings.BACKEND_URL
 FRONTEND_URL = os.getenv("FRONTEND_URL") or settings.FRONTEND_URL
 
-# Проверка обязательных переменных
-if not TELEGRAM_BOT_TOKEN:
-    print("❌ ОШИБКА: TELEGRAM_BOT_TOKEN не установлен!")
-    print("Установите переменную окружения TELEGRAM_BOT_TOKEN")
-    exit(1)
+GENERATE_CODE_PATH = "/api/auth/telegram/generate-code"
 
-if not BACKEND_URL:
-    print("❌ ОШИБКА: BACKEND_URL не установлен!")
-    print("Установите переменную окружения BACKEND_URL")
-    exit(1)
+# Допустимый secret_token для setWebhook: 1-256 символов A-Z, a-z, 0-9, _ и -
+WEBHOOK_SECRET_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,256}")
 
-print(f"✅ TELEGRAM_BOT_TOKEN: {'*' * 20}...{TELEGRAM_BOT_TOKEN[-5:] if len(TELEGRAM_BOT_TOKEN) > 5 else '***'}")
-print(f"✅ BACKEND_URL: {BACKEND_URL}")
-print(f"✅ FRONTEND_URL: {FRONTEND_URL}")
+
+def get_webhook_config_errors() -> list:
+    """Ошибки настроек webhook (отдельный процесс BOT_MODE=webhook и BOT_WEBHOOK_IN_API)"""
+    errors = []
+    if not TELEGRAM_BOT_TOKEN:
+        errors.append("TELEGRAM_BOT_TOKEN не установлен")
+    webhook_url = settings.TELEGRAM_WEBHOOK_URL.strip()
+    if not webhook_url:
+        errors.append("TELEGRAM_WEBHOOK_URL не установлен (публичный https адрес backend)")
+    elif not webhook_url.startswith("https://"):
+        errors.append("TELEGRAM_WEBHOOK_URL должен начинаться с https:// (Telegram не шлёт webhook по http)")
+    if not settings.TELEGRAM_WEBHOOK_PATH.startswith("/"):
+        errors.append("TELEGRAM_WEBHOOK_PATH должен начинаться с /")
+    # Без секрета обновление от имени любого пользователя может прислать кто угодно
+    if not settings.TELEGRAM_WEBHOOK_SECRET:
+        errors.append("TELEGRAM_WEBHOOK_SECRET не установлен (сгенерируйте: openssl rand -hex 32)")
+    elif not WEBHOOK_SECRET_PATTERN.fullmatch(settings.TELEGRAM_WEBHOOK_SECRET):
+        errors.append("TELEGRAM_WEBHOOK_SECRET: допустимы 1-256 символов A-Z, a-z, 0-9, _ и -")
+    return errors
+
+
+def check_config():
+    """Проверка обязательных переменных (модуль импортируется и из main.py, поэтому не при импорте)"""
+    if not TELEGRAM_BOT_TOKEN:
+        print("❌ ОШИБКА: TELEGRAM_BOT_TOKEN не установлен!")
+        print("Установите переменную окружения TELEGRAM_BOT_TOKEN")
+        exit(1)
+    
+    if settings.BOT_AUTH_CODE_MODE == "local" and settings.AUTH_CODE_STORE != "redis":
+        # Коды из памяти этого процесса backend не увидит
+        print("❌ ОШИБКА: BOT_AUTH_CODE_MODE=local в отдельном процессе бота требует AUTH_CODE_STORE=redis")
+        print("Либо включите BOT_WEBHOOK_IN_API=true, чтобы бот работал внутри backend")
+        exit(1)
+    
+    if not BACKEND_URL:
+        print("❌ ОШИБКА: BACKEND_URL не установлен!")
+        print("Установите переменную окружения BACKEND_URL")
+        exit(1)
+    
+    if settings.BOT_MODE == "webhook":
+        errors = get_webhook_config_errors()
+        for error in errors:
+            print(f"❌ ОШИБКА: {error}")
+        if errors:
+            exit(1)
+    
+    print(f"✅ TELEGRAM_BOT_TOKEN: {'*' * 20}...{TELEGRAM_BOT_TOKEN[-5:] if len(TELEGRAM_BOT_TOKEN) > 5 else '***'}")
+    print(f"✅ BACKEND_URL: {BACKEND_URL}")
+    print(f"✅ FRONTEND_URL: {FRONTEND_URL}")
+
+# Общий HTTP клиент к backend (keep-alive пул), создаётся при старте приложения бота
+http_client: httpx.AsyncClient | None = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """HTTP клиент к backend с пулом соединений и таймаутами из настроек"""
+    return httpx.AsyncClient(
+        base_url=BACKEND_URL,
+        timeout=httpx.Timeout(settings.BOT_HTTP_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=settings.BOT_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.BOT_HTTP_MAX_CONNECTIONS
+        )
+    )
+
+
+async def post_init(application: Application):
+    global http_client
+    http_client = create_http_client()
+
+
+async def post_shutdown(application: Application):
+    if http_client:
+        await http_client.aclose()
+
+
+async def backend_post(path: str, params: dict) -> httpx.Response:
+    """
+    POST на backend с повторами при сетевых ошибках и ответах 5xx.
+    Пауза растёт экспоненциально (BOT_HTTP_BACKOFF_SECONDS * 2^попытка) со случайным разбросом
+    """
+    retries = settings.BOT_HTTP_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            response = await http_client.post(path, params=params)
+            if response.status_code < 500 or attempt == retries:
+                return response
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+        delay = settings.BOT_HTTP_BACKOFF_SECONDS * 2 ** attempt
+        await asyncio.sleep(random.uniform(delay / 2, delay))
+
+
+async def issue_code_local(telegram_id: str, telegram_username: str) -> tuple[str | None, int]:
+    """Выдать код через services.telegram_auth без HTTP запроса, с теми же лимитами, что у эндпоинта"""
+    from services.rate_limit import check_rate_limit
+    from services.telegram_auth import create_auth_code
+    
+    retry_after = await check_rate_limit("POST", GENERATE_CODE_PATH, telegram_id=telegram_id)
+    if retry_after > 0:
+        return None, math.ceil(retry_after)
+    
+    if settings.AUTH_CODE_STORE == "memory":
+        # Словарь в памяти — микросекунды, поток не нужен
+        return create_auth_code(telegram_id, telegram_username), 0
+    
+    from anyio import to_thread
+    return await to_thread.run_sync(create_auth_code, telegram_id, telegram_username), 0
+
+
+async def issue_code(telegram_id: str, telegram_username: str) -> tuple[str | None, int]:
+    """
+    Код авторизации: (код, 0) или (None, через сколько секунд повторить) при превышении лимита.
+    BOT_AUTH_CODE_MODE=local — в процессе, иначе POST на backend
+    """
+    if settings.BOT_AUTH_CODE_MODE == "local":
+        return await issue_code_local(telegram_id, telegram_username)
+    
+    response = await backend_post(
+        GENERATE_CODE_PATH,
+        params={
+            "telegram_id": telegram_id,
+            "telegram_username": telegram_username
+        }
+    )
+    if response.status_code == 429:
+        return None, int(response.headers.get("Retry-After", "60"))
+    response.raise_for_status()
+    return response.json().get("code"), 0
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -37,22 +164,13 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     telegram_username = user.username or f"user_{user.id}"
     
     try:
-        # Отправляем запрос на backend чтобы получить код
-        response = requests.post(
-            f"{BACKEND_URL}/api/auth/telegram/generate-code",
-            params={
-                "telegram_id": telegram_id,
-                "telegram_username": telegram_username
-            }
-        )
+        # Получаем код (в процессе или запросом на backend)
+        code, retry_after = await issue_code(telegram_id, telegram_username)
         
-        if response.status_code != 200:
-            await update.message.reply_text("❌ Ошибка сервера. Попробуйте позже. Пожалуйста")
+        if code is None:
+            await update.message.reply_text(f"⏳ Слишком много запросов. Попробуйте через {retry_after} сек.")
             return
         
-        data = response.json()
-        code = data.get("code")
-        
         # Отправляем сообщение с кодом
         message = (
             f"🔐 Ваш код авторизации:\n\n"
@@ -67,6 +185,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             parse_mode="HTML"
         )
         
+    except httpx.HTTPStatusError:
+        await update.message.reply_text("❌ Ошибка сервера. Попробуйте позже. Пожалуйста")
+    
     except Exception as e:
         print(f"❌ Ошибка при обработке команды /start: {e}")
         import traceback
@@ -87,16 +208,116 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(help_text)
 
 
+def build_application(webhook: bool = False) -> Application:
+    """
+    Создать приложение бота с обработчиками команд.
+    Обновления обрабатываются параллельно, не более BOT_CONCURRENT_UPDATES одновременно.
+    webhook=True — без Updater: обновления приходят через create_webhook_router
+    """
+    builder = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(settings.BOT_CONCURRENT_UPDATES)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    if webhook:
+        builder = builder.updater(None)
+    application = builder.build()
+    
+    # Добавляем обработчики команд
+    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("help", help_command))
+    
+    return application
+
+
+# ════════════════════════════════════════════
+# WEBHOOK: в составе FastAPI (main.py) или отдельным сервером
+# ════════════════════════════════════════════
+
+def create_webhook_router(application: Application) -> APIRouter:
+    """Роутер, принимающий обновления от Telegram и ставящий их в очередь приложения бота"""
+    router = APIRouter(tags=["telegram"])
+    
+    @router.post(settings.TELEGRAM_WEBHOOK_PATH, include_in_schema=False)
+    async def telegram_webhook(request: Request):
+        # Telegram передаёт secret_token, указанный в setWebhook (без секрета webhook не запускается)
+        secret = settings.TELEGRAM_WEBHOOK_SECRET
+        received = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not secret or not secrets.compare_digest(received.encode(), secret.encode()):
+            raise HTTPException(status_code=403, detail="Invalid webhook secret")
+        
+        try:
+            data = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON")
+        if not isinstance(data, dict):
+            raise HTTPException(status_code=400, detail="Invalid update")
+        try:
+            update = Update.de_json(data, application.bot)
+        except Exception:
+            # Тело не от Telegram: разбор может упасть с любой ошибкой типов
+            raise HTTPException(status_code=400, detail="Invalid update")
+        
+        # Отвечаем сразу: обработка идёт в приложении бота с ограниченной параллельностью
+        await application.update_queue.put(update)
+        return Response(status_code=200)
+    
+    return router
+
+
+async def start_webhook(application: Application):
+    """Запустить приложение бота и зарегистрировать webhook в Telegram"""
+    await application.initialize()
+    await post_init(application)  # run_polling/run_webhook вызывают его сами, здесь — вручную
+    await application.start()
+    await application.bot.set_webhook(
+        url=settings.TELEGRAM_WEBHOOK_URL.strip().rstrip("/") + settings.TELEGRAM_WEBHOOK_PATH,
+        secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+        max_connections=min(100, settings.BOT_CONCURRENT_UPDATES),
+        allowed_updates=Update.ALL_TYPES
+    )
+    print(f"🤖 Webhook установлен: {settings.TELEGRAM_WEBHOOK_URL.strip().rstrip('/')}{settings.TELEGRAM_WEBHOOK_PATH}")
+
+
+async def stop_webhook(application: Application):
+    """Остановить приложение бота (webhook в Telegram не снимается, чтобы не терять обновления при рестарте)"""
+    await application.stop()
+    await post_shutdown(application)
+    await application.shutdown()
+
+
+def create_webhook_app() -> FastAPI:
+    """Отдельное FastAPI приложение только с webhook бота (BOT_MODE=webhook)"""
+    application = build_application(webhook=True)
+    webhook_app = FastAPI(title="Telegram Bot Webhook", docs_url=None, redoc_url=None)
+    webhook_app.include_router(create_webhook_router(application))
+    
+    @webhook_app.on_event("startup")
+    async def startup():
+        await start_webhook(application)
+    
+    @webhook_app.on_event("shutdown")
+    async def shutdown():
+        await stop_webhook(application)
+    
+    return webhook_app
+
+
 def main():
-    """Главная функция для запуска бота"""
+    """Главная функция для запуска бота (BOT_MODE: polling или webhook)"""
+    check_config()
     try:
+        if settings.BOT_MODE == "webhook":
+            import uvicorn
+            print(f"🤖 Бот запущен в режиме webhook на порту {settings.BOT_WEBHOOK_PORT}...")
+            uvicorn.run(create_webhook_app(), host="0.0.0.0", port=settings.BOT_WEBHOOK_PORT)
+            return
+        
         # Создаём приложение
         print("🔄 Создание приложения Telegram бота...")
-        app = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
-        
-        # Добавляем обработчики команд
-        app.add_handler(CommandHandler("start", start))
-        app.add_handler(CommandHandler("help", help_command))
+        app = build_application()
         
         # Запускаем бота
         print("🤖 Бот запущен и готов к работе...")
@@ -0,0 +1,50 @@
+"""
+tests/conftest.py — общие фикстуры: временная SQLite БД и сессия
+
+Тесты запускаются из каталога backend: python -m pytest -q
+Настройки читаются при импорте config, поэтому окружение задаётся до импорта модулей приложения.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='tests-'), 'test.sqlite')}"
+os.environ["SECRET_KEY"] = "test-secret-key-" + "x" * 16
+os.environ["TELEGRAM_BOT_TOKEN"] = ""
+os.environ["RATE_LIMIT_BACKEND"] = "memory"
+os.environ["NOTIFICATIONS_ENABLED"] = "true"
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Создать схему и применить миграции один раз на запуск"""
+    from database import init_db
+    init_db()
+
+
+def clear_tables():
+    """Удалить данные всех таблиц"""
+    from database import Base, engine
+
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+
+@pytest.fixture
+def db():
+    """Сессия БД; после теста все таблицы очищаются"""
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+        clear_tables()
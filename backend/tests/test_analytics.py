@@ -0,0 +1,34 @@
+"""
+tests/test_analytics.py — аналитика хакатона для админ-панели
+"""
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from dependencies import get_current_admin
+from main import app
+from models import Hackathon, User, UserHackathon
+from services.skills import set_user_skills
+
+
+def test_skills_frequency_uses_display_names(db):
+    now = datetime.utcnow()
+    hackathon = Hackathon(name="Hackathon", start_date=now, end_date=now + timedelta(days=2))
+    db.add(hackathon)
+    db.flush()
+    for telegram_id, skills in [(1, ["Python", "React"]), (2, ["python"]), (3, ["Machine Learning"])]:
+        user = User(telegram_id=telegram_id, full_name=f"User {telegram_id}")
+        db.add(user)
+        db.flush()
+        set_user_skills(db, user, skills)
+        db.add(UserHackathon(user_id=user.id, hackathon_id=hackathon.id))
+    db.commit()
+
+    app.dependency_overrides[get_current_admin] = lambda: object()
+    try:
+        response = TestClient(app).get(f"/api/admin/{hackathon.id}/analytics")
+    finally:
+        app.dependency_overrides.pop(get_current_admin, None)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["skills_frequency"] == {"Python": 2, "React": 1, "Machine Learning": 1}
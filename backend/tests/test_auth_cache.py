@@ -0,0 +1,93 @@
+"""
+tests/test_auth_cache.py — кеш аутентификации и свежие данные в эндпоинтах записи
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from database import SessionLocal
+from main import app
+from models import Hackathon, User, UserHackathon
+from services.auth_cache import principal_cache, revoke_user_tokens, token_cache, token_version_cache
+from services.jwt_handler import create_access_token
+from services.stats import check_hackathon_stats, get_hackathon_stats, on_profile_changed
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    for cache in (token_cache, principal_cache, token_version_cache):
+        cache.clear()
+    yield
+    for cache in (token_cache, principal_cache, token_version_cache):
+        cache.clear()
+
+
+def create_participant(db, experience_level: str) -> tuple:
+    """Участник хакатона с инициализированными счётчиками аналитики; (user_id, hackathon_id, заголовки)"""
+    now = datetime.utcnow()
+    hackathon = Hackathon(name="Hackathon", start_date=now, end_date=now + timedelta(days=2))
+    user = User(telegram_id=1, full_name="User", experience_level=experience_level)
+    db.add_all([hackathon, user])
+    db.flush()
+    db.add(UserHackathon(user_id=user.id, hackathon_id=hackathon.id))
+    db.commit()
+    get_hackathon_stats(db, hackathon.id)
+    headers = {"Authorization": f"Bearer {create_access_token(user_id=user.id, is_admin=False)}"}
+    return user.id, hackathon.id, headers
+
+
+def test_read_routes_use_cached_principal(db):
+    _, _, headers = create_participant(db, "junior")
+    client = TestClient(app)
+
+    for _ in range(3):
+        assert client.get("/api/users/me", headers=headers).status_code == 200
+
+    assert principal_cache.stats()["hits"] == 2
+
+
+def test_profile_update_ignores_stale_snapshot(db):
+    user_id, hackathon_id, headers = create_participant(db, "junior")
+    client = TestClient(app)
+    assert client.get("/api/users/me", headers=headers).json()["experience_level"] == "junior"
+
+    # Другой воркер меняет профиль: его кеш сброшен, снимок в этом процессе устарел
+    other = SessionLocal()
+    try:
+        user = other.get(User, user_id)
+        user.experience_level = "senior"
+        on_profile_changed(other, user, "junior", user.get_skills())
+        other.commit()
+    finally:
+        other.close()
+
+    response = client.put("/api/users/me", headers=headers, json={"experience_level": "middle"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["experience_level"] == "middle"
+    db.expire_all()
+    assert check_hackathon_stats(db, hackathon_id) == {}
+    assert get_hackathon_stats(db, hackathon_id)["experience_distribution"] == {"middle": 1}
+
+
+def test_logout_all_increments_version_in_sql(db):
+    user_id, _, headers = create_participant(db, "junior")
+    client = TestClient(app)
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+
+    # Другой воркер уже отозвал токены и выдал новый; снимок в этом процессе — с версией 0
+    other = SessionLocal()
+    try:
+        revoke_user_tokens(other, user_id)
+        other.commit()
+    finally:
+        other.close()
+    new_headers = {"Authorization": f"Bearer {create_access_token(user_id=user_id, is_admin=False, token_version=1)}"}
+
+    assert client.post("/api/auth/logout-all", headers=new_headers).status_code == 200
+
+    db.expire_all()
+    assert db.get(User, user_id).token_version == 2
+    assert client.get("/api/users/me", headers=new_headers).status_code == 401
+    assert client.get("/api/users/me", headers=headers).status_code == 401
@@ -0,0 +1,80 @@
+"""
+tests/test_auth_codes.py — хранилища одноразовых кодов авторизации
+"""
+import time
+
+import pytest
+
+from services import auth_codes
+from services.auth_codes import AuthCodeStore, MemoryAuthCodeStore, RedisAuthCodeStore
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory":
+        return MemoryAuthCodeStore()
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisAuthCodeStore(client=fakeredis.FakeRedis())
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        AuthCodeStore()
+
+    class IssueOnlyStore(AuthCodeStore):
+        def issue(self, data: dict, ttl_seconds: int) -> str:
+            return "000000"
+
+    # Хранилище без consume не создаётся, а не падает при первой проверке кода
+    with pytest.raises(TypeError):
+        IssueOnlyStore()
+
+
+def test_code_is_consumed_once(store):
+    code = store.issue({"telegram_id": 1}, ttl_seconds=60)
+
+    assert len(code) == 6 and code.isdigit()
+    assert store.consume(code) == {"telegram_id": 1}
+    assert store.consume(code) is None
+    assert store.consume("000000") is None
+
+
+def test_colliding_code_is_regenerated(store, monkeypatch):
+    codes = iter(["111111", "111111", "222222"])
+    monkeypatch.setattr(auth_codes, "generate_code", lambda: next(codes))
+
+    assert store.issue({"telegram_id": 1}, ttl_seconds=60) == "111111"
+    assert store.issue({"telegram_id": 2}, ttl_seconds=60) == "222222"
+    # Первый код не перезаписан вторым
+    assert store.consume("111111") == {"telegram_id": 1}
+
+
+def test_issue_fails_when_every_code_is_taken(store, monkeypatch):
+    monkeypatch.setattr(auth_codes, "generate_code", lambda: "111111")
+    store.issue({"telegram_id": 1}, ttl_seconds=60)
+
+    with pytest.raises(RuntimeError):
+        store.issue({"telegram_id": 2}, ttl_seconds=60)
+
+
+def test_memory_code_expires():
+    store = MemoryAuthCodeStore()
+    code = store.issue({"telegram_id": 1}, ttl_seconds=0)
+
+    assert store.consume(code) is None
+    assert len(store) == 0
+
+
+def test_redis_code_expires():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis()
+    store = RedisAuthCodeStore(client=client, prefix="test_code:")
+    code = store.issue({"telegram_id": 1}, ttl_seconds=60)
+
+    # Истечение выполняет сервер: TTL выставлен при выдаче
+    assert 0 < client.ttl("test_code:" + code) <= 60
+    client.pexpire("test_code:" + code, 1)
+    time.sleep(0.01)
+
+    assert store.consume(code) is None
+    assert client.keys("test_code:*") == []
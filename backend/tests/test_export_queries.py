@@ -0,0 +1,153 @@
+"""
+tests/test_export_queries.py — число SQL запросов экспорта не зависит от числа строк,
+выгрузки сверх EXPORT_MAX_CONCURRENT ждут очереди в event loop, сверх очереди — 503
+"""
+import csv
+import io
+from datetime import datetime, timedelta
+
+import anyio
+import pytest
+from anyio import to_thread
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+from config import get_settings
+from database import engine
+from dependencies import get_current_admin
+from main import app
+from models import Hackathon, Team, TeamMember, User, UserHackathon
+from routers import admin
+from services import exports
+
+settings = get_settings()
+
+TEAM_SIZE = 5
+
+
+def seed_hackathon(db, participants: int) -> int:
+    """Хакатон с participants участниками, все в командах по TEAM_SIZE человек"""
+    now = datetime.utcnow()
+    hackathon = Hackathon(name=f"Hackathon {participants}", start_date=now, end_date=now + timedelta(days=2))
+    db.add(hackathon)
+    db.flush()
+
+    first_id = (db.query(User.id).order_by(User.id.desc()).limit(1).scalar() or 0) + 1
+    user_ids = list(range(first_id, first_id + participants))
+    db.execute(insert(User), [
+        {"id": user_id, "telegram_id": user_id, "full_name": f"User {user_id}", "skills": '["Python", "SQL"]'}
+        for user_id in user_ids
+    ])
+    teams = [user_ids[i:i + TEAM_SIZE] for i in range(0, participants, TEAM_SIZE)]
+    db.execute(insert(Team), [
+        {"hackathon_id": hackathon.id, "name": f"Team {members[0]}", "captain_id": members[0], "status": "open"}
+        for members in teams
+    ])
+    team_ids = dict(db.query(Team.captain_id, Team.id).filter(Team.hackathon_id == hackathon.id))
+    db.execute(insert(TeamMember), [
+        {"team_id": team_ids[members[0]], "user_id": user_id}
+        for members in teams for user_id in members
+    ])
+    db.execute(insert(UserHackathon), [
+        {"user_id": user_id, "hackathon_id": hackathon.id, "team_id": team_ids[members[0]]}
+        for members in teams for user_id in members
+    ])
+    db.commit()
+    return hackathon.id
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Маленькие пачки: yield_per должен дочитывать их тем же курсором, без новых запросов
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 50)
+    app.dependency_overrides[get_current_admin] = lambda: object()
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_current_admin, None)
+
+
+def count_statements(client, url: str) -> tuple[int, bytes]:
+    """Выполнить экспорт и вернуть (число SQL запросов, тело ответа)"""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert response.status_code == 200, response.text
+    return len(statements), response.content
+
+
+@pytest.mark.parametrize("kind", ["participants", "teams"])
+@pytest.mark.parametrize("export_format", ["csv", "parquet"])
+def test_export_statement_count_does_not_grow_with_rows(db, client, kind, export_format):
+    small = seed_hackathon(db, 10)
+    large = seed_hackathon(db, 600)
+
+    small_count, _ = count_statements(client, f"/api/admin/{small}/{kind}/export?format={export_format}")
+    large_count, _ = count_statements(client, f"/api/admin/{large}/{kind}/export?format={export_format}")
+
+    assert large_count == small_count
+    # Проверка хакатона + один запрос данных
+    assert 1 <= large_count <= 2
+
+
+def test_export_returns_every_row(db, client):
+    hackathon_id = seed_hackathon(db, 600)
+
+    _, body = count_statements(client, f"/api/admin/{hackathon_id}/participants/export?format=csv")
+    participants = list(csv.DictReader(io.StringIO(body.decode())))
+    assert len(participants) == 600
+
+    _, body = count_statements(client, f"/api/admin/{hackathon_id}/teams/export?format=csv")
+    teams = list(csv.DictReader(io.StringIO(body.decode())))
+    assert len(teams) == 600 // TEAM_SIZE
+    assert {team["Member Count"] for team in teams} == {str(TEAM_SIZE)}
+
+
+def test_exports_beyond_limit_wait_for_slot_without_holding_threads(db):
+    hackathon_id = seed_hackathon(db, 10)
+    slots = exports.ExportSlots(limit=1, max_queued=1)
+
+    async def scenario():
+        # Один поток в пуле: ожидание слота не должно его занимать
+        to_thread.current_default_thread_limiter().total_tokens = 1
+        first = slots.stream(exports.participants_export(hackathon_id, "csv"))
+        await first.__anext__()  # первая выгрузка заняла слот
+        second_started = anyio.Event()
+
+        async def run_second():
+            async for _ in slots.stream(exports.teams_export(hackathon_id, "csv")):
+                second_started.set()
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(run_second)
+            await anyio.sleep(0.2)
+            assert not second_started.is_set()
+            assert slots.is_full()
+            with anyio.fail_after(2):
+                assert await to_thread.run_sync(lambda: "db handler") == "db handler"
+
+            await first.aclose()  # выгрузка закончилась или клиент отключился — слот освобождается
+            with anyio.fail_after(5):
+                await second_started.wait()
+        assert not slots.is_full()
+
+    anyio.run(scenario)
+
+
+def test_export_rejected_when_queue_is_full(db, client, monkeypatch):
+    hackathon_id = seed_hackathon(db, 10)
+    slots = exports.ExportSlots(limit=1, max_queued=0)
+    slots._pending = 1
+    monkeypatch.setattr(admin, "export_slots", slots)
+
+    response = client.get(f"/api/admin/{hackathon_id}/participants/export?format=csv")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "10"
@@ -0,0 +1,190 @@
+"""
+tests/test_notifications.py — очередь уведомлений: дедупликация, повторы, лимиты
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from telegram.error import Forbidden, NetworkError, RetryAfter
+
+from config import get_settings
+from models import TelegramNotification, User
+from services import notifications
+from services.notifications import (
+    NotificationLimits, dispatch_batch, enqueue_notification, notify_application_received,
+    notify_invitation_received, send_notification, try_dispatcher_lock
+)
+from services.rate_limit import RedisRateLimitBackend
+
+settings = get_settings()
+
+
+class FakeBot:
+    """Бот, который записывает отправки или бросает заданную ошибку"""
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.error:
+            raise self.error
+        self.sent.append((chat_id, time.monotonic()))
+
+
+def create_user(db, telegram_id: int = 1001) -> User:
+    user = User(telegram_id=telegram_id, full_name="Тест Тестов")
+    db.add(user)
+    db.flush()
+    return user
+
+
+def assert_delay(result: dict, low: float, high: float):
+    delay = (result["next_attempt_at"] - datetime.utcnow()).total_seconds()
+    assert low - 1 <= delay <= high
+
+
+# ════════════════════════════════════════════
+# Постановка в очередь
+# ════════════════════════════════════════════
+
+def test_enqueue_ignores_duplicate_dedup_key(db):
+    user = create_user(db)
+    enqueue_notification(db, user.id, "первое", "invitation:1:received")
+    enqueue_notification(db, user.id, "второе", "invitation:1:received")
+    enqueue_notification(db, user.id, "другое событие", "invitation:1:approved")
+    db.commit()
+
+    texts = sorted(text for (text,) in db.query(TelegramNotification.text))
+    assert texts == ["другое событие", "первое"]
+
+
+def test_link_line_omitted_without_frontend_url(db, monkeypatch):
+    user = create_user(db)
+    monkeypatch.setattr(settings, "FRONTEND_URL", None)
+    notify_invitation_received(db, 1, user.id, "Команда")
+    notify_application_received(db, 2, user.id, "Иван", "Команда")
+    db.commit()
+
+    for (text,) in db.query(TelegramNotification.text):
+        assert "None" not in text
+        assert "Ответить" not in text and "Рассмотреть" not in text
+
+
+def test_link_line_included_with_frontend_url(db, monkeypatch):
+    user = create_user(db)
+    monkeypatch.setattr(settings, "FRONTEND_URL", "https://hack.example")
+    notify_invitation_received(db, 1, user.id, "Команда")
+    db.commit()
+
+    text = db.query(TelegramNotification.text).scalar()
+    assert text.endswith("\n\nОтветить: https://hack.example")
+
+
+# ════════════════════════════════════════════
+# Повторы
+# ════════════════════════════════════════════
+
+def test_network_error_retries_with_exponential_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFY_BACKOFF_SECONDS", 4)
+    monkeypatch.setattr(settings, "NOTIFY_MAX_ATTEMPTS", 5)
+    bot = FakeBot(NetworkError("timeout"))
+
+    first = asyncio.run(send_notification(bot, 1, 100, "text", 0))
+    assert first["status"] == "pending" and first["attempts"] == 1
+    assert_delay(first, 2, 4)
+
+    third = asyncio.run(send_notification(bot, 1, 100, "text", 2))
+    assert third["status"] == "pending" and third["attempts"] == 3
+    assert_delay(third, 8, 16)
+
+
+def test_network_error_fails_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFY_MAX_ATTEMPTS", 3)
+    result = asyncio.run(send_notification(FakeBot(NetworkError("timeout")), 1, 100, "text", 2))
+    assert result["status"] == "failed" and result["attempts"] == 3
+
+
+def test_retry_after_waits_without_counting_attempt():
+    result = asyncio.run(send_notification(FakeBot(RetryAfter(timedelta(seconds=30))), 1, 100, "text", 2))
+    assert result["status"] == "pending" and result["attempts"] == 2
+    assert_delay(result, 30, 30)
+
+
+def test_forbidden_fails_immediately():
+    result = asyncio.run(send_notification(FakeBot(Forbidden("bot was blocked by the user")), 1, 100, "text", 0))
+    assert result["status"] == "failed" and result["attempts"] == 1
+
+
+def test_success_marks_sent():
+    bot = FakeBot()
+    result = asyncio.run(send_notification(bot, 1, 100, "text", 0))
+    assert result["status"] == "sent" and result["attempts"] == 1
+    assert [chat_id for chat_id, _ in bot.sent] == [100]
+
+
+# ════════════════════════════════════════════
+# Лимиты
+# ════════════════════════════════════════════
+
+def test_busy_chat_is_deferred_without_blocking_others():
+    bot = FakeBot()
+    limits = NotificationLimits("100/1", "1/1")
+    batch = [(1, 100, "a", 0), (2, 100, "b", 0), (3, 200, "c", 0), (4, 100, "d", 0)]
+
+    results = {result["id"]: result for result in asyncio.run(dispatch_batch(bot, batch, limits))}
+
+    assert sorted(chat_id for chat_id, _ in bot.sent) == [100, 200]
+    assert results[1]["status"] == "sent" and results[3]["status"] == "sent"
+    # Отложенные сообщения в один чат разнесены на интервал лимита чата, попытка не тратится
+    assert results[2]["status"] == "pending" and results[2]["attempts"] == 0
+    assert_delay(results[2], 1, 1)
+    assert_delay(results[4], 2, 2)
+
+
+def test_global_limit_paces_sends_evenly():
+    bot = FakeBot()
+    limits = NotificationLimits("20/1", "1/1")
+    batch = [(i, 1000 + i, "text", 0) for i in range(6)]
+
+    asyncio.run(dispatch_batch(bot, batch, limits))
+
+    times = [sent_at for _, sent_at in bot.sent]
+    assert len(times) == 6
+    # 20 сообщений/с без всплеска — не чаще одного за 50 мс
+    assert times[-1] - times[0] >= 5 * 0.05 * 0.9
+
+
+def test_shared_store_limits_apply_across_workers():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis()
+    # Два воркера с общим хранилищем: второй видит, что чат уже "перегрет" первым
+    first = NotificationLimits("100/1", "1/1", RedisRateLimitBackend(client=client, prefix="notify_limit:"))
+    second = NotificationLimits("100/1", "1/1", RedisRateLimitBackend(client=client, prefix="notify_limit:"))
+    first_bot, second_bot = FakeBot(), FakeBot()
+
+    async def run():
+        await dispatch_batch(first_bot, [(1, 100, "a", 0)], first)
+        return await dispatch_batch(second_bot, [(2, 100, "b", 0)], second)
+
+    [result] = asyncio.run(run())
+    assert len(first_bot.sent) == 1 and second_bot.sent == []
+    assert result["status"] == "pending"
+
+
+def test_memory_limits_run_dispatcher_in_one_worker(tmp_path):
+    path = str(tmp_path / "notifications.lock")
+    owner = try_dispatcher_lock(path)
+    assert owner is not None
+    assert try_dispatcher_lock(path) is None
+    owner.close()
+    # Владелец завершился — блокировку берёт другой воркер
+    standby = try_dispatcher_lock(path)
+    assert standby is not None
+    standby.close()
+
+
+def test_shared_store_selected_for_redis_backend(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "redis")
+    assert isinstance(notifications.create_notification_limits().buckets, RedisRateLimitBackend)
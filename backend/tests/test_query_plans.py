@@ -0,0 +1,158 @@
+"""
+tests/test_query_plans.py — частые запросы роутеров используют составные и частичные индексы
+
+Запросы повторяют фильтры роутеров; план берётся через EXPLAIN QUERY PLAN для SQL,
+который SQLAlchemy реально отправляет в БД (с параметрами), на заполненной БД после
+ANALYZE — как после services/maintenance.py.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import and_, event, insert, select, text
+
+from database import SessionLocal, engine
+from models import Hackathon, Invitation, Team, User, UserHackathon
+from tests.conftest import clear_tables
+
+USERS = 2000
+HACKATHONS = 4
+TEAMS = 300
+INVITATIONS = 6000
+
+
+@pytest.fixture(scope="module")
+def db():
+    """БД с данными, похожими на боевые, и статистикой планировщика"""
+    rnd = random.Random(5)
+    now = datetime.utcnow()
+    session = SessionLocal()
+    try:
+        session.execute(insert(User), [
+            {"id": i, "telegram_id": 10_000 + i, "full_name": f"User {i}", "skills": "[]"}
+            for i in range(1, USERS + 1)
+        ])
+        session.execute(insert(Hackathon), [
+            {"id": i, "name": f"Hackathon {i}", "start_date": now, "end_date": now + timedelta(days=2)}
+            for i in range(1, HACKATHONS + 1)
+        ])
+        session.execute(insert(Team), [
+            {"id": i, "hackathon_id": i % HACKATHONS + 1, "name": f"Team {i}", "captain_id": i,
+             "status": rnd.choice(["open", "open", "closed", "completed"])}
+            for i in range(1, TEAMS + 1)
+        ])
+        # Большинство участников уже в командах: частичный индекс покрывает меньшинство
+        session.execute(insert(UserHackathon), [
+            {"user_id": user_id, "hackathon_id": hackathon_id,
+             "team_id": rnd.randint(1, TEAMS) if rnd.random() < 0.8 else None}
+            for user_id in range(1, USERS + 1)
+            for hackathon_id in rnd.sample(range(1, HACKATHONS + 1), 2)
+        ])
+        session.execute(insert(Invitation), [
+            {"team_id": rnd.randint(1, TEAMS), "user_id": rnd.randint(1, USERS), "sent_by_id": rnd.randint(1, TEAMS),
+             "status": status,
+             "responded_at": None if status == "pending" else now - timedelta(days=rnd.randint(0, 60))}
+            for status in (rnd.choice(["pending", "accepted", "declined", "declined", "expired"]) for _ in range(INVITATIONS))
+        ])
+        session.commit()
+        session.execute(text("ANALYZE"))
+        session.commit()
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+        clear_tables()
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM sqlite_stat1"))
+
+
+def query_plan(db, statement) -> str:
+    """План выполнения statement: SQL и параметры перехватываются при реальном выполнении"""
+    executed = []
+
+    def capture(conn, cursor, sql, parameters, context, executemany):
+        executed.append((sql, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        db.execute(statement).all()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    sql, parameters = executed[-1]
+    rows = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + sql, parameters).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def assert_uses_index(plan: str, table: str, index: str):
+    assert f"{table} USING INDEX {index}" in plan or f"{table} USING COVERING INDEX {index}" in plan, plan
+
+
+def test_user_hackathon_registration_lookup(db):
+    # routers/hackathons.py, routers/teams.py: участник зарегистрирован на хакатон?
+    plan = query_plan(db, select(UserHackathon).where(
+        UserHackathon.user_id == 7,
+        UserHackathon.hackathon_id == 2
+    ))
+    assert_uses_index(plan, "user_hackathon", "ix_user_hackathon_user_hackathon")
+
+
+def test_unassigned_participants_use_partial_index(db):
+    # routers/users.py, services/recommendations.py: участники хакатона без команды
+    plan = query_plan(db, select(User).join(UserHackathon, User.id == UserHackathon.user_id).where(
+        UserHackathon.hackathon_id == 2,
+        UserHackathon.team_id == None  # noqa: E711 — как в роутерах
+    ))
+    assert_uses_index(plan, "user_hackathon", "ix_user_hackathon_unassigned")
+
+
+def test_hackathon_teams_by_status(db):
+    # routers/teams.py: открытые команды хакатона
+    plan = query_plan(db, select(Team).where(Team.hackathon_id == 2, Team.status == "open"))
+    assert_uses_index(plan, "teams", "ix_teams_hackathon_status")
+
+
+def test_captain_team_in_hackathon(db):
+    # routers/teams.py: команда капитана на хакатоне
+    plan = query_plan(db, select(Team).where(Team.captain_id == 3, Team.hackathon_id == 4))
+    assert_uses_index(plan, "teams", "ix_teams_captain_hackathon")
+
+
+def test_existing_pending_invitation(db):
+    # routers/teams.py: нет ли уже активного приглашения пользователя в команду
+    plan = query_plan(db, select(Invitation).where(
+        Invitation.team_id == 10,
+        Invitation.user_id == 20,
+        Invitation.status == "pending"
+    ))
+    assert_uses_index(plan, "invitations", "ix_invitations_team_user_status")
+
+
+def test_team_pending_invitations_use_partial_index(db):
+    # routers/invitations.py: ожидающие приглашения команды для капитана
+    plan = query_plan(db, select(Invitation).where(
+        Invitation.team_id == 10,
+        Invitation.status == "pending"
+    ))
+    assert_uses_index(plan, "invitations", "ix_invitations_team_pending")
+
+
+def test_recently_processed_applications(db):
+    # routers/invitations.py: обработанные заявки пользователя за 7 дней
+    plan = query_plan(db, select(Invitation).join(Team, Invitation.team_id == Team.id).where(
+        Invitation.user_id == 20,
+        Invitation.status.in_(["accepted", "declined"]),
+        Invitation.sent_by_id == Team.captain_id,
+        Invitation.responded_at >= datetime.utcnow() - timedelta(days=7)
+    ).order_by(Invitation.responded_at.desc()))
+    assert_uses_index(plan, "invitations", "ix_invitations_user_status_responded")
+
+
+def test_user_pending_invitations(db):
+    # routers/invitations.py: ожидающие приглашения пользователя
+    plan = query_plan(db, select(Invitation).join(Team, Invitation.team_id == Team.id).where(
+        Invitation.user_id == 20,
+        Invitation.status == "pending",
+        ~and_(Invitation.sent_by_id == Team.captain_id, Invitation.user_id == 20)
+    ))
+    assert_uses_index(plan, "invitations", "ix_invitations_user_status_responded")
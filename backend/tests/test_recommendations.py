@@ -0,0 +1,108 @@
+"""
+tests/test_recommendations.py — подбор участников в команду
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from models import Hackathon, Team, TeamMember, User, UserHackathon
+from services import recommendations
+from services.jwt_handler import create_access_token
+from services.recommendations import build_participant_matrix, recommend_for_team
+from services.skills import set_user_skills
+
+
+@pytest.fixture(autouse=True)
+def empty_matrix_cache():
+    recommendations._cache.clear()
+    yield
+    recommendations._cache.clear()
+
+
+def add_participant(db, hackathon, telegram_id, skills, role=None, experience=None, team=None) -> User:
+    user = User(telegram_id=telegram_id, full_name=f"User {telegram_id}", role_preference=role, experience_level=experience)
+    db.add(user)
+    db.flush()
+    set_user_skills(db, user, skills)
+    db.add(UserHackathon(user_id=user.id, hackathon_id=hackathon.id, team_id=team.id if team else None))
+    if team:
+        db.add(TeamMember(team_id=team.id, user_id=user.id))
+    return user
+
+
+@pytest.fixture
+def team_setup(db):
+    """Команда (Python, backend, senior) и три кандидата без команды"""
+    now = datetime.utcnow()
+    hackathon = Hackathon(name="Hackathon", start_date=now, end_date=now + timedelta(days=2))
+    db.add(hackathon)
+    captain = User(telegram_id=100, full_name="Captain", role_preference="backend", experience_level="senior")
+    db.add(captain)
+    db.flush()
+    set_user_skills(db, captain, ["Python"])
+    team = Team(hackathon_id=hackathon.id, name="Team", captain_id=captain.id)
+    db.add(team)
+    db.flush()
+    db.add_all([
+        UserHackathon(user_id=captain.id, hackathon_id=hackathon.id, team_id=team.id),
+        TeamMember(team_id=team.id, user_id=captain.id),
+    ])
+    candidates = {
+        # Два новых навыка, недостающая роль, другой уровень
+        "best": add_participant(db, hackathon, 1, ["React", "Figma"], "frontend", "junior"),
+        # Один новый навык, роль уже есть в команде
+        "middle": add_participant(db, hackathon, 2, ["Python", "Go"], "backend", "middle"),
+        # Ничего нового: навык, роль и уровень как у команды
+        "worst": add_participant(db, hackathon, 3, ["Python"], "backend", "senior"),
+    }
+    db.commit()
+    return hackathon, team, captain, candidates
+
+
+def test_matrix_is_bit_packed(db, team_setup):
+    hackathon, *_ = team_setup
+
+    matrix = build_participant_matrix(db, hackathon.id)
+
+    assert matrix.skills.dtype == np.uint8
+    assert matrix.skills.shape == (3, 1)  # 4 навыка — один байт на участника
+    dense = np.unpackbits(matrix.skills, axis=1)[:, :len(matrix.skill_index)].astype(bool)
+    assert dense.sum(axis=1).tolist() == [2, 2, 1]
+
+
+def test_candidates_ranked_by_complementarity(db, team_setup):
+    hackathon, team, _, candidates = team_setup
+
+    ranked = recommend_for_team(db, hackathon.id, team.id, limit=10)
+
+    assert [user_id for user_id, _ in ranked] == [
+        candidates["best"].id, candidates["middle"].id, candidates["worst"].id
+    ]
+    scores = dict(ranked)
+    assert scores[candidates["best"].id] == pytest.approx(1.0)
+    # Навыки: 1 из 2 новых; роль занята; уровень middle в команде не встречается
+    assert scores[candidates["middle"].id] == pytest.approx(0.6 * 0.5 + 0.15)
+    assert scores[candidates["worst"].id] == pytest.approx(0.0)
+
+    assert [user_id for user_id, _ in recommend_for_team(db, hackathon.id, team.id, limit=1)] == [
+        candidates["best"].id
+    ]
+
+
+def test_endpoint_is_captain_only_and_returns_scores(db, team_setup):
+    hackathon, team, captain, candidates = team_setup
+    client = TestClient(app)
+    url = f"/api/users/hackathons/{hackathon.id}/recommendations"
+
+    def headers(user_id):
+        return {"Authorization": f"Bearer {create_access_token(user_id=user_id, is_admin=False)}"}
+
+    response = client.get(url, params={"team_id": team.id, "limit": 2}, headers=headers(captain.id))
+    assert response.status_code == 200, response.text
+    assert [item["id"] for item in response.json()] == [candidates["best"].id, candidates["middle"].id]
+
+    response = client.get(url, params={"team_id": team.id}, headers=headers(candidates["best"].id))
+    assert response.status_code == 403
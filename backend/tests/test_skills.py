@@ -0,0 +1,80 @@
+"""
+tests/test_skills.py — справочник навыков: одновременное создание, написание для аналитики
+"""
+from sqlalchemy import event, text
+
+from database import engine
+from migrations import _m002_backfill_user_skills
+from models import Skill, User, UserSkill
+from services.skills import get_display_names, get_or_create_skills, set_user_skills
+
+
+def test_creates_missing_skills_once(db):
+    first = get_or_create_skills(db, ["Python", " python ", "SQL"])
+    second = get_or_create_skills(db, ["python", "Go"])
+    db.commit()
+
+    assert sorted(skill.name for skill in first) == ["python", "sql"]
+    assert sorted(skill.name for skill in second) == ["go", "python"]
+    assert db.query(Skill).count() == 3
+
+
+def test_skill_created_concurrently_is_reused(db):
+    # Другой запрос создаёт тот же навык между нашим SELECT и INSERT
+    created = []
+
+    def create_concurrently(conn, cursor, statement, parameters, context, executemany):
+        if not created and statement.lstrip().startswith("SELECT") and "FROM skills" in statement:
+            created.append(True)
+            with engine.begin() as other:
+                other.execute(text("INSERT INTO skills (name) VALUES ('rust')"))
+
+    event.listen(engine, "after_cursor_execute", create_concurrently)
+    try:
+        skills = get_or_create_skills(db, ["Rust", "Kotlin"])
+        db.commit()
+    finally:
+        event.remove(engine, "after_cursor_execute", create_concurrently)
+
+    assert created
+    assert sorted(skill.name for skill in skills) == ["kotlin", "rust"]
+    assert db.query(Skill).filter(Skill.name == "rust").count() == 1
+
+
+def test_set_user_skills_links_normalized_skills(db):
+    user = User(telegram_id=1, full_name="Тест")
+    db.add(user)
+    db.flush()
+
+    set_user_skills(db, user, ["Python", "SQL"])
+    db.commit()
+    set_user_skills(db, user, ["python", "Docker"])
+    db.commit()
+
+    skill_ids = [link.skill_id for link in user.skill_links]
+    names = sorted(name for (name,) in db.query(Skill.name).filter(Skill.id.in_(skill_ids)))
+    assert names == ["docker", "python"]
+
+
+def test_new_skill_keeps_first_spelling(db):
+    get_or_create_skills(db, [" PostgreSQL ", "postgresql"])
+    get_or_create_skills(db, ["POSTGRESQL"])
+    db.commit()
+
+    assert get_display_names(db, ["postgresql", "unknown"]) == {"postgresql": "PostgreSQL"}
+
+
+def test_migration_backfills_most_common_spelling(db):
+    db.execute(text("INSERT INTO skills (name) VALUES ('javascript'), ('go')"))
+    db.add_all([
+        User(telegram_id=1, full_name="A", skills='["JavaScript", "go"]'),
+        User(telegram_id=2, full_name="B", skills='["javascript"]'),
+        User(telegram_id=3, full_name="C", skills='[" JavaScript "]'),
+    ])
+    db.commit()
+
+    with engine.begin() as conn:
+        _m002_backfill_user_skills(conn)
+
+    assert get_display_names(db, ["javascript", "go"]) == {"javascript": "JavaScript", "go": "go"}
+    assert db.query(UserSkill).count() == 4
@@ -0,0 +1,130 @@
+"""
+tests/test_team_formation.py — автоматическое распределение участников без команды
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from dependencies import get_current_admin
+from main import app
+from models import Hackathon, Team, TeamMember, User, UserHackathon
+from services.team_formation import plan_team_formation
+
+
+def create_hackathon(db, max_team_size: int) -> Hackathon:
+    now = datetime.utcnow()
+    hackathon = Hackathon(
+        name="Hackathon", start_date=now, end_date=now + timedelta(days=2), max_team_size=max_team_size
+    )
+    db.add(hackathon)
+    db.flush()
+    return hackathon
+
+
+def register(db, hackathon: Hackathon, roles: list) -> dict:
+    """Зарегистрировать участников с ролями; вернуть {user_id: role}"""
+    users = {}
+    for role in roles:
+        user = User(telegram_id=len(users) + 1, full_name=f"User {len(users) + 1}", role_preference=role)
+        db.add(user)
+        db.flush()
+        db.add(UserHackathon(user_id=user.id, hackathon_id=hackathon.id))
+        users[user.id] = role
+    db.commit()
+    return users
+
+
+def auto_assign(hackathon_id: int, **params):
+    app.dependency_overrides[get_current_admin] = lambda: object()
+    try:
+        return TestClient(app).post(f"/api/admin/hackathons/{hackathon_id}/auto-assign", params=params)
+    finally:
+        app.dependency_overrides.pop(get_current_admin, None)
+
+
+def test_new_teams_cover_all_roles(db):
+    hackathon = create_hackathon(db, max_team_size=3)
+    roles = register(db, hackathon, ["backend"] * 3 + ["frontend"] * 3 + ["design"] * 3)
+
+    plans, unassigned = plan_team_formation(db, hackathon)
+
+    assert unassigned == []
+    assert [len(plan.member_ids) for plan in plans] == [3, 3, 3]
+    for plan in plans:
+        assert {roles[uid] for uid in plan.member_ids} == {"backend", "frontend", "design"}
+
+
+def test_roles_are_split_evenly_between_teams(db):
+    hackathon = create_hackathon(db, max_team_size=3)
+    roles = register(db, hackathon, ["backend"] * 6 + ["frontend"] * 3 + ["design"] * 3)
+
+    plans, _ = plan_team_formation(db, hackathon)
+
+    assert len(plans) == 4
+    for plan in plans:
+        counts = Counter(roles[uid] for uid in plan.member_ids)
+        assert len(plan.member_ids) == 3
+        assert len(counts) >= 2
+        assert counts["backend"] <= 2
+
+
+def test_groups_below_min_size_stay_unassigned(db):
+    hackathon = create_hackathon(db, max_team_size=2)
+    register(db, hackathon, ["backend", "frontend", "design"])
+
+    plans, unassigned = plan_team_formation(db, hackathon, min_team_size=2)
+
+    assert [len(plan.member_ids) for plan in plans] == [2]
+    assert len(unassigned) == 1
+    assert unassigned[0] not in plans[0].member_ids
+
+    _, unassigned = plan_team_formation(db, hackathon, min_team_size=4)
+    assert len(unassigned) == 3
+
+
+def test_new_team_names_skip_taken_ones(db):
+    hackathon = create_hackathon(db, max_team_size=2)
+    captain_id = next(iter(register(db, hackathon, ["backend"] * 6)))
+    for name in ["Команда 1", "Команда 3"]:
+        db.add(Team(hackathon_id=hackathon.id, name=name, captain_id=captain_id, status="closed"))
+    db.commit()
+
+    plans, _ = plan_team_formation(db, hackathon)
+
+    assert [plan.name for plan in plans] == ["Команда 2", "Команда 4", "Команда 5"]
+
+
+def test_dry_run_does_not_change_database(db):
+    hackathon = create_hackathon(db, max_team_size=3)
+    register(db, hackathon, ["backend", "frontend", "design"] * 2)
+
+    response = auto_assign(hackathon.id)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["dry_run"] is True
+    assert body["assigned_count"] == 6
+    assert body["new_teams_count"] == 2
+    assert all(team["team_id"] is None for team in body["teams"])
+    assert db.query(Team).count() == 0
+    assert db.query(UserHackathon).filter(UserHackathon.team_id != None).count() == 0
+
+
+def test_apply_creates_teams_and_assigns_participants(db):
+    hackathon = create_hackathon(db, max_team_size=3)
+    register(db, hackathon, ["backend", "frontend", "design"] * 2)
+
+    response = auto_assign(hackathon.id, dry_run=False)
+
+    assert response.status_code == 200, response.text
+    teams = response.json()["teams"]
+    assert len(teams) == 2
+    for team in teams:
+        members = {uid for (uid,) in db.query(TeamMember.user_id).filter(TeamMember.team_id == team["team_id"])}
+        assert members == set(team["member_ids"])
+        assert team["captain_id"] in members
+    assert db.query(UserHackathon).filter(UserHackathon.team_id == None).count() == 0
+
+    # Повторный запуск: распределять больше некого
+    assert auto_assign(hackathon.id, dry_run=False).json()["assigned_count"] == 0
@@ -0,0 +1,94 @@
+"""
+tests/test_telegram_webhook.py — приём обновлений webhook и проверка его настроек
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import telegram_bot
+from config import get_settings
+
+settings = get_settings()
+
+SECRET = "test_webhook-secret"
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    """Клиент приложения с роутером webhook и очередь, в которую он кладёт обновления"""
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_SECRET", SECRET)
+    application = SimpleNamespace(bot=None, update_queue=asyncio.Queue())
+    app = FastAPI()
+    app.include_router(telegram_bot.create_webhook_router(application))
+    with TestClient(app) as client:
+        yield client, application.update_queue
+
+
+def post_update(client, content, secret=SECRET):
+    headers = {"Content-Type": "application/json"}
+    if secret is not None:
+        headers["X-Telegram-Bot-Api-Secret-Token"] = secret
+    return client.post(settings.TELEGRAM_WEBHOOK_PATH, content=content, headers=headers)
+
+
+def test_valid_update_is_queued(webhook):
+    client, queue = webhook
+    response = post_update(client, '{"update_id": 42}')
+    assert response.status_code == 200
+    assert queue.get_nowait().update_id == 42
+
+
+@pytest.mark.parametrize("secret", [None, "", "wrong"])
+def test_missing_or_wrong_secret_is_rejected(webhook, secret):
+    client, queue = webhook
+    assert post_update(client, '{"update_id": 42}', secret=secret).status_code == 403
+    assert queue.empty()
+
+
+def test_rejected_when_secret_is_not_configured(webhook, monkeypatch):
+    client, _ = webhook
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_SECRET", "")
+    assert post_update(client, '{"update_id": 42}', secret="").status_code == 403
+
+
+@pytest.mark.parametrize("content", ["not json", "", "[1, 2]", "{}", '{"update_id": "x", "message": 1}'])
+def test_malformed_update_returns_400(webhook, content):
+    client, queue = webhook
+    assert post_update(client, content).status_code == 400
+    assert queue.empty()
+
+
+def test_config_requires_url_and_secret(monkeypatch):
+    monkeypatch.setattr(telegram_bot, "TELEGRAM_BOT_TOKEN", "123:token")
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_URL", " ")
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_SECRET", "")
+    errors = telegram_bot.get_webhook_config_errors()
+    assert any("TELEGRAM_WEBHOOK_URL" in error for error in errors)
+    assert any("TELEGRAM_WEBHOOK_SECRET" in error for error in errors)
+
+
+def test_config_rejects_http_url_and_invalid_secret(monkeypatch):
+    monkeypatch.setattr(telegram_bot, "TELEGRAM_BOT_TOKEN", "123:token")
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_URL", "http://api.example")
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_SECRET", "has spaces")
+    assert len(telegram_bot.get_webhook_config_errors()) == 2
+
+
+def test_config_accepts_complete_settings(monkeypatch):
+    monkeypatch.setattr(telegram_bot, "TELEGRAM_BOT_TOKEN", "123:token")
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_URL", "https://api.example")
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_SECRET", SECRET)
+    assert telegram_bot.get_webhook_config_errors() == []
+
+
+def test_standalone_webhook_refuses_to_start_without_secret(monkeypatch):
+    monkeypatch.setattr(telegram_bot, "TELEGRAM_BOT_TOKEN", "123:token")
+    monkeypatch.setattr(telegram_bot, "BACKEND_URL", "http://backend:8000")
+    monkeypatch.setattr(settings, "BOT_MODE", "webhook")
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_URL", "https://api.example")
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_SECRET", "")
+    with pytest.raises(SystemExit):
+        telegram_bot.check_config()
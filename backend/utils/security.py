@@ -2,6 +2,8 @@
 utils/security.py — хеширование паролей и проверка подписей
 """
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import hashlib
 import hmac
 from config import get_settings
@@ -9,8 +11,22 @@ from config import get_settings
 settings = get_settings()
 
 # Для хеширования паролей админов
-# Используем pbkdf2_sha256, чтобы избежать проблем с bcrypt версией и ограничением в 72 байта
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Используем pbkdf2_sha256, чтобы избежать проблем с bcrypt версией и ограничением в 72 байта.
+# Хеши с другим числом раундов считаются устаревшими и пересчитываются при входе
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__rounds=settings.PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__max_rounds=settings.PASSWORD_HASH_ROUNDS
+)
+
+# Отдельный ограниченный пул для хеширования: десятки миллисекунд CPU на попытку входа
+# не блокируют event loop и не занимают потоки обработчиков БД
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
 
 
 def hash_password(password: str) -> str:
@@ -23,6 +39,15 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Проверить пароль в пуле хеширования.
+    Возвращает (пароль верен, новый хеш) — новый хеш не None, если число раундов изменилось
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 def verify_telegram_signature(init_data: str) -> bool:
     """
     Проверить подпись инициализации Telegram Mini App
@@ -49,7 +49,7 @@ export interface Invitation {
   team_id: number;
   user_id: number;
   sent_by_id: number;
-  status: 'pending' | 'accepted' | 'declined';
+  status: 'pending' | 'accepted' | 'declined' | 'expired';
   created_at: string;
   responded_at?: string;
   team?: Team;